@@ -0,0 +1,20 @@
+import os
+import json
+import threading
+
+def atomic_write(path, content):
+    """
+    Grava num .tmp ao lado do destino e troca com os.replace: quem lê nunca vê o arquivo pela metade,
+    nem se o processo morrer no meio. O id da thread no nome evita que duas threads dividam o .tmp.
+    """
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    if isinstance(content, bytes):
+        with open(tmp, "wb") as f:
+            f.write(content)
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+    os.replace(tmp, path)
+
+def atomic_write_json(path, data, **dump_kwargs):
+    atomic_write(path, json.dumps(data, **dump_kwargs))
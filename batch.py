@@ -0,0 +1,123 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+import config as config_loader
+import workspaces
+import tracing
+import node_worker
+
+BATCH_DIR = os.path.join(os.getcwd(), "batch_runs")
+RESULT_FILE = "fabrica_result.json"
+
+_results_lock = threading.Lock()
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:30] or "app"
+
+def load_ideas(path):
+    """Each line: {"prompt": "...", "id": "..."} (id optional) or a plain JSON string."""
+    ideas = []
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line: continue
+            item = json.loads(line)
+            if isinstance(item, str): item = {"prompt": item}
+            prompt = item.get("prompt") or item.get("idea")
+            if not prompt: continue
+            ideas.append({"id": item.get("id") or f"{i + 1:04d}-{slugify(prompt)}", "prompt": prompt})
+    return ideas
+
+def setup_agent(mode, use_database=False):
+    config = main.load_credentials()  # Lido uma vez para o lote inteiro
+    if not config: sys.exit(1)
+
+    if mode == "local":
+        import fabrica_local
+        fabrica_local.select_local_model(config.get("local_model"))
+        fabrica_local.warm_up_model()
+        fabrica_local.USE_DATABASE = use_database
+        return fabrica_local.build_project
+
+    if not main.validate_environment(config): sys.exit(1)
+
+    import fabrica
+    fabrica.aplicar_config(config)
+    fabrica.USE_DATABASE = use_database and bool(fabrica.SUPABASE_URL and fabrica.SUPABASE_KEY)
+    return fabrica.gerar_projeto
+
+def run_idea(idea, pipeline, manager):
+    out_dir = manager.root
+    project_path = os.path.join(out_dir, idea["id"])
+    result = {"id": idea["id"], "prompt": idea["prompt"], "project_path": project_path, "status": "ok"}
+    start = time.time()
+    try:
+        t = time.time()
+        manager.create(idea["id"])
+        setup_time = round(time.time() - t, 3)
+
+        files, _, timings = pipeline(idea["prompt"], project_path, False)
+        result["files"] = files
+        result["timings"] = dict(timings, setup=setup_time)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    finally:
+        node_worker.close_worker(project_path)  # Um processo Node por workspace: não sobrevive à ideia
+    result["elapsed"] = round(time.time() - start, 3)
+
+    if os.path.isdir(project_path):
+        with open(os.path.join(project_path, RESULT_FILE), "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    with _results_lock:
+        with open(os.path.join(out_dir, "results.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    status = "OK" if result["status"] == "ok" else "ERROR"
+    main.print_status(f"{idea['id']} ({result['elapsed']}s)", status)
+    return result
+
+def run_batch(ideas_path, mode="cloud", parallel=2, out_dir=BATCH_DIR, use_database=False, link_mode="symlink"):
+    ideas = load_ideas(ideas_path)
+    if not ideas:
+        main.print_status(f"No ideas found in '{ideas_path}'", "WARN")
+        return []
+
+    os.makedirs(out_dir, exist_ok=True)
+    manager = workspaces.WorkspaceManager(root=out_dir, template=main.PROJECT_PATH, link_mode=link_mode)
+    for path in manager.gc():
+        main.print_status(f"Removed old workspace: {os.path.basename(path)}", "INFO")
+    pipeline = setup_agent(mode, use_database)
+    main.print_status(f"Batch: {len(ideas)} ideas | mode={mode} | parallel={parallel}", "INFO")
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        results = list(pool.map(lambda idea: run_idea(idea, pipeline, manager), ideas))
+
+    tracing.finish_run("BATCH METRICS")
+    ok = sum(1 for r in results if r["status"] == "ok")
+    main.print_status(f"Finished {ok}/{len(results)} projects in {round(time.time() - start, 1)}s -> {out_dir}", "OK" if ok == len(results) else "WARN")
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate many app ideas unattended from a JSONL file.")
+    parser.add_argument("ideas", help="JSONL file, one idea per line")
+    parser.add_argument("--mode", choices=["cloud", "local"], default="cloud")
+    parser.add_argument("--parallel", type=int, default=2, help="Projects generated at the same time")
+    parser.add_argument("--out", default=BATCH_DIR, help="Folder for the generated projects")
+    parser.add_argument("--link-mode", choices=workspaces.LINK_MODES, default="symlink", help="How node_modules is shared with base-app")
+    parser.add_argument("--database", action="store_true", help="Enable Supabase instructions (cloud only)")
+    config_loader.add_arguments(parser)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    config_loader.use_args(args)
+    run_batch(args.ideas, args.mode, args.parallel, os.path.abspath(args.out), args.database, args.link_mode)
@@ -0,0 +1,282 @@
+import os
+import re
+import sys
+import json
+import time
+import glob
+import hashlib
+import argparse
+import statistics
+
+import main
+import tracing
+import config as config_loader
+import workspaces
+import node_worker
+import lucide_index
+import llm_backend
+from colors import CYAN, GREEN, YELLOW, RED, RESET
+
+BENCH_DIR = os.path.join(os.getcwd(), "benchmarks")
+RECORDINGS_DIR = os.path.join(BENCH_DIR, "recordings")
+MODES = ("live", "record", "replay")
+LOCAL_PREFIX = "ollama:"
+
+# Corpus fixo: mudar as ideias invalida a comparação com relatórios anteriores
+CORPUS = [
+    "A todo list with categories, due dates and a dark mode toggle",
+    "A landing page for a coffee shop with menu, opening hours and a contact form",
+    "A personal finance dashboard with monthly expenses chart and recent transactions",
+    "A recipe browser with search, filters by cuisine and a favorites list",
+    "A portfolio site for a photographer with gallery, about section and social links",
+]
+
+_LUCIDE_IMPORT_RE = re.compile(r"import\s+\{(.*?)\}\s+from\s+['\"]lucide-react['\"]", re.DOTALL)
+
+def _percentile(values, pct):
+    values = sorted(v for v in values if v is not None)
+    if not values: return None
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return round(values[index], 3)
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:40] or "model"
+
+class BenchmarkBackend:
+    """
+    Envolve o LLMBackend do agente: mede TTFT/latência/tokens de cada chamada e,
+    conforme o modo, grava as respostas (record) ou as devolve do disco sem rede (replay).
+    Chamadas de geração de arquivo usam stream para medir o tempo até o primeiro token.
+    """
+
+    def __init__(self, inner, label, mode="live", recordings_dir=RECORDINGS_DIR):
+        self.inner = inner
+        self.label = label
+        self.mode = mode
+        self.directory = os.path.join(recordings_dir, _slug(label))
+        self.calls = []
+
+    def _path(self, system, prompt, temperature, json_mode):
+        raw = json.dumps([self.label, system, prompt, round(float(temperature), 3), json_mode if isinstance(json_mode, dict) else bool(json_mode)], ensure_ascii=False)
+        return os.path.join(self.directory, hashlib.sha256(raw.encode("utf-8")).hexdigest() + ".json")
+
+    def _live(self, system, prompt, model, temperature, json_mode):
+        start = time.time()
+        if json_mode:
+            resp = self.inner.complete(system, prompt, model, temperature=temperature, json_mode=json_mode)
+            return {"text": resp.text, "ttft": None, "latency": round(time.time() - start, 3),
+                    "prompt_tokens": resp.prompt_tokens, "completion_tokens": resp.completion_tokens}
+
+        ttft, parts = None, []
+        for chunk in self.inner.stream(system, prompt, model, temperature=temperature):
+            if ttft is None: ttft = round(time.time() - start, 3)
+            parts.append(chunk)
+        text = "".join(parts)
+        # Stream não traz contagem de tokens: estimativa por caracteres
+        return {"text": text, "ttft": ttft, "latency": round(time.time() - start, 3),
+                "prompt_tokens": None, "completion_tokens": len(text) // llm_backend.CHARS_PER_TOKEN}
+
+    def complete(self, system, prompt, model, temperature=0.7, json_mode=False, timeout=None):
+        path = self._path(system, prompt, temperature, json_mode)
+        if self.mode == "replay":
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                raise llm_backend.LLMError(f"No recording for this call ({os.path.basename(path)})", self.label)
+        else:
+            entry = self._live(system, prompt, model, temperature, json_mode)
+            if self.mode == "record":
+                os.makedirs(self.directory, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+
+        self.calls.append({"kind": "plan" if json_mode else "file", **{k: v for k, v in entry.items() if k != "text"}})
+        return llm_backend.Completion(entry["text"], entry.get("prompt_tokens"), entry.get("completion_tokens"), entry["latency"])
+
+    def stream(self, system, prompt, model, temperature=0.7):
+        yield self.complete(system, prompt, model, temperature).text
+
+def icon_stats(code, valid):
+    """(ícones importados do lucide-react, quantos não existem na versão instalada)."""
+    if not valid: return 0, 0
+    names = []
+    for block in _LUCIDE_IMPORT_RE.findall(code):
+        names += [item.split(" as ")[0].strip() for item in block.split(",") if item.strip()]
+    return len(names), sum(1 for name in names if name not in valid)
+
+def setup_model(label, mode, recordings_dir):
+    """
+    Configura o agente certo para o modelo e troca o backend dele pelo de benchmark.
+    LLMError se o modelo do Ollama não estiver instalado: o agente cairia no fallback e o
+    resultado sairia com o nome errado.
+    """
+    if label.startswith(LOCAL_PREFIX):
+        import fabrica_local as agent
+        model = label[len(LOCAL_PREFIX):]
+        if mode != "replay":
+            resolved = agent.SESSION.resolve_ollama_model(model, "llama3.2")
+            if resolved != model:
+                raise llm_backend.LLMError(f"Ollama model '{model}' is not installed (calls would fall back to '{resolved}')", "ollama")
+        agent.LOCAL_MODEL = model
+        agent.RESPONSE_CACHE.enabled = False
+        inner = agent.BACKEND.inner if isinstance(agent.BACKEND, BenchmarkBackend) else agent.BACKEND
+        backend = BenchmarkBackend(inner, label, mode, recordings_dir)
+        agent.BACKEND = backend
+        return agent, backend
+
+    config = main.load_credentials(overrides={"model": label})
+    if not config: sys.exit(1)
+    if mode != "replay" and not main.validate_environment(config): sys.exit(1)
+
+    import fabrica as agent
+    agent.aplicar_config(config)
+    agent.CACHE_IA.enabled = False  # Mede o modelo, não o cache
+    backend = BenchmarkBackend(agent.BACKEND, label, mode, recordings_dir)
+    agent.BACKEND = backend
+    return agent, backend
+
+def run_idea(agent, idea, project_path, build=True):
+    """Pipeline real (arquiteto + um arquivo por vez) sem o portão de validação: mede a saída crua do modelo."""
+    local = agent.__name__ == "fabrica_local"
+    start = time.time()
+    plan = agent.plan_architecture(idea) if local else agent.planejar_arquitetura(idea)
+    files = plan.files
+    valid_icons = lucide_index.load(project_path)
+
+    context, icons, hallucinated, failed = {}, 0, 0, 0
+    for target in files:
+        try:
+            if local: code = agent.generate_file(target, context, idea, target_imports=plan.imports.get(target))
+            else: code = agent.gerar_arquivo_especifico(target, context, idea, silencioso=True, caminho_projeto=project_path, imports_alvo=plan.imports.get(target))
+        except llm_backend.LLMError:
+            failed += 1  # Geração desistiu do arquivo: nada é gravado
+            continue
+        if local: agent.save_file(target, code, project_path)
+        else: agent.salvar_arquivo_caminho_custom(target, code, project_path)
+        context[target] = code
+        used, bad = icon_stats(code, valid_icons)
+        icons += used
+        hallucinated += bad
+    generation = round(time.time() - start, 3)
+
+    result = {"idea": idea, "files": files, "failed_files": failed, "generation_seconds": generation, "icons": icons, "hallucinated_icons": hallucinated}
+    if build:
+        if local: agent.check_dependencies(context, project_path=project_path)
+        else: agent.verificar_dependencias_global(context, caminho_projeto=project_path)
+        t = time.time()
+        ok, error = node_worker.build(project_path)
+        result.update(build_ok=ok, build_seconds=round(time.time() - t, 3), build_error=None if ok else (error or "")[-500:])
+    return result
+
+def summarize(runs, calls):
+    file_calls = [c for c in calls if c["kind"] == "file"]
+    generated_tokens = sum(c.get("completion_tokens") or 0 for c in file_calls)
+    generation_time = sum(c["latency"] - (c.get("ttft") or 0) for c in file_calls)
+    builds = [r["build_ok"] for r in runs if "build_ok" in r]
+    icons = sum(r.get("icons", 0) for r in runs)
+    return {
+        "ideas": len(runs),
+        "errors": sum(1 for r in runs if r.get("error")),
+        "files": sum(len(r.get("files", [])) for r in runs),
+        "failed_files": sum(r.get("failed_files", 0) for r in runs),
+        "ttft_p50": _percentile([c.get("ttft") for c in file_calls], 50),
+        "ttft_p95": _percentile([c.get("ttft") for c in file_calls], 95),
+        "latency_p50": _percentile([c["latency"] for c in file_calls], 50),
+        "latency_p95": _percentile([c["latency"] for c in file_calls], 95),
+        "tokens_per_second": round(generated_tokens / generation_time, 1) if generation_time > 0 else None,
+        "idea_seconds_mean": round(statistics.mean(r["generation_seconds"] for r in runs if "generation_seconds" in r), 2) if any("generation_seconds" in r for r in runs) else None,
+        "build_success": round(sum(builds) / len(builds), 3) if builds else None,
+        "icon_hallucination": round(sum(r.get("hallucinated_icons", 0) for r in runs) / icons, 3) if icons else None,
+    }
+
+def rank_key(summary):
+    """Ordem de preferência: compila mais, alucina menos ícones, responde mais rápido."""
+    build = summary.get("build_success")
+    icons = summary.get("icon_hallucination")
+    latency = summary.get("latency_p50")
+    return (-(build if build is not None else -1), icons if icons is not None else 1, latency if latency is not None else float("inf"))
+
+def format_table(models):
+    columns = ["Model", "Ideas", "Err", "Failed files", "TTFT p50", "TTFT p95", "Lat p50", "Lat p95", "Tok/s", "Idea s", "Build ok", "Icon halluc."]
+    keys = ["ideas", "errors", "failed_files", "ttft_p50", "ttft_p95", "latency_p50", "latency_p95", "tokens_per_second", "idea_seconds_mean", "build_success", "icon_hallucination"]
+    rows = [[label] + ["-" if s.get(k) is None else s[k] for k in keys] for label, s in sorted(models.items(), key=lambda item: rank_key(item[1]))]
+    return tracing.format_table(columns, rows)
+
+def run_benchmark(models, mode="live", ideas=None, out_dir=BENCH_DIR, recordings_dir=RECORDINGS_DIR, build=True, link_mode="symlink"):
+    ideas = ideas or CORPUS
+    manager = workspaces.WorkspaceManager(root=os.path.join(out_dir, "projects"), template=main.PROJECT_PATH, link_mode=link_mode)
+    report = {"created_at": time.strftime("%Y-%m-%d %H:%M:%S"), "mode": mode, "corpus": ideas, "models": {}, "skipped": {}, "runs": []}
+
+    for label in models:
+        print(f"\n{CYAN}>>> BENCHMARK: {label} ({mode}){RESET}")
+        try:
+            agent, backend = setup_model(label, mode, recordings_dir)
+        except llm_backend.LLMError as e:
+            main.print_status(f"Skipping {label}: {e}", "ERROR")
+            report["skipped"][label] = str(e)
+            continue
+        runs = []
+        for i, idea in enumerate(ideas):
+            project_path = manager.create(f"{_slug(label)}-{i + 1:02d}")
+            try:
+                result = run_idea(agent, idea, project_path, build)
+            except Exception as e:
+                result = {"idea": idea, "error": str(e)}
+            finally:
+                node_worker.close_worker(project_path)
+            result["model"] = label
+            runs.append(result)
+            status = "ERROR" if result.get("error") else ("OK" if result.get("build_ok", True) else "WARN")
+            main.print_status(f"[{i + 1}/{len(ideas)}] {idea[:50]}", status)
+
+        report["models"][label] = summarize(runs, backend.calls)
+        report["runs"] += runs
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, time.strftime("report-%Y%m%d-%H%M%S.json"))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{GREEN}📊 MODEL BENCHMARK ({mode}){RESET}\n{format_table(report['models'])}\n   ↳ {path}")
+    return report
+
+def latest_report(out_dir=BENCH_DIR):
+    reports = sorted(glob.glob(os.path.join(out_dir, "report-*.json")))
+    if not reports: return None
+    try:
+        with open(reports[-1], "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def best_local_model(available, out_dir=BENCH_DIR):
+    """Melhor modelo do Ollama instalado segundo o último relatório (ou None se nenhum foi medido)."""
+    report = latest_report(out_dir)
+    if not report: return None
+    measured = {label[len(LOCAL_PREFIX):]: summary for label, summary in report.get("models", {}).items()
+                if label.startswith(LOCAL_PREFIX) and summary.get("ideas")}
+    candidates = [name for name in measured if name in available]
+    return min(candidates, key=lambda name: rank_key(measured[name])) if candidates else None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare models on a fixed corpus of app ideas (latency, TTFT, tokens/s, build success, icon hallucinations).")
+    parser.add_argument("--models", nargs="+", required=True, help=f"Cloud model names (e.g. gemini-2.5-flash-lite) or '{LOCAL_PREFIX}<name>' for Ollama")
+    parser.add_argument("--mode", choices=MODES, default="live", help="live: call the APIs | record: call and save responses | replay: use saved responses offline")
+    parser.add_argument("--ideas", type=int, default=len(CORPUS), help="Use only the first N ideas of the corpus")
+    parser.add_argument("--out", default=BENCH_DIR, help="Folder for reports and generated projects")
+    parser.add_argument("--recordings", default=RECORDINGS_DIR, help="Folder with recorded responses")
+    parser.add_argument("--no-build", action="store_true", help="Skip dependency install and vite build")
+    parser.add_argument("--link-mode", choices=workspaces.LINK_MODES, default="symlink", help="How node_modules is shared with base-app")
+    config_loader.add_arguments(parser)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    config_loader.use_args(args)
+    if args.mode == "replay" and not os.path.isdir(args.recordings):
+        print(f"{RED}❌ No recordings in '{args.recordings}'. Run once with --mode record.{RESET}")
+        sys.exit(1)
+    run_benchmark(args.models, args.mode, CORPUS[:max(1, args.ideas)], os.path.abspath(args.out),
+                  os.path.abspath(args.recordings), not args.no_build, args.link_mode)
+    print(f"{YELLOW}Tip: the local agent picks the best measured Ollama model automatically.{RESET}")
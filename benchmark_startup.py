@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import argparse
+import importlib.util
+import threading
+import statistics
+import subprocess
+
+from colors import CYAN, GREEN, YELLOW, RED, RESET
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RUNS = 5
+TIMEOUT = 30  # segundos por execução
+
+# Orçamento (mediana, em segundos) de cada cenário; acima dele o script sai com código 1
+BUDGETS = {"import": 0.4, "menu": 0.5, "cloud": 0.8, "local": 1.5}
+
+# Cenário -> (comando, texto que marca o primeiro prompt na saída)
+# Cada execução é um interpretador novo: mede imports, leitura de config e tudo até o input().
+# A configuração sai de config.build (mesmo formato que o menu passa), nunca de um dict montado à mão
+_CLOUD_CONFIG = "config.build({'provider': 'groq', 'generic_key': 'gsk_startup_benchmark'})"
+SCENARIOS = {
+    "import": ([sys.executable, "-c", "import fabrica, fabrica_local; print('imported')"], "imported"),
+    "menu": ([sys.executable, "main.py"], "Select Option"),
+    "cloud": ([sys.executable, "-c", f"import config, fabrica; fabrica.iniciar_sistema({_CLOUD_CONFIG})"], ">>> "),
+    "local": ([sys.executable, "-c", "import fabrica_local; fabrica_local.iniciar_sistema_local('startup-benchmark')"], "App Idea"),
+}
+# Configuração de mentira para todo cenário chegar ao prompt sem credentials.txt preenchido
+STUB_ENV = {"FABRICA_PROVIDER": "groq", "FABRICA_API_KEY": "gsk_startup_benchmark", "FABRICA_LOCAL_MODEL": "startup-benchmark"}
+# Cenários que dependem de um SDK opcional: sem ele o agente sai antes do prompt
+REQUIRES = {"local": "ollama"}
+
+def unavailable(name):
+    module = REQUIRES.get(name)
+    return module if module and importlib.util.find_spec(module) is None else None
+
+def time_to_prompt(command, marker, timeout=TIMEOUT):
+    """
+    Segundos do spawn até `marker` aparecer no stdout.
+    Processo que termina (ou estoura o timeout) antes do prompt é uma falha: (None, motivo).
+    """
+    env = dict(os.environ, PYTHONUNBUFFERED="1", FABRICA_TRACE="0", TERM=os.environ.get("TERM", "dumb"), **STUB_ENV)
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    output = b""
+    try:
+        while True:
+            chunk = proc.stdout.read1(4096)
+            if not chunk: break
+            output += chunk
+            if marker in output.decode("utf-8", "ignore"):
+                return time.perf_counter() - start, None
+    finally:
+        timer.cancel()
+        proc.kill()
+        code = proc.wait()
+
+    last = output.decode("utf-8", "ignore").strip().splitlines()[-1:] or ["no output"]
+    reason = "timed out" if time.perf_counter() - start >= timeout else f"exit code {code}"
+    return None, f"{reason} before the prompt: {last[0][-120:]}"
+
+def measure(names, runs=RUNS):
+    results = {}
+    for name in names:
+        command, marker = SCENARIOS[name]
+        attempts = [time_to_prompt(command, marker) for _ in range(runs)]
+        samples = [s for s, _ in attempts if s is not None]
+        errors = [e for _, e in attempts if e]
+        results[name] = {
+            "median": round(statistics.median(samples), 3) if samples else None,
+            "max": round(max(samples), 3) if samples else None,
+            "runs": len(samples),
+            "error": errors[0] if errors else None,
+        }
+    return results
+
+def report(results, budgets):
+    """Imprime a tabela e retorna os cenários que falharam: acima do orçamento ou sem chegar ao prompt."""
+    over = []
+    print(f"\n{CYAN}{'Scenario':<10}{'Median s':>10}{'Max s':>10}{'Budget s':>10}  Status{RESET}")
+    for name, stats in results.items():
+        budget = budgets.get(name)
+        if stats["error"]:
+            status = f"{RED}FAILED ({stats['error']}){RESET}"
+            over.append(name)
+        elif budget is not None and stats["median"] > budget:
+            status = f"{RED}OVER{RESET}"
+            over.append(name)
+        else:
+            status = f"{GREEN}ok{RESET}"
+        median = "-" if stats["median"] is None else stats["median"]
+        worst = "-" if stats["max"] is None else stats["max"]
+        print(f"{name:<10}{median:>10}{worst:>10}{budget if budget is not None else '-':>10}  {status}")
+    return over
+
+def parse_budget(text):
+    name, _, seconds = text.partition("=")
+    if name not in SCENARIOS or not seconds:
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(SCENARIOS)} followed by =SECONDS")
+    return name, float(seconds)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time-to-menu and time-to-first-prompt in fresh interpreters and check them against a budget.")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=None, help="Which startups to measure (default: all whose SDK is installed)")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Runs per scenario (the median is compared to the budget)")
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[], metavar="SCENARIO=SECONDS", help="Override a budget, e.g. --budget menu=0.3")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    budgets = dict(BUDGETS, **dict(args.budget))
+    names = args.scenarios
+    if names is None:
+        # Sem pedido explícito, cenário sem o SDK opcional fica de fora (avisado); pedido explícito sem ele falha
+        names = [n for n in SCENARIOS if not unavailable(n)]
+        for name in SCENARIOS:
+            if unavailable(name): print(f"{YELLOW}⚠️  Not measuring '{name}': '{unavailable(name)}' is not installed.{RESET}")
+    missing = [n for n in names if unavailable(n)]
+    if missing:
+        print(f"{RED}❌ Cannot measure {', '.join(missing)}: {', '.join(unavailable(n) for n in missing)} not installed.{RESET}")
+        sys.exit(1)
+    over = report(measure(names, max(1, args.runs)), budgets)
+    if over:
+        print(f"\n{RED}❌ Failed or over budget: {', '.join(over)}. Inspect with: python -X importtime -c \"import fabrica\"{RESET}")
+        sys.exit(1)
+    print(f"\n{GREEN}✅ Startup within budget.{RESET}")
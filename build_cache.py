@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from atomic_io import atomic_write_json
+
+CACHE_DIR = os.path.join(os.getcwd(), ".cache_ia", "builds")
+SOURCE_DIRS = ("src", "public")
+SOURCE_FILES = ("index.html", "package.json", "package-lock.json",
+                "vite.config.js", "vite.config.mjs", "vite.config.ts",
+                "tailwind.config.js", "tailwind.config.cjs", "tailwind.config.ts",
+                "postcss.config.js", "postcss.config.cjs")
+DIST_DIR = "dist"
+
+def _hash_tree(root, paths):
+    """Hash do conteúdo + caminho relativo de cada arquivo (ordem estável)."""
+    digest = hashlib.sha256()
+    for rel in sorted(paths):
+        try:
+            with open(os.path.join(root, rel), "rb") as f:
+                content = f.read()
+        except OSError:
+            continue
+        digest.update(rel.replace("\\", "/").encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(content).digest())
+    return digest.hexdigest()
+
+def _walk(root, folder):
+    base = os.path.join(root, folder)
+    for current, dirs, files in os.walk(base):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.startswith("."): continue  # Temporários do streaming (.App.jsx.streaming) etc.
+            yield os.path.relpath(os.path.join(current, name), root)
+
+class BuildCache:
+    """
+    Estado do último build e do último deploy, endereçado por hash de conteúdo.
+    - build: hash de src/, public/, package-lock.json e configs do Vite/Tailwind/PostCSS.
+      Mesmo hash e dist/ intacto = não precisa buildar de novo.
+    - deploy: hash do dist/ publicado em cada domínio. Mesmo hash = não precisa subir de novo.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _state_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self, name):
+        try:
+            with open(self._state_path(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, name, state):
+        path = self._state_path(name)
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write_json(path, state, indent=2)
+
+    def source_hash(self, project_path):
+        paths = [p for folder in SOURCE_DIRS for p in _walk(project_path, folder)]
+        paths += [f for f in SOURCE_FILES if os.path.isfile(os.path.join(project_path, f))]
+        return _hash_tree(project_path, paths)
+
+    def dist_hash(self, project_path):
+        if not os.path.isdir(os.path.join(project_path, DIST_DIR)): return None
+        return _hash_tree(project_path, list(_walk(project_path, DIST_DIR)))
+
+    def is_fresh(self, project_path, source_hash):
+        """True se o último build deste projeto veio das mesmas fontes e o dist/ não mudou desde então."""
+        entry = self._load("builds.json").get(os.path.abspath(project_path))
+        if not entry or entry.get("source") != source_hash: return False
+        return entry.get("dist") is not None and entry["dist"] == self.dist_hash(project_path)
+
+    def record_build(self, project_path, source_hash):
+        with self._lock:
+            state = self._load("builds.json")
+            state[os.path.abspath(project_path)] = {"source": source_hash, "dist": self.dist_hash(project_path), "built_at": time.time()}
+            self._save("builds.json", state)
+
+    def last_deploy(self, domain):
+        return self._load("deploys.json").get(domain)
+
+    def is_deployed(self, domain, dist_hash):
+        entry = self.last_deploy(domain)
+        return bool(entry and dist_hash and entry.get("dist") == dist_hash)
+
+    def record_deploy(self, domain, dist_hash, project_path, owner=None):
+        with self._lock:
+            state = self._load("deploys.json")
+            state[domain] = {"dist": dist_hash, "project": os.path.abspath(project_path), "owner": owner, "deployed_at": time.time()}
+            self._save("deploys.json", state)
+
+    def owned_domain(self, slug, owner):
+        """
+        Domínio já publicado por este app (`owner` = id da sessão): republica no mesmo endereço em vez de procurar outro.
+        A pasta não serve de dono: os agentes interativos geram todo app no mesmo base-app.
+        """
+        entry = self.last_deploy(f"{slug}.surge.sh")
+        return bool(owner and entry and entry.get("owner") == owner)
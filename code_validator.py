@@ -0,0 +1,100 @@
+import re
+
+import node_worker
+from stream_writer import is_complete
+
+VALIDATED_EXTENSIONS = (".jsx", ".js", ".tsx", ".ts")
+
+_IMPORT_RE = re.compile(r"^\s*import\s+(?!type\b)([^'\";]*?)\s+from\s+['\"][^'\"]+['\"];?", re.MULTILINE)
+_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_JSX_COMPONENT_RE = re.compile(r"<([A-Z][\w]*)(?=[\s/>.])")
+_DECLARED_RE = re.compile(r"\b(?:function|class|const|let|var)\s+([A-Za-z_$][\w$]*)")
+_DESTRUCTURED_RE = re.compile(r"\b(?:const|let|var)\s*[\{\[]([^}\]=]*)[\}\]]\s*=")
+_PARAMS_RE = re.compile(r"(?:function\s*\w*\s*\(|\(\s*)\{([^}]*)\}\s*[,)]")
+
+class ValidationError(Exception):
+    def __init__(self, problems):
+        super().__init__(problems[0] if problems else "Invalid code")
+        self.problems = problems
+
+def _imported_names(code):
+    """Nomes locais criados pelos imports: default, {a, b as c} e * as ns."""
+    names = []
+    for clause in _IMPORT_RE.findall(code):
+        named = re.search(r"\{([^}]*)\}", clause)
+        if named:
+            for part in named.group(1).split(","):
+                part = part.strip()
+                if part: names.append(part.split(" as ")[-1].strip())
+            clause = clause.replace(named.group(0), "")
+        for part in clause.split(","):
+            part = part.strip()
+            if part.startswith("* as "): part = part[5:].strip()
+            if re.fullmatch(r"[A-Za-z_$][\w$]*", part): names.append(part)
+    return names
+
+def _split_names(group):
+    names = []
+    for part in group.split(","):
+        part = part.split("=")[0].strip()
+        if ":" in part: part = part.split(":")[-1].strip()
+        part = part.lstrip(".")
+        if part: names.append(part)
+    return names
+
+def lint_imports(code):
+    """Imports sem uso e componentes JSX que não foram importados nem declarados no arquivo."""
+    problems = []
+    imported = _imported_names(code)
+    body = _IMPORT_RE.sub("", _COMMENT_RE.sub("", code))
+
+    for name in imported:
+        if name == "React": continue  # Import clássico, pode existir só por causa do JSX
+        if not re.search(rf"(?<![\w$.]){re.escape(name)}(?![\w$])", body):
+            problems.append(f"Unused import '{name}'")
+
+    declared = set(imported) | set(_DECLARED_RE.findall(body))
+    for group in _DESTRUCTURED_RE.findall(body) + _PARAMS_RE.findall(body):
+        declared.update(_split_names(group))
+    for name in sorted(set(_JSX_COMPONENT_RE.findall(body))):
+        if name not in declared and name != "React":
+            problems.append(f"<{name}> is used but never imported or defined")
+    return problems
+
+def _format_error(error):
+    where = f" (line {error['line']}:{error['column']})" if error.get("line") else ""
+    return f"Syntax error{where}: {error['text']}"
+
+def parse_errors(path, code, project_path):
+    """Erros de sintaxe do esbuild (worker Node). Sem Node/esbuild, cai na checagem de balanceamento."""
+    worker = node_worker.get_worker(project_path)
+    if worker.available("validate"):
+        try:
+            result = worker.call("validate", code=code, filename=path)
+            return [_format_error(e) for e in result.get("errors", [])]
+        except node_worker.NodeWorkerError:
+            pass
+    return [] if is_complete(code) else ["Truncated or unbalanced code: (), {} or [] do not match"]
+
+def lint_errors(path, code, project_path):
+    """`no-undef` do ESLint do projeto (no worker): variável indefinida quebra a página em runtime."""
+    worker = node_worker.get_worker(project_path)
+    if not worker.available("lint"): return []
+    try:
+        result = worker.lint(path, code)
+    except node_worker.NodeWorkerError:
+        worker.disable("lint")  # Sem ESLint ou config inválida: não tenta de novo a cada arquivo
+        return []
+    return [f"Line {m['line']}: {m['text']}" for m in result.get("messages", []) if m.get("rule") == "no-undef"]
+
+def validate(path, code, project_path):
+    """Lista de problemas do arquivo gerado (vazia = ok). Só valida JS/JSX."""
+    if not path.endswith(VALIDATED_EXTENSIONS): return []
+    if not code or not code.strip(): return ["Empty file"]
+    errors = parse_errors(path, code, project_path)
+    if errors: return errors
+    return lint_imports(code) + lint_errors(path, code, project_path)
+
+def feedback_prompt(problems):
+    listed = "\n".join(f"- {p}" for p in problems[:10])
+    return f"\n\nYOUR PREVIOUS ATTEMPT FOR THIS FILE WAS REJECTED BY THE VALIDATOR:\n{listed}\nFix ALL of these problems and return the complete file."
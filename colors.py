@@ -0,0 +1,9 @@
+# --- TERMINAL COLORS ---
+# Módulo sem dependências: importar as cores não carrega o menu nem os agentes.
+GREEN = "\033[92m"
+RED = "\033[91m"
+YELLOW = "\033[93m"
+CYAN = "\033[96m"
+MAGENTA = "\033[95m"
+BLUE = "\033[94m"
+RESET = "\033[0m"
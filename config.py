@@ -0,0 +1,150 @@
+import os
+import re
+import threading
+from types import MappingProxyType
+
+CREDENTIALS_PATH = os.path.join(os.getcwd(), "credentials.txt")
+
+# Linhas "> CHAVE = "valor"" do credentials.txt -> campo da configuração
+FIELDS = {
+    "API KEY": "generic_key",
+    "GOOGLE API KEY": "google_key",
+    "OPENAI API KEY": "openai_key",
+    "GROQ API KEY": "groq_key",
+    "AGENT MODEL": "model",
+    "MODEL": "local_model",
+    "SUPABASE URL": "supabase_url",
+    "SUPABASE KEY": "supabase_key",
+}
+# Variáveis de ambiente sobrescrevem o arquivo; argumentos de linha de comando sobrescrevem as duas
+ENV_VARS = {
+    "generic_key": "FABRICA_API_KEY",
+    "google_key": "FABRICA_GOOGLE_API_KEY",
+    "openai_key": "FABRICA_OPENAI_API_KEY",
+    "groq_key": "FABRICA_GROQ_API_KEY",
+    "model": "FABRICA_MODEL",
+    "local_model": "FABRICA_LOCAL_MODEL",
+    "provider": "FABRICA_PROVIDER",
+    "supabase_url": "FABRICA_SUPABASE_URL",
+    "supabase_key": "FABRICA_SUPABASE_KEY",
+}
+PROVIDERS = ("google", "openai", "groq")
+DEFAULT_MODELS = {"google": "models/gemini-2.5-flash-lite", "openai": "gpt-4o-mini", "groq": "llama-3.1-8b-instant"}
+KEY_PREFIXES = (("sk-", "openai"), ("gsk_", "groq"), ("AIza", "google"))
+
+# Uma passada só: cada linha "> CHAVE = 'valor'" (aspas simples ou duplas, '=' opcional)
+_ENTRY_RE = re.compile(r"""^[ \t]*>[ \t]*([A-Za-z][A-Za-z ]*?)[ \t]*=?[ \t]*["']([^"'\n]*)["']""", re.MULTILINE)
+
+_cache = {}
+_cache_lock = threading.Lock()
+_defaults = {"path": None, "overrides": {}}
+
+def parse(text):
+    """Campos preenchidos do arquivo; a primeira ocorrência de cada chave vence e valores vazios são ignorados."""
+    values = {}
+    for name, value in _ENTRY_RE.findall(text):
+        field = FIELDS.get(" ".join(name.upper().split()))
+        value = value.strip()
+        if field and value and field not in values: values[field] = value
+    return values
+
+def read_file(path):
+    """Conteúdo parseado do arquivo, reaproveitado enquanto mtime e tamanho não mudarem. None se não existir."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == stamp: return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        values = MappingProxyType(parse(f.read()))
+    with _cache_lock:
+        _cache[path] = (stamp, values)
+    return values
+
+def _key_provider(key):
+    for prefix, provider in KEY_PREFIXES:
+        if key and key.startswith(prefix): return provider
+    return None
+
+def _model_provider(model, key_provider=None):
+    model = (model or "").lower()
+    if "gpt" in model or "o1-" in model: return "openai"
+    if "llama" in model or "mixtral" in model: return "groq"
+    if "gemma" in model and key_provider == "groq": return "groq"
+    if "gemini" in model: return "google"
+    return None
+
+def resolve_provider(values):
+    """Provedor explícito > nome do modelo > prefixo da chave. Sem modelo escolhido, a chave decide."""
+    if values.get("provider") in PROVIDERS: return values["provider"]
+    key_provider = _key_provider(values.get("generic_key"))
+    return _model_provider(values.get("model"), key_provider) or key_provider or "google"
+
+def build(values, layers=None):
+    """
+    Completa provedor, modelo e a chave de cada provedor; devolve um mapeamento somente leitura.
+    `layers`: {campo: camada de origem}, maior = mais forte (ver load). Na mesma camada a chave
+    específica do provedor vence a genérica; uma chave genérica de camada mais forte vence sempre.
+    Provedor de camada mais forte que o modelo descarta um modelo de outro provedor (--provider groq
+    com "Agent Model = gpt-4o-mini" no arquivo usa o modelo padrão do Groq).
+    """
+    config = {field: None for field in FIELDS.values()}
+    config.update(values)
+    layers = layers or {}
+    provider = resolve_provider(config)
+    config["provider"] = provider
+    model = config.get("model")
+    stale = layers.get("provider", -1) > layers.get("model", -1) and _model_provider(model) not in (None, provider)
+    config["model"] = DEFAULT_MODELS[provider] if not model or stale else model
+
+    # A chave genérica vale para um provedor se o prefixo bater ou se for o provedor escolhido
+    generic = config.get("generic_key")
+    for name in PROVIDERS:
+        field = f"{name}_key"
+        applies = generic and (_key_provider(generic) == name or (name == provider and not _key_provider(generic)))
+        stronger = layers.get("generic_key", -1) > layers.get(field, -1)
+        if applies and (not config.get(field) or stronger):
+            config[field] = generic
+    config["api_key"] = config.get(f"{provider}_key")
+    return MappingProxyType(config)
+
+def env_overrides(environ=None):
+    environ = os.environ if environ is None else environ
+    return {field: environ[var] for field, var in ENV_VARS.items() if environ.get(var)}
+
+def credentials_path():
+    return _defaults["path"] or CREDENTIALS_PATH
+
+def load(path=None, overrides=None):
+    """
+    Configuração imutável: padrões < credentials.txt < FABRICA_* < linha de comando < `overrides`.
+    None se o arquivo não existir.
+    """
+    file_values = read_file(path or credentials_path())
+    if file_values is None: return None
+    values, layers = {}, {}
+    sources = (file_values, env_overrides(), _defaults["overrides"], {k: v for k, v in (overrides or {}).items() if v})
+    for rank, source in enumerate(sources):
+        values.update(source)
+        layers.update(dict.fromkeys(source, rank))
+    return build(values, layers)
+
+# --- LINHA DE COMANDO ---
+def add_arguments(parser):
+    group = parser.add_argument_group("configuration", "Override credentials.txt and the FABRICA_* environment variables")
+    group.add_argument("--credentials", dest="config_path", metavar="PATH", help="Path to credentials.txt")
+    group.add_argument("--provider", dest="config_provider", choices=PROVIDERS, help="Force the cloud provider")
+    group.add_argument("--model", dest="config_model", metavar="NAME", help="Cloud model (Agent Model)")
+    group.add_argument("--local-model", dest="config_local_model", metavar="NAME", help="Ollama model (MODEL)")
+    group.add_argument("--api-key", dest="config_generic_key", metavar="KEY", help="API key for the selected provider (wins over credentials.txt and FABRICA_* keys)")
+    return parser
+
+def use_args(args):
+    """Registra os argumentos do processo; todo load() seguinte os aplica."""
+    _defaults["path"] = getattr(args, "config_path", None)
+    _defaults["overrides"] = {field: getattr(args, f"config_{field}") for field in ("provider", "model", "local_model", "generic_key")
+                              if getattr(args, f"config_{field}", None)}
@@ -0,0 +1,100 @@
+import os
+import re
+import posixpath
+from collections import Counter
+
+DEFAULT_TOKEN_BUDGET = 1500
+CHARS_PER_TOKEN = 4
+
+_IMPORT_RE = re.compile(r"import\s+(?:(\w+)\s*,?\s*)?(?:\{([^}]*)\})?\s*(?:from\s+)?['\"]([^'\"]+)['\"]")
+_EXPORT_DEFAULT_RE = re.compile(r"export\s+default\s+(?:function\s+|class\s+)?([A-Za-z_]\w*)")
+_EXPORT_NAMED_RE = re.compile(r"export\s+(?:const|let|var|function|class|async\s+function)\s+([A-Za-z_]\w*)")
+_EXPORT_LIST_RE = re.compile(r"export\s*\{([^}]*)\}")
+_COMPONENT_RE = re.compile(r"(?:function\s+([A-Z]\w*)\s*\(\s*(\{[^}]*\})?|const\s+([A-Z]\w*)\s*=\s*(?:React\.memo\(|memo\(|forwardRef\()?\s*(?:async\s*)?\(\s*(\{[^}]*\})?)")
+_TAILWIND_RE = re.compile(r"\b(?:bg|text|border|from|to|via|ring)-(?:[a-z]+-\d{2,3}|white|black)\b")
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _props(destructured):
+    if not destructured: return []
+    names = []
+    for part in destructured.strip("{} \n").split(","):
+        name = part.split("=")[0].split(":")[0].strip()
+        if name: names.append(name)
+    return names
+
+def extract_interface(path, code):
+    """Interface compacta de um arquivo: exports, componentes + props, imports e cores do Tailwind."""
+    info = {"path": path, "exports": [], "components": [], "imports": [], "local_imports": [], "tailwind": []}
+
+    match = _EXPORT_DEFAULT_RE.search(code)
+    if match: info["exports"].append(f"default {match.group(1)}")
+    info["exports"] += _EXPORT_NAMED_RE.findall(code)
+    for group in _EXPORT_LIST_RE.findall(code):
+        info["exports"] += [n.strip() for n in group.split(",") if n.strip()]
+
+    for fn_name, fn_props, const_name, const_props in _COMPONENT_RE.findall(code):
+        name = fn_name or const_name
+        props = _props(fn_props or const_props)
+        info["components"].append(f"{name}({{ {', '.join(props)} }})" if props else name)
+
+    for default, named, spec in _IMPORT_RE.findall(code):
+        names = [n.strip() for n in named.split(",") if n.strip()] if named else []
+        if default: names.insert(0, default)
+        label = f"{spec} ({', '.join(names)})" if names else spec
+        info["imports"].append(label)
+        if spec.startswith("."):
+            info["local_imports"].append(resolve_import(path, spec))
+
+    info["tailwind"] = [cls for cls, _ in Counter(_TAILWIND_RE.findall(code)).most_common(6)]
+    return info
+
+def resolve_import(from_path, spec):
+    """'./components/Header' importado por src/App.jsx -> 'src/components/Header' (sem extensão)."""
+    joined = posixpath.normpath(posixpath.join(posixpath.dirname(from_path.replace("\\", "/")), spec))
+    return os.path.splitext(joined)[0]
+
+def _stem(path):
+    stem = os.path.splitext(path.replace("\\", "/"))[0]
+    return stem[:-len("/index")] if stem.endswith("/index") else stem
+
+def format_interface(info, compact=False):
+    lines = [f"--- FILE: {info['path']} ---"]
+    if info["exports"]: lines.append(f"exports: {', '.join(info['exports'])}")
+    if compact: return "\n".join(lines)
+    if info["components"]: lines.append(f"components: {'; '.join(info['components'])}")
+    if info["imports"]: lines.append(f"imports: {'; '.join(info['imports'])}")
+    if info["tailwind"]: lines.append(f"theme: {' '.join(info['tailwind'])}")
+    return "\n".join(lines)
+
+def _relevance(target, info, target_imports):
+    target_stem = _stem(target)
+    if _stem(info["path"]) in target_imports: return 3  # O alvo importa este arquivo
+    if target_stem in (_stem(p) for p in info["local_imports"]): return 2  # Este arquivo importa o alvo
+    if os.path.dirname(info["path"]) == os.path.dirname(target): return 1
+    return 0
+
+def build_context(target, context, token_budget=DEFAULT_TOKEN_BUDGET, target_imports=None):
+    """
+    Resumo dos outros arquivos do projeto para o prompt de `target`, ordenado por relevância
+    (imports do alvo primeiro) e cortado no orçamento de tokens.
+    `target_imports`: caminhos que o alvo importa/vai importar (se já conhecidos).
+    """
+    wanted = {_stem(p) for p in (target_imports or [])}
+    if target in context:
+        wanted |= {_stem(p) for p in extract_interface(target, context[target])["local_imports"]}
+
+    infos = [extract_interface(path, code) for path, code in context.items() if path != target]
+    infos.sort(key=lambda info: -_relevance(target, info, wanted))
+
+    parts, used = [], 0
+    for info in infos:
+        for compact in (False, True):
+            text = format_interface(info, compact)
+            cost = estimate_tokens(text)
+            if used + cost <= token_budget:
+                parts.append(text)
+                used += cost
+                break
+    return "\n\n".join(parts)
@@ -0,0 +1,75 @@
+import os
+import re
+import json
+import subprocess
+import threading
+
+NPM_CACHE_DIR = os.path.join(os.getcwd(), ".cache_ia", "npm")
+IGNORED = {"react-context", "fs", "path", "os", "child_process", "crypto", "http", "https", "url", "util", "events", "stream"}
+
+_IMPORT_RE = re.compile(r"""(?:from\s+|import\s*\(?\s*|require\s*\(\s*)['"]([^'"]+)['"]""")
+
+def root_package(spec):
+    parts = spec.split("/")
+    return f"{parts[0]}/{parts[1]}" if spec.startswith("@") and len(parts) > 1 else parts[0]
+
+def external_imports(context):
+    """Pacotes npm (raiz) importados pelos arquivos gerados."""
+    found = set()
+    for code in context.values():
+        for spec in _IMPORT_RE.findall(code):
+            if spec.startswith((".", "/")) or spec.startswith("node:"): continue
+            name = root_package(spec)
+            if name not in IGNORED: found.add(name)
+    return found
+
+def declared_packages(project_path):
+    """Pacotes declarados no package.json + os de topo do package-lock.json."""
+    declared = set()
+    try:
+        with open(os.path.join(project_path, "package.json"), "r", encoding="utf-8") as f:
+            pkg = json.load(f)
+        for field in ("dependencies", "devDependencies", "peerDependencies", "optionalDependencies"):
+            declared.update(pkg.get(field, {}))
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open(os.path.join(project_path, "package-lock.json"), "r", encoding="utf-8") as f:
+            lock = json.load(f)
+        for key in lock.get("packages", {}):
+            if key.startswith("node_modules/") and "/node_modules/" not in key[len("node_modules/"):]:
+                declared.add(key[len("node_modules/"):])
+    except (OSError, ValueError):
+        pass
+    return declared
+
+def is_installed(project_path, name):
+    return os.path.exists(os.path.join(project_path, "node_modules", name, "package.json"))
+
+def missing_packages(wanted, project_path):
+    declared = declared_packages(project_path)
+    return sorted(name for name in wanted if name not in declared or not is_installed(project_path, name))
+
+def install(packages, project_path):
+    """Uma única chamada ao npm, preferindo o cache local de tarballs (funciona offline se já baixado)."""
+    os.makedirs(NPM_CACHE_DIR, exist_ok=True)
+    cmd = ["npm", "install", "--prefer-offline", "--no-audit", "--no-fund", "--cache", NPM_CACHE_DIR] + list(packages)
+    result = subprocess.run(cmd, cwd=project_path, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, shell=os.name == "nt")
+    return result.returncode == 0
+
+def install_async(packages, project_path):
+    """
+    Instala numa thread os pacotes que o plano do arquiteto já declarou, enquanto os arquivos são gerados.
+    Quem for rodar o npm de novo no mesmo projeto espera com join() (dois npm install no mesmo node_modules brigam).
+    """
+    result = {"packages": [], "ok": True}
+
+    def run():
+        result["packages"] = missing_packages(packages, project_path)
+        if result["packages"]: result["ok"] = install(result["packages"], project_path)
+
+    thread = threading.Thread(target=run, name="npm-preinstall", daemon=True)
+    thread.result = result
+    thread.start()
+    return thread
@@ -0,0 +1,135 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from atomic_io import atomic_write_json
+
+# {slug} é substituído pelo nome candidato. Aponte para um servidor local para testar sem a rede:
+# FABRICA_DOMAIN_PROBE="http://127.0.0.1:8765/{slug}"
+PROBE_URL = os.environ.get("FABRICA_DOMAIN_PROBE", "http://{slug}.surge.sh")
+PROBE_TIMEOUT = 3          # segundos por requisição
+BATCH_SIZE = 8             # candidatos testados em paralelo por rodada
+MAX_ROUNDS = 3
+TAKEN_TTL = 24 * 3600      # nome ocupado por outra pessoa: revalida depois de um dia
+CACHE_PATH = os.path.join(os.getcwd(), ".cache_ia", "domains.json")
+
+TAKEN, FREE, UNKNOWN = "taken", "free", "unknown"
+
+def slugify(name, max_len=None):
+    slug = re.sub(r"[^a-z0-9-]+", "-", name.lower()).strip("-")
+    slug = re.sub(r"-{2,}", "-", slug)
+    if max_len: slug = slug[:max_len].rstrip("-")
+    return slug or "app"
+
+class DomainAllocator:
+    """
+    Escolhe um subdomínio livre no surge.sh testando vários candidatos ao mesmo tempo, com timeout.
+    Nomes ocupados ficam em cache local (TTL); nomes que o próprio projeto já publicou
+    (predicado `is_owned`) são reaproveitados sem consulta à rede.
+    """
+
+    def __init__(self, probe_url=PROBE_URL, timeout=PROBE_TIMEOUT, batch_size=BATCH_SIZE,
+                 taken_ttl=TAKEN_TTL, cache_path=CACHE_PATH):
+        self.probe_url = probe_url
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.taken_ttl = taken_ttl
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._taken = self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {slug: ts for slug, ts in data.get("taken", {}).items() if now - ts < self.taken_ttl}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            atomic_write_json(self.cache_path, {"taken": self._taken})
+        except OSError:
+            pass
+
+    def is_known_taken(self, slug):
+        ts = self._taken.get(slug)
+        return ts is not None and time.time() - ts < self.taken_ttl
+
+    def probe(self, slug):
+        """TAKEN se o site responde, FREE se o surge diz 404, UNKNOWN em timeout/erro de rede."""
+        import urllib.error
+        import urllib.request  # Só no deploy: http.client + email custam ~30ms no startup
+        req = urllib.request.Request(self.probe_url.format(slug=slug), method="HEAD")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout):
+                return TAKEN
+        except urllib.error.HTTPError as e:
+            return FREE if e.code == 404 else (TAKEN if e.code < 500 else UNKNOWN)
+        except Exception:
+            return UNKNOWN
+
+    def candidates(self, base, round_index=0):
+        """O nome pedido primeiro, depois sufixos aleatórios (maiores a cada rodada)."""
+        names = [base] if round_index == 0 else []
+        digits = 2 + round_index
+        while len(names) < self.batch_size:
+            name = f"{base}-{random.randint(10 ** (digits - 1), 10 ** digits - 1)}"
+            if name not in names: names.append(name)
+        return names
+
+    def probe_many(self, slugs):
+        results = {}
+        pool = ThreadPoolExecutor(max_workers=len(slugs))
+        futures = {pool.submit(self.probe, slug): slug for slug in slugs}
+        done, _ = wait(futures, timeout=self.timeout + 1)
+        pool.shutdown(wait=False, cancel_futures=True)  # Não espera sondas atrasadas
+        for future, slug in futures.items():
+            results[slug] = future.result() if future in done else UNKNOWN
+
+        with self._lock:
+            now = time.time()
+            for slug, status in results.items():
+                if status == TAKEN: self._taken[slug] = now
+                else: self._taken.pop(slug, None)
+            self._save()
+        return results
+
+    def allocate(self, name, is_owned=None, max_len=None):
+        """
+        Retorna um slug publicável, na ordem: já é nosso > livre > incerto (rede falhou).
+        Nunca trava: depois de MAX_ROUNDS rodadas usa um sufixo longo aleatório.
+        """
+        base = slugify(name, max_len)
+        for round_index in range(MAX_ROUNDS):
+            names = self.candidates(base, round_index)
+            for slug in names:
+                if is_owned and is_owned(slug): return slug
+
+            pending = [slug for slug in names if not self.is_known_taken(slug)]
+            if not pending: continue
+            results = self.probe_many(pending)
+            for wanted in (FREE, UNKNOWN):
+                for slug in names:
+                    if results.get(slug) == wanted: return slug
+        return f"{base}-{random.randint(100000, 999999)}"
+
+    def allocate_async(self, name, is_owned=None, max_len=None):
+        """Procura o nome numa thread enquanto o build roda; `.result()` quando for publicar."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self.allocate, name, is_owned, max_len)
+        executor.shutdown(wait=False)
+        return future
+
+_ALLOCATOR = None
+
+def get_allocator():
+    global _ALLOCATOR
+    if _ALLOCATOR is None: _ALLOCATOR = DomainAllocator()
+    return _ALLOCATOR
@@ -1,28 +1,33 @@
 import os
 import subprocess
 import time
-import random
 import re
 import sys
-import shutil
 import json
-import signal
-
-GREEN = "\033[92m"
-RED = "\033[91m"
-YELLOW = "\033[93m"
-CYAN = "\033[96m"
-MAGENTA = "\033[95m"
-BLUE = "\033[94m"
-RESET = "\033[0m"
-
-# --- PROVEDORES ---
-import google.generativeai as genai
-try:
-    from groq import Groq
-except ImportError:
-    Groq = None
-
+import scheduler
+import llm_cache
+import stream_writer
+import dependencies
+import lucide_index
+import preview
+import tracing
+import patching
+import context_builder
+import code_validator
+import node_worker
+import build_cache
+import domains
+import hedging
+import llm_backend
+import provider_session
+import template_snapshot
+import sessions
+import plan_schema
+
+from colors import GREEN, RED, YELLOW, CYAN, MAGENTA, BLUE, RESET
+
+# Importar este módulo não faz I/O: a configuração chega por aplicar_config (main.load_credentials)
+# e os SDKs dos provedores só são carregados pela SESSAO na primeira chamada.
 API_KEY = None
 SUPABASE_URL = None
 SUPABASE_KEY = None
@@ -31,47 +36,12 @@ PROVIDER = "google"
 USE_DATABASE = False 
 
 versao = "7.1-SHARED"
+CACHE_IA = llm_cache.ResponseCache()
+CACHE_BUILD = build_cache.BuildCache()
 
-# Credentials
-try:
-    with open('credentials.txt', 'r', encoding='utf-8') as arquivo:
-        conteudo = arquivo.read()
-        
-        match_google = re.search(r'>\s*GOOGLE API KEY\s*=?\s*["\'](.*?)["\']', conteudo)
-        match_generic = re.search(r'>\s*API KEY\s*=?\s*["\'](.*?)["\']', conteudo)
-        
-        if match_google: API_KEY = match_google.group(1)
-        elif match_generic: API_KEY = match_generic.group(1)
-
-        match_url = re.search(r'>\s*SUPABASE URL\s*=?\s*["\'](.*?)["\']', conteudo)
-        if match_url: SUPABASE_URL = match_url.group(1)
-
-        match_key = re.search(r'>\s*SUPABASE KEY\s*=?\s*["\'](.*?)["\']', conteudo)
-        if match_key: SUPABASE_KEY = match_key.group(1)
-
-        match_model = re.search(r'>\s*Agent Model\s*=?\s*["\'](.*?)["\']', conteudo)
-        if match_model: AI_MODEL = match_model.group(1)
-
-except FileNotFoundError:
-    print(f"\n{RED}❌ CRITICAL ERROR: File 'credentials.txt' not found.{RESET}")
-    sys.exit()
-
-if not API_KEY:
-    print(f"\n{RED}❌ ERROR: API KEY is missing.{RESET}")
-    sys.exit()
-
-model_lower = AI_MODEL.lower()
-client_groq = None
-
-if "llama" in model_lower or "mixtral" in model_lower or API_KEY.startswith("gsk_"):
-    PROVIDER = "groq"
-    if not Groq:
-        print(f"{RED}❌ ERROR: 'groq' library not installed.{RESET}")
-        sys.exit()
-    client_groq = Groq(api_key=API_KEY)
-else:
-    PROVIDER = "google"
-    genai.configure(api_key=API_KEY)
+# Clientes e modelos reaproveitados durante toda a sessão; BACKEND aplica limites e retries por provedor
+SESSAO = provider_session.ProviderSession(PROVIDER, API_KEY)
+BACKEND = llm_backend.LLMBackend(SESSAO)
 
 # --- UTILS ---
 def limpar_tela():
@@ -81,89 +51,71 @@ def input_limpo(texto):
     sys.stdout.flush()
     return input(texto).strip()
 
-def encerrar_processo(processo):
-    try:
-        if os.name == 'nt':
-            subprocess.run(f"taskkill /F /T /PID {processo.pid}", shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        else:
-            os.killpg(os.getpgid(processo.pid), signal.SIGTERM)
-    except: pass
-
-def chamar_ai(prompt, sistema, json_mode=False, temp=None):
+def chamar_ai(prompt, sistema, json_mode=False, temp=None, usar_cache=True):
     # Define temperatura padrão se não for informada
     if temp is None:
         temp = 0.5 if json_mode else 0.7
 
-    if PROVIDER == "groq":
-        try:
-            resp = client_groq.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": sistema},
-                    {"role": "user", "content": prompt}
-                ],
-                model=AI_MODEL,
-                temperature=temp, # Usa a temperatura customizada
-                response_format={"type": "json_object"} if json_mode else None
-            )
-            return resp.choices[0].message.content
-        except Exception as e:
-            return f"Error Groq: {e}"
-
-    else: # Google Gemini
-        try:
-            config = {"temperature": temp, "response_mime_type": "application/json"} if json_mode else {"temperature": temp}
-            
-            model = genai.GenerativeModel(
-                model_name=AI_MODEL,
-                generation_config=config,
-                system_instruction=sistema
-            )
-            resp = model.generate_content(prompt)
-            return resp.text
-        except Exception as e:
-            # Fallback simples
-            return f"Error Google: {e}"
+    # Cache de respostas (desligado para execuções "criativas" ou com usar_cache=False)
+    chave = None
+    if usar_cache and not CACHE_IA.bypass(temp):
+        chave = CACHE_IA.key(AI_MODEL, sistema, prompt, temp, json_mode)
+        entrada = CACHE_IA.get(chave)
+        if entrada:
+            tracing.add(cache_hits=1, prompt_chars=len(prompt) + len(sistema), response_chars=len(entrada["response"]))
+            return entrada["response"]
+
+    # Limites por provedor, backoff em 429 e erros como exceção (llm_backend.LLMError), nunca como texto
+    resp = BACKEND.complete(sistema, prompt, AI_MODEL, temperature=temp, json_mode=json_mode)
+    texto = resp.text
+
+    tracing.add(llm_calls=1, llm_seconds=resp.latency, prompt_tokens=resp.prompt_tokens, completion_tokens=resp.completion_tokens,
+                prompt_chars=len(prompt) + len(sistema), response_chars=len(texto or ""), retries=resp.retries or None)
+
+    # Só respostas bem-sucedidas entram no cache
+    if chave and texto:
+        CACHE_IA.put(chave, texto, {
+            "model": AI_MODEL, "provider": PROVIDER,
+            "latency": resp.latency,
+            "prompt_tokens": resp.prompt_tokens, "completion_tokens": resp.completion_tokens,
+        })
+    return texto
 
 # --- CONFIG ---
 CAMINHO_PROJETO = os.path.join(os.getcwd(), "base-app")
+MAX_WORKERS_BUILDER = scheduler.MAX_WORKERS
+MODO_STREAM = os.environ.get("FABRICA_STREAM", "") in ("1", "true", "yes")
+ORCAMENTO_CONTEXTO = context_builder.DEFAULT_TOKEN_BUDGET
+MODO_PATCH = os.environ.get("FABRICA_PATCH", "1") not in ("0", "false", "no")
+MAX_CORRECOES = 2  # Regenerações por arquivo reprovado na validação
+CANDIDATOS_HEDGE = hedging.CANDIDATES  # FABRICA_HEDGE=N: N gerações concorrentes por arquivo, vence a primeira válida
 
 # --- DATABASE SETUP ---
-limpar_tela()
-print(f"{CYAN}╔════════════════════════════════════════════════════╗{RESET}")
-print(f"{CYAN}║                     CLOUD AGENT                    ║{RESET}")
-print(f"{CYAN}╚════════════════════════════════════════════════════╝{RESET}\n")
-print(f"{MAGENTA}Brain: {YELLOW}{AI_MODEL} ({PROVIDER.upper()}){RESET}")
-
-while True:
-    print(f"\n{BLUE}🔌 Enable Database (Supabase)? (y/n){RESET}")
-    choice = input_limpo(">>> ").lower()
-    if choice == 'y':
-        if not SUPABASE_URL or not SUPABASE_KEY:
-            print(f"\n{RED}❌ ERROR: Supabase keys missing in credentials.txt{RESET}")
-            sys.exit()
-        USE_DATABASE = True
-        break
-    elif choice == 'n':
-        USE_DATABASE = False
-        break
-
-def resetar_projeto():
+def configurar_banco():
+    global USE_DATABASE
+    limpar_tela()
+    print(f"{CYAN}╔════════════════════════════════════════════════════╗{RESET}")
+    print(f"{CYAN}║                     CLOUD AGENT                    ║{RESET}")
+    print(f"{CYAN}╚════════════════════════════════════════════════════╝{RESET}\n")
+    print(f"{MAGENTA}Brain: {YELLOW}{AI_MODEL} ({PROVIDER.upper()}){RESET}")
+
+    while True:
+        print(f"\n{BLUE}🔌 Enable Database (Supabase)? (y/n){RESET}")
+        choice = input_limpo(">>> ").lower()
+        if choice == 'y':
+            if not SUPABASE_URL or not SUPABASE_KEY:
+                print(f"\n{RED}❌ ERROR: Supabase keys missing in credentials.txt{RESET}")
+                continue
+            USE_DATABASE = True
+            break
+        elif choice == 'n':
+            USE_DATABASE = False
+            break
+
+def resetar_projeto(caminho_projeto=None):
     print(f"{MAGENTA}>>> [🧹] FACTORY RESET: {RESET}Cleaning old files...\n")
-    src_path = os.path.join(CAMINHO_PROJETO, "src")
-    pastas_para_remover = ["components", "lib", "utils", "hooks", "pages", "context"]
-    
-    for item in os.listdir(src_path):
-        item_path = os.path.join(src_path, item)
-        if os.path.isdir(item_path) and item in pastas_para_remover:
-            try: shutil.rmtree(item_path)
-            except: pass
-        elif os.path.isfile(item_path):
-            if item not in ["main.jsx", "index.css", "vite-env.d.ts", "App.css"]:
-                if item == "App.jsx":
-                    with open(item_path, "w", encoding="utf-8") as f:
-                        f.write("export default function App() { return <div>Loading...</div> }")
-                else:
-                    os.remove(item_path)
+    # Só os arquivos que diferem do template são tocados (template_snapshot)
+    template_snapshot.reset(caminho_projeto or CAMINHO_PROJETO)
     print(f"{GREEN}✅ Project Cleaned.{RESET}")
 
 def get_db_instructions():
@@ -182,43 +134,47 @@ def get_db_instructions():
     ✅ REQUIREMENT: Use HARDCODED Arrays of Objects (Mock Data).
         """
 
+ARQUIVOS_PROIBIDOS = ["src/main.jsx", "src/main.js", "index.html", "src/index.css", "vite.config.js"]
+
+@tracing.traced("architect")
 def planejar_arquitetura(prompt_usuario):
+    """Plano estruturado (plan_schema.Plan): arquivos, exports, imports entre eles e pacotes npm de cada um."""
     print(f"\n{CYAN}>>> [1/??] 🧠 CLOUD ARCHITECT: Blueprinting...{RESET}\n")
     
-    extra_rule = '5. Use "src/lib/supabase.js" for DB connection.' if USE_DATABASE else '5. 🛑 FORBIDDEN: Do NOT include "src/lib/supabase.js".'
+    extra_rule = '5. Use "src/lib/supabase.js" for DB connection (package "@supabase/supabase-js").' if USE_DATABASE else '5. 🛑 FORBIDDEN: Do NOT include "src/lib/supabase.js".'
 
     sistema = f"""
     ROLE: Senior React Architect.
-    TASK: List files to build this app.
+    TASK: Plan the files to build this app.
     
     RULES:
-    1. Output strictly a JSON Array of strings.
-    2. Max 6 files.
-    3. NEVER include "src/main.jsx", "index.html".
-    4. INCLUDE "src/App.jsx".
-    5. Paths MUST start with 'src/' (e.g., 'src/components/Header.jsx').
+    1. Max 6 files.
+    2. NEVER include "src/main.jsx", "index.html".
+    3. INCLUDE "src/App.jsx".
+    4. Paths MUST start with 'src/' (e.g., 'src/components/Header.jsx').
     {extra_rule}
+
+    {plan_schema.PLAN_FORMAT}
     """
     
     prompt = f"App Goal: {prompt_usuario}"
-    
-    try:
-        texto_resp = chamar_ai(prompt, sistema, json_mode=True)
-        # Limpeza extra caso venha markdown
-        match_json = re.search(r'\[.*\]', texto_resp, re.DOTALL)
-        lista_arquivos = json.loads(match_json.group(0)) if match_json else json.loads(texto_resp)
-
-        arquivos_proibidos = ["src/main.jsx", "src/main.js", "index.html", "src/index.css", "vite.config.js"]
-        if not USE_DATABASE: arquivos_proibidos.append("src/lib/supabase.js")
-
-        lista_filtrada = [arq for arq in lista_arquivos if arq not in arquivos_proibidos]
-        if "src/App.jsx" not in lista_filtrada: lista_filtrada.append("src/App.jsx")
-        return lista_filtrada
-
-    except Exception as e:
-        print(f"{YELLOW}⚠️ Architect Error: {e}. Fallback to basic.{RESET}")
-        return ["src/App.jsx"]
+    proibidos = ARQUIVOS_PROIBIDOS + ([] if USE_DATABASE else ["src/lib/supabase.js"])
 
+    # Saída estruturada onde o provedor aceita; resposta inválida é repetida uma vez fora do cache
+    for tentativa in range(2):
+        try:
+            texto_resp = chamar_ai(prompt, sistema, json_mode=plan_schema.PLAN_SCHEMA, usar_cache=tentativa == 0)
+            plano = plan_schema.parse_plan(texto_resp, proibidos)
+            if plano: return plano
+            erro = "no files in the response"
+        except llm_backend.LLMError as e:
+            erro = e
+        tracing.add(retries=1)
+
+    print(f"{YELLOW}⚠️ Architect Error: {erro}. Fallback to basic.{RESET}")
+    return plan_schema.Plan(["src/App.jsx"])
+
+@tracing.traced("modification_plan")
 def planejar_modificacao(pedido_usuario, lista_arquivos_existentes):
     print(f"\n{CYAN}>>> [🔍] CLOUD AGENT: Analyzing impact...{RESET}")
     
@@ -229,43 +185,37 @@ def planejar_modificacao(pedido_usuario, lista_arquivos_existentes):
     EXISTING FILES: {json.dumps(lista_arquivos_existentes)}
     
     RULES:
-    1. Return ONLY a JSON Array of strings (filenames).
-    2. Select ONLY files needing changes.
-    3. If NEW file needed, add it.
+    1. Select ONLY files needing changes.
+    2. If NEW file needed, add it.
+
+    {plan_schema.MODIFICATION_FORMAT}
     """
     
     try:
-        texto_resp = chamar_ai(f"Request: {pedido_usuario}", sistema, json_mode=True)
-        match_json = re.search(r'\[.*\]', texto_resp, re.DOTALL)
-        return json.loads(match_json.group(0)) if match_json else json.loads(texto_resp)
-    except:
-        return ["src/App.jsx"]
-
-def gerar_arquivo_especifico(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao=False, current_step=None, total_steps=None):
-    acao = "MODIFYING" if eh_modificacao else "BUILDER"
-    
-    if current_step and total_steps:
-        step_display = f"[{current_step}/{total_steps}]"
-    else:
-        step_display = "[2/3]"
+        arquivos = plan_schema.parse_file_list(chamar_ai(f"Request: {pedido_usuario}", sistema, json_mode=plan_schema.MODIFICATION_SCHEMA))
+        if arquivos: return arquivos
+    except llm_backend.LLMError as e:
+        print(f"{YELLOW}⚠️ Impact analysis failed: {e}{RESET}")
+    print(f"{YELLOW}⚠️ Could not read the file list, editing src/App.jsx.{RESET}")
+    return ["src/App.jsx"]
+
+def ler_codigo_atual(arquivo_alvo, contexto_global, caminho_projeto=None):
+    # LÊ O ARQUIVO DIRETO DO DISCO
+    caminho_real = os.path.join(caminho_projeto or CAMINHO_PROJETO, arquivo_alvo)
+    try:
+        with open(caminho_real, "r", encoding="utf-8") as f:
+            return f.read()
+    except Exception:
+        return contexto_global.get(arquivo_alvo, "")
 
-    print(f"{YELLOW}>>> {step_display} 👷 {acao}: {RESET}{arquivo_alvo}...")
-    
-    # CONTEXTO GERAL (Resumo dos outros arquivos para referência)
-    resumo_projeto = ""
-    for path, code in contexto_global.items():
-        if path != arquivo_alvo:
-            resumo_projeto += f"\n--- FILE: {path} ---\n{code[:800]}...\n"
+def montar_prompts_arquivo(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao=False, caminho_projeto=None, imports_alvo=None):
+    # CONTEXTO GERAL (interfaces dos outros arquivos, por relevância, dentro do orçamento de tokens)
+    # imports_alvo: arquivos que o plano diz que o alvo importa (ele ainda não existe para extrair os imports)
+    resumo_projeto = context_builder.build_context(arquivo_alvo, contexto_global, token_budget=ORCAMENTO_CONTEXTO, target_imports=imports_alvo)
 
     # LÓGICA DE MODIFICAÇÃO vs CRIAÇÃO
     if eh_modificacao:
-        # LÊ O ARQUIVO DIRETO DO DISCO
-        caminho_real = os.path.join(CAMINHO_PROJETO, arquivo_alvo)
-        try:
-            with open(caminho_real, "r", encoding="utf-8") as f:
-                codigo_atual = f.read()
-        except Exception:
-            codigo_atual = contexto_global.get(arquivo_alvo, "")
+        codigo_atual = ler_codigo_atual(arquivo_alvo, contexto_global, caminho_projeto)
 
         sistema = f"""
         ROLE: Automated Code Patcher / React Maintenance Agent.
@@ -318,38 +268,99 @@ def gerar_arquivo_especifico(arquivo_alvo, contexto_global, prompt_usuario, eh_m
         """
         foco_prompt = f"User Goal: {prompt_usuario}\nFile to write: {arquivo_alvo}"
 
+    temperatura_uso = 0.1 if eh_modificacao else 0.7
+    return sistema, foco_prompt, temperatura_uso
+
+def anunciar_passo(arquivo_alvo, eh_modificacao, current_step, total_steps):
+    acao = "MODIFYING" if eh_modificacao else "BUILDER"
+    
+    if current_step and total_steps:
+        step_display = f"[{current_step}/{total_steps}]"
+    else:
+        step_display = "[2/3]"
+
+    print(f"{YELLOW}>>> {step_display} 👷 {acao}: {RESET}{arquivo_alvo}...")
+
+@tracing.traced("builder")
+def gerar_arquivo_especifico(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao=False, current_step=None, total_steps=None, silencioso=False, caminho_projeto=None, problemas=None, imports_alvo=None):
+    # No modo paralelo quem imprime o progresso (em ordem) é o agendador
+    if not silencioso:
+        anunciar_passo(arquivo_alvo, eh_modificacao, current_step, total_steps)
+
+    sistema, foco_prompt, temperatura_uso = montar_prompts_arquivo(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao, caminho_projeto, imports_alvo)
+    # Tentativa anterior reprovada na validação: o erro do parser vai junto no prompt
+    if problemas: foco_prompt += code_validator.feedback_prompt(problemas)
+    tracing.annotate(file=arquivo_alvo, modification=eh_modificacao)
+    erro = None
+
+    if CANDIDATOS_HEDGE > 1:
+        codigo = gerar_candidatos_concorrentes(arquivo_alvo, foco_prompt, sistema, temperatura_uso, caminho_projeto)
+        if codigo: return codigo
+
     for tentativa in range(2):
         try:
-            temperatura_uso = 0.1 if eh_modificacao else 0.7
             codigo = chamar_ai(foco_prompt, sistema, json_mode=False, temp=temperatura_uso)
             if not codigo: raise Exception("Empty Response")
             
-            codigo = codigo.replace("```jsx", "").replace("```javascript", "").replace("```js", "").replace("```", "")
-            return codigo.strip()
+            return limpar_cercas_markdown(codigo)
             
         except Exception as e:
+            erro = e
             print(f"{RED}⚠️ Error on attempt {tentativa+1}: {e}{RESET}")
+            tracing.add(retries=1)
             time.sleep(2) 
-            
-    return f"// CRITICAL ERROR: {str(e)}"
 
-def carregar_whitelist_lucide():
-    caminho_index = os.path.join(CAMINHO_PROJETO, "node_modules", "lucide-react", "dist", "esm", "icons", "index.js")
-    
-    if not os.path.exists(caminho_index):
-        return None
+    # Nunca devolve texto de erro como código: quem chamou decide (não grava, marca o arquivo como falho)
+    raise llm_backend.LLMError(f"gave up after 2 attempts: {erro}", PROVIDER) from erro
 
-    try:
-        with open(caminho_index, 'r', encoding='utf-8') as f:
-            conteudo = f.read()
-            
-            icones = re.findall(r"default as ([a-zA-Z0-9]+)", conteudo)
-            return set(icones)
-    except:
-        return None
+def limpar_cercas_markdown(codigo):
+    codigo = codigo.replace("```jsx", "").replace("```javascript", "").replace("```js", "").replace("```", "")
+    return codigo.strip()
 
-def sanitizar_codigo_lucide(codigo):
-    validos = carregar_whitelist_lucide()
+def gerar_candidatos_concorrentes(arquivo_alvo, foco_prompt, sistema, temperatura_uso, caminho_projeto=None):
+    """
+    Modo hedge: N chamadas ao mesmo tempo em temperaturas diferentes; a primeira resposta
+    que passa na validação local vence e as outras são descartadas. Corta a cauda de latência.
+    """
+    temperaturas = hedging.spread_temperatures(temperatura_uso, CANDIDATOS_HEDGE)
+
+    def candidato(temp):
+        return lambda: limpar_cercas_markdown(chamar_ai(foco_prompt, sistema, json_mode=False, temp=temp) or "")
+
+    valido = lambda codigo: not code_validator.validate(arquivo_alvo, codigo, caminho_projeto or CAMINHO_PROJETO)
+    codigo, vencedor = hedging.first_valid([candidato(t) for t in temperaturas], valido)
+    tracing.add(llm_calls=len(temperaturas))
+    if vencedor is not None: tracing.annotate(hedge_winner=vencedor, hedge_temperature=temperaturas[vencedor])
+    return codigo
+
+@tracing.traced("validation")
+def validar_e_corrigir(arquivo_alvo, codigo, contexto_global, prompt_usuario, eh_modificacao=False, caminho_projeto=None, imports_alvo=None):
+    """
+    Valida o código antes de gravar (sintaxe via esbuild, truncamento, imports sem uso ou faltando).
+    Só o arquivo reprovado é regenerado, com os problemas encontrados no prompt.
+    """
+    tracing.annotate(file=arquivo_alvo)
+    for tentativa in range(MAX_CORRECOES + 1):
+        problemas = code_validator.validate(arquivo_alvo, codigo, caminho_projeto or CAMINHO_PROJETO)
+        if not problemas: return codigo
+        tracing.add(failures=1)
+        if tentativa == MAX_CORRECOES: break
+        print(f"{YELLOW}🩺 {arquivo_alvo} rejected ({problemas[0]}), regenerating...{RESET}")
+        try:
+            codigo = gerar_arquivo_especifico(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao, silencioso=True, caminho_projeto=caminho_projeto, problemas=problemas, imports_alvo=imports_alvo)
+        except llm_backend.LLMError as e:
+            print(f"{RED}⚠️ Regeneration failed ({e}), keeping the previous attempt.{RESET}")
+            break
+
+    print(f"{RED}⚠️ {arquivo_alvo} still fails validation: {problemas[0]}{RESET}")
+    return codigo
+
+def carregar_whitelist_lucide(caminho_projeto=None):
+    # Índice pré-computado por versão do lucide-react (não relê o index.js a cada arquivo salvo)
+    return lucide_index.load(caminho_projeto or CAMINHO_PROJETO)
+
+def sanitizar_codigo_lucide(codigo, caminho_projeto=None):
+    validos = carregar_whitelist_lucide(caminho_projeto)
     if not validos: return codigo 
 
     # Encontra a linha de importação do lucide-react
@@ -375,8 +386,9 @@ def sanitizar_codigo_lucide(codigo):
         if nome_real in validos:
             novos_itens.append(item)
         else:
-            print(f"{YELLOW}⚠️  Fixing hallucinated icon: '{nome_real}' -> '{fallback}'{RESET}")
-            novos_itens.append(f"{fallback} as {alias_usado}")
+            substituto = lucide_index.suggest(nome_real, validos) or fallback
+            print(f"{YELLOW}⚠️  Fixing hallucinated icon: '{nome_real}' -> '{substituto}'{RESET}")
+            novos_itens.append(f"{substituto} as {alias_usado}")
             modificado = True
 
     if modificado:
@@ -385,156 +397,402 @@ def sanitizar_codigo_lucide(codigo):
 
     return codigo
 
-def salvar_arquivo_caminho_custom(caminho_relativo, codigo):
+def resolver_caminho_arquivo(caminho_relativo, caminho_projeto=None):
     caminho_limpo = caminho_relativo.replace("base-app/", "").replace("./", "").replace("\\", "/")
     while "src/src/" in caminho_limpo: caminho_limpo = caminho_limpo.replace("src/src/", "src/")
     if not caminho_limpo.startswith("src/"): caminho_limpo = f"src/{caminho_limpo}"
+    return caminho_limpo, os.path.join(caminho_projeto or CAMINHO_PROJETO, caminho_limpo)
+
+def salvar_arquivo_caminho_custom(caminho_relativo, codigo, caminho_projeto=None):
+    caminho_limpo, caminho_completo = resolver_caminho_arquivo(caminho_relativo, caminho_projeto)
 
     if caminho_limpo.endswith(".jsx") or caminho_limpo.endswith(".tsx"):
-        codigo = sanitizar_codigo_lucide(codigo)
+        codigo = sanitizar_codigo_lucide(codigo, caminho_projeto)
 
-    caminho_completo = os.path.join(CAMINHO_PROJETO, caminho_limpo)
     pasta = os.path.dirname(caminho_completo)
-    if not os.path.exists(pasta): os.makedirs(pasta)
+    os.makedirs(pasta, exist_ok=True)  # Builders paralelos criam a mesma pasta ao mesmo tempo
     
     with open(caminho_completo, "w", encoding="utf-8") as f:
         f.write(codigo)
 
-def verificar_dependencias_global(contexto_global, current_step=None, total_steps=None):
+def chamar_ai_stream(prompt, sistema, temp=0.7, usar_cache=True):
+    """Gera os pedaços de texto conforme o provedor responde (stream do llm_backend)."""
+    chave = None
+    if usar_cache and not CACHE_IA.bypass(temp):
+        chave = CACHE_IA.key(AI_MODEL, sistema, prompt, temp, False)
+        entrada = CACHE_IA.get(chave)
+        if entrada:
+            yield entrada["response"]
+            return
+
+    inicio = time.time()
+    partes = []
+    for texto in BACKEND.stream(sistema, prompt, AI_MODEL, temperature=temp):
+        partes.append(texto)
+        yield texto
+
+    if chave and partes:
+        CACHE_IA.put(chave, "".join(partes), {"model": AI_MODEL, "provider": PROVIDER, "latency": round(time.time() - inicio, 3), "stream": True})
+
+@tracing.traced("builder_stream")
+def gerar_arquivo_streaming(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao=False, caminho_projeto=None, imports_alvo=None):
+    """
+    Escreve o arquivo enquanto os tokens chegam (arquivo temporário + troca atômica).
+    Se o stream travar ou vier truncado, aborta cedo e cai para a geração normal.
+    """
+    sistema, foco_prompt, temperatura_uso = montar_prompts_arquivo(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao, caminho_projeto, imports_alvo)
+    caminho_limpo, caminho_completo = resolver_caminho_arquivo(arquivo_alvo, caminho_projeto)
+    tracing.annotate(file=arquivo_alvo, modification=eh_modificacao)
+
+    def transformar(codigo):
+        # Roda antes da troca atômica: código reprovado nunca substitui o arquivo final
+        problemas = code_validator.validate(caminho_limpo, codigo, caminho_projeto or CAMINHO_PROJETO)
+        if problemas: raise code_validator.ValidationError(problemas)
+        return sanitizar_codigo_lucide(codigo, caminho_projeto) if caminho_limpo.endswith((".jsx", ".tsx")) else codigo
+
+    problemas = None
+    for tentativa in range(2):
+        try:
+            # O gerador roda na thread do stream, então as métricas são anotadas aqui
+            codigo = stream_writer.stream_to_file(chamar_ai_stream(foco_prompt, sistema, temp=temperatura_uso), caminho_completo, transform=transformar)
+            tracing.add(llm_calls=1, prompt_chars=len(foco_prompt) + len(sistema), response_chars=len(codigo))
+            return codigo
+        except code_validator.ValidationError as e:
+            print(f"{YELLOW}🩺 {arquivo_alvo} rejected ({e.problems[0]}), regenerating...{RESET}")
+            problemas = e.problems
+            break
+        except Exception as e:
+            print(f"{RED}⚠️ Stream error on attempt {tentativa+1}: {e}{RESET}")
+            tracing.add(retries=1)
+
+    codigo = gerar_arquivo_especifico(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao, silencioso=True, caminho_projeto=caminho_projeto, problemas=problemas, imports_alvo=imports_alvo)
+    codigo = validar_e_corrigir(arquivo_alvo, codigo, contexto_global, prompt_usuario, eh_modificacao, caminho_projeto, imports_alvo)
+    salvar_arquivo_caminho_custom(arquivo_alvo, codigo, caminho_projeto)
+    return codigo
+
+@tracing.traced("patch")
+def gerar_modificacao_patch(arquivo_alvo, contexto_global, pedido_usuario, caminho_projeto=None):
+    """
+    Pede só os blocos SEARCH/REPLACE da mudança (saída proporcional à mudança, não ao arquivo).
+    Retorna o código novo, ou None se o patch não puder ser aplicado.
+    """
+    codigo_atual = ler_codigo_atual(arquivo_alvo, contexto_global, caminho_projeto)
+    if not codigo_atual.strip(): return None  # Arquivo novo: geração completa
+    tracing.annotate(file=arquivo_alvo)
+
+    sistema = f"""
+    ROLE: Automated Code Patcher / React Maintenance Agent.
+    TASK: Edit the file '{arquivo_alvo}' to satisfy the instruction.
+
+    INSTRUCTION: {pedido_usuario}
+
+    CURRENT FILE CONTENT:
+    {codigo_atual}
+
+    EXECUTION PROTOCOL:
+    1. Change ONLY the lines relevant to the INSTRUCTION.
+    2. If the instruction is visual (e.g., "change color"), change ONLY the Tailwind class.
+    3. Any new component or icon used MUST be imported.
+    {patching.PATCH_INSTRUCTIONS}
+    """
+
+    try:
+        resposta = chamar_ai(f"Apply change: {pedido_usuario}", sistema, json_mode=False, temp=0.1)
+        novo_codigo = patching.apply_patch(codigo_atual, resposta)
+    except (patching.PatchError, llm_backend.LLMError) as e:
+        tracing.annotate(patch_error=str(e))
+        return None
+
+    if not stream_writer.is_complete(novo_codigo): return None
+    return novo_codigo
+
+def gerar_e_salvar(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao=False, current_step=None, total_steps=None, silencioso=False, caminho_projeto=None, imports_alvo=None):
+    if eh_modificacao and MODO_PATCH:
+        if not silencioso:
+            anunciar_passo(arquivo_alvo, eh_modificacao, current_step, total_steps)
+            silencioso = True
+        codigo = gerar_modificacao_patch(arquivo_alvo, contexto_global, prompt_usuario, caminho_projeto)
+        if codigo is not None:
+            codigo = validar_e_corrigir(arquivo_alvo, codigo, contexto_global, prompt_usuario, eh_modificacao, caminho_projeto)
+            salvar_arquivo_caminho_custom(arquivo_alvo, codigo, caminho_projeto)
+            return codigo
+        print(f"{YELLOW}↩️  Patch could not be applied, regenerating full file...{RESET}")
+
+    if not MODO_STREAM:
+        codigo = gerar_arquivo_especifico(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao, current_step, total_steps, silencioso, caminho_projeto, imports_alvo=imports_alvo)
+        codigo = validar_e_corrigir(arquivo_alvo, codigo, contexto_global, prompt_usuario, eh_modificacao, caminho_projeto, imports_alvo)
+        salvar_arquivo_caminho_custom(arquivo_alvo, codigo, caminho_projeto)
+        return codigo
+
+    if not silencioso:
+        anunciar_passo(arquivo_alvo, eh_modificacao, current_step, total_steps)
+    return gerar_arquivo_streaming(arquivo_alvo, contexto_global, prompt_usuario, eh_modificacao, caminho_projeto, imports_alvo)
+
+@tracing.traced("dependencies")
+def verificar_dependencias_global(contexto_global, current_step=None, total_steps=None, caminho_projeto=None, pre_instalacao=None):
+    """
+    `pre_instalacao`: thread de dependencies.install_async com os pacotes do plano, já rodando durante a geração.
+    Depois dela, os imports do código gerado ainda são conferidos: pega o que o arquiteto esqueceu.
+    """
     if current_step and total_steps:
         step_display = f"[{current_step}/{total_steps}]"
     else:
         step_display = "[3/3]"
 
     print(f"\n{BLUE}>>> {step_display} 📦 DEPENDENCIES...{RESET}")
-    libs_obrigatorias = ['react', 'react-dom', 'vite', '@vitejs/plugin-react', 'tailwindcss', 'postcss', 'autoprefixer', 'lucide-react']
-    blacklist = ['react-context', 'fs', 'path', 'os']
+    caminho_projeto = caminho_projeto or CAMINHO_PROJETO
+    if pre_instalacao:
+        pre_instalacao.join()
+        planejados = pre_instalacao.result["packages"]
+        tracing.annotate(preinstalled=planejados)
+        if planejados and not pre_instalacao.result["ok"]:
+            print(f"{RED}⚠️ npm install failed for: {planejados}{RESET}")
+        elif planejados:
+            print(f"{GREEN}✅ Installed from the plan: {planejados}{RESET}")
+
+    faltando = dependencies.missing_packages(dependencies.external_imports(contexto_global), caminho_projeto)
+    tracing.annotate(installed=faltando)
+    if faltando:
+        print(f"Installing: {faltando}")
+        if not dependencies.install(faltando, caminho_projeto):
+            print(f"{RED}⚠️ npm install failed for: {faltando}{RESET}")
+    else:
+        print(f"{GREEN}✅ All packages already installed.{RESET}")
 
-    texto_total = "".join(contexto_global.values())
-    imports = re.findall(r"from\s+['\"]([^'\"]+)['\"]", texto_total)
-    
-    para_instalar = []
-    for lib in imports:
-        if lib.startswith(".") or lib.startswith("/"): continue
-        partes = lib.split("/")
-        root_lib = f"{partes[0]}/{partes[1]}" if lib.startswith("@") and len(partes) > 1 else partes[0]
-            
-        if root_lib not in libs_obrigatorias and root_lib not in blacklist:
-            para_instalar.append(root_lib)
-            
-    if para_instalar:
-        para_instalar = list(set(para_instalar))
-        print(f"Installing: {para_instalar}")
-        subprocess.run(f"npm install {' '.join(para_instalar)}", cwd=CAMINHO_PROJETO, shell=True, stdout=subprocess.DEVNULL)
+def gerar_arquivos_em_paralelo(arquivos, prompt_usuario, total_steps, caminho_projeto=None, sessao=None, plano=None):
+    # Cada arquivo só espera os arquivos de que depende: os imports do plano, ou a heurística de camadas
+    grafo = scheduler.build_dependency_graph(arquivos, plano.deps() if plano else None)
+    imports_planejados = plano.imports if plano else {}
+
+    def tarefa(arquivo, contexto_dependencias):
+        # Dependência que falhou não entra no contexto
+        contexto_dependencias = {k: v for k, v in contexto_dependencias.items() if v is not None}
+        try:
+            if sessao and arquivo in sessao.outputs:
+                # Já gerado antes da queda: vem do diário, sem chamar o modelo
+                codigo = sessao.outputs[arquivo]
+                salvar_arquivo_caminho_custom(arquivo, codigo, caminho_projeto)
+                return codigo
+            codigo = gerar_e_salvar(arquivo, contexto_dependencias, prompt_usuario, silencioso=True, caminho_projeto=caminho_projeto,
+                                    imports_alvo=imports_planejados.get(arquivo))
+        except (llm_backend.LLMError, OSError) as e:
+            # Erro de disco vira arquivo falho como o do modelo: não derruba o run_graph inteiro
+            if sessao: sessao.record_failure(arquivo, e)
+            return falha_arquivo(arquivo, e)
+        if sessao: sessao.record_file(arquivo, codigo)
+        return codigo
+
+    def ao_concluir(indice, arquivo, codigo):
+        marca = f"{GREEN}✔" if codigo is not None else f"{RED}✘ (not saved)"
+        print(f"{YELLOW}>>> [{indice + 2}/{total_steps}] 👷 BUILDER: {RESET}{arquivo} {marca}{RESET}")
+
+    resultados = scheduler.run_graph(arquivos, tarefa, graph=grafo, max_workers=MAX_WORKERS_BUILDER, on_done=ao_concluir)
+    return {arquivo: codigo for arquivo, codigo in resultados.items() if codigo is not None}
+
+def falha_arquivo(arquivo, erro):
+    """Geração desistiu do arquivo: nada é gravado e o arquivo fica marcado como falho (None)."""
+    print(f"{RED}❌ {arquivo}: generation failed ({erro}). File not written.{RESET}")
+    tracing.add(failures=1)
+    return None
+
+def gerar_projeto(prompt_usuario, caminho_projeto=None, resetar=True, sessao=None):
+    """
+    Pipeline completo de uma ideia: planejamento, arquivos e dependências.
+    Com `sessao` (sessions.Session), cada etapa vai para o diário; numa sessão retomada
+    o plano e os arquivos já gerados vêm do diário e só o que falta chama o modelo.
+    Retorna (arquivos, contexto, tempos) — tempos em segundos por etapa.
+    """
+    tempos = {}
+    inicio = time.time()
+    if resetar: resetar_projeto(caminho_projeto)
+
+    t = time.time()
+    if sessao and sessao.files:
+        plano = sessao.plan()
+        arquivos = sessao.all_files()
+        feitos, total = sessao.progress()
+        print(f"{CYAN}↩️  Resuming session {sessao.id}: {feitos}/{total} files already generated.{RESET}")
+        if sessao.failed: print(f"{YELLOW}   Regenerating failed files: {list(sessao.failed)}{RESET}")
+    else:
+        plano = planejar_arquitetura(prompt_usuario)
+        arquivos = list(plano.files)
+        if sessao: sessao.record_plan(plano)
+    tempos["plan"] = round(time.time() - t, 3)
+
+    total_files = len(arquivos)
+    total_workflow_steps = total_files + 2 
+    print(f"📋 Plan: {CYAN}{arquivos}{RESET} ({total_files} files)")
+    # Os pacotes já são conhecidos pelo plano: o npm roda enquanto os arquivos são gerados
+    pre_instalacao = dependencies.install_async(plano.all_packages(), caminho_projeto or CAMINHO_PROJETO) if plano.all_packages() else None
+
+    t = time.time()
+    contexto = gerar_arquivos_em_paralelo(arquivos, prompt_usuario, total_workflow_steps, caminho_projeto, sessao, plano)
+    tempos["files"] = round(time.time() - t, 3)
+    if sessao: sessao.record_stage("files")
+
+    t = time.time()
+    verificar_dependencias_global(contexto, 
+                                  current_step=total_workflow_steps, 
+                                  total_steps=total_workflow_steps,
+                                  caminho_projeto=caminho_projeto,
+                                  pre_instalacao=pre_instalacao)
+    tempos["dependencies"] = round(time.time() - t, 3)
+    if sessao: sessao.record_stage("dependencies")
+    tempos["total"] = round(time.time() - inicio, 3)
+    return arquivos, contexto, tempos
 
 # --- DEPLOY & PREVIEW ---
-def verificar_dominio_http(slug):
-    try:
-        import urllib.request
-        req = urllib.request.Request(f"http://{slug}.surge.sh", method='HEAD')
-        urllib.request.urlopen(req)
-        return True 
-    except: return False
+@tracing.traced("deploy")
+def fazer_deploy(nome_inicial, caminho_projeto=None, dono=None):
+    caminho_projeto = caminho_projeto or CAMINHO_PROJETO
+    # O nome é procurado em paralelo com o build (sondas concorrentes com timeout); só o app `dono` reaproveita o próprio domínio
+    alocacao = domains.get_allocator().allocate_async(nome_inicial, is_owned=lambda slug: CACHE_BUILD.owned_domain(slug, dono))
 
-def fazer_deploy(nome_inicial):
     print(f"\n{MAGENTA}>>> [BUILDING]...{RESET}")
-    subprocess.run("npm run build", cwd=CAMINHO_PROJETO, shell=True, stdout=subprocess.DEVNULL)
+    with tracing.span("build"):
+        hash_fontes = CACHE_BUILD.source_hash(caminho_projeto)
+        if CACHE_BUILD.is_fresh(caminho_projeto, hash_fontes):
+            print(f"{GREEN}✅ No changes since the last build, reusing dist/.{RESET}")
+            tracing.annotate(cached=True)
+        else:
+            # Build dentro do worker Node da sessão (Vite já carregado); sem ele, `npm run build`
+            ok, erro = node_worker.build(caminho_projeto)
+            if not ok:
+                # Sem build novo o dist/ é o antigo: nada é publicado
+                print(f"{RED}⚠️ Build failed: {erro}{RESET}")
+                tracing.annotate(error="build")
+                return None
+            CACHE_BUILD.record_build(caminho_projeto, hash_fontes)
     
-    nome_atual = nome_inicial.replace(" ", "-").lower()
-    while verificar_dominio_http(nome_atual):
-        nome_atual += f"-{random.randint(1,99)}"
+    with tracing.span("domain"):
+        dominio = f"{alocacao.result()}.surge.sh"
+        tracing.annotate(domain=dominio)
     
-    subprocess.run(f"npx surge ./dist --domain {nome_atual}.surge.sh", cwd=CAMINHO_PROJETO, shell=True, stdout=subprocess.DEVNULL)
-    return f"{nome_atual}.surge.sh"
+    with tracing.span("surge"):
+        hash_dist = CACHE_BUILD.dist_hash(caminho_projeto)
+        if CACHE_BUILD.is_deployed(dominio, hash_dist):
+            print(f"{GREEN}✅ {dominio} is already up to date, skipping upload.{RESET}")
+            tracing.annotate(skipped=True)
+        else:
+            resultado = subprocess.run(f"npx surge ./dist --domain {dominio}", cwd=caminho_projeto, shell=True, stdout=subprocess.DEVNULL)
+            if resultado.returncode != 0:
+                print(f"{RED}⚠️ Surge upload failed (exit code {resultado.returncode}).{RESET}")
+                tracing.annotate(error="surge")
+                return None
+            CACHE_BUILD.record_deploy(dominio, hash_dist, caminho_projeto, dono)
+    return dominio
 
 # --- MAIN ENTRY ---
-def iniciar_sistema(config=None):
-    # Se chamado via main.py, sobrescreve configs
-    global API_KEY, AI_MODEL, PROVIDER
+def aplicar_config(config):
+    # Configuração imutável de config.load (menu, batch, benchmark); nada é relido do arquivo aqui
+    global API_KEY, AI_MODEL, PROVIDER, SUPABASE_URL, SUPABASE_KEY, SESSAO, BACKEND
     if config:
-        AI_MODEL = config.get("model", AI_MODEL)
-        if config["provider"] == "google":
-            API_KEY = config.get("google_key") or config.get("generic_key")
-        else:
-            API_KEY = config.get("openai_key") or config.get("generic_key")
-    
-    main()
+        AI_MODEL = config["model"]
+        API_KEY = config["api_key"]
+        PROVIDER = config["provider"]
+        SUPABASE_URL = config.get("supabase_url")
+        SUPABASE_KEY = config.get("supabase_key")
+        SESSAO = provider_session.ProviderSession(PROVIDER, API_KEY)
+        BACKEND = llm_backend.LLMBackend(SESSAO)
+
+def iniciar_sistema(config=None, retomar=None):
+    aplicar_config(config)
+    main(retomar)
+
+def main(retomar=None):
+    """`retomar`: sessions.Session interrompida; a primeira volta continua dela em vez de pedir uma ideia."""
+    configurar_banco()
+    servidor_preview = preview.PreviewServer(CAMINHO_PROJETO)
 
-def main():
-    while True:
-        prompt_inicial = input_limpo(f"\n{YELLOW}📝 App Idea {RED}(or 'exit'){RESET}: ")
-        if prompt_inicial.lower() == 'exit': break
-        
-        resetar_projeto()
-
-        arquivos_atuais = planejar_arquitetura(prompt_inicial)
-        
-        total_files = len(arquivos_atuais)
-        total_workflow_steps = total_files + 2 
+    try:
+        while True:
+            if retomar:
+                sessao, retomar = retomar, None
+                prompt_inicial = sessao.prompt
+                print(f"\n{YELLOW}📝 App Idea: {RESET}{prompt_inicial}")
+            else:
+                prompt_inicial = input_limpo(f"\n{YELLOW}📝 App Idea {RED}(or 'exit'){RESET}: ")
+                if prompt_inicial.lower() == 'exit': break
+                sessao = sessions.Session.create(prompt_inicial, CAMINHO_PROJETO, "cloud", AI_MODEL)
         
-        print(f"📋 Plan: {CYAN}{arquivos_atuais}{RESET} ({total_files} files)")
+            arquivos_atuais, contexto_projeto, _ = gerar_projeto(prompt_inicial, sessao=sessao)
+            tracing.finish_run()
         
-        contexto_projeto = {}
-        for i, arquivo in enumerate(arquivos_atuais):
-            current_step_num = i + 2
-            codigo = gerar_arquivo_especifico(arquivo, contexto_projeto, prompt_inicial, 
-                                              current_step=current_step_num, 
-                                              total_steps=total_workflow_steps)
-            contexto_projeto[arquivo] = codigo
-            salvar_arquivo_caminho_custom(arquivo, codigo)
+            while True:
+                # Sobe o Vite uma vez; as edições seguintes chegam via HMR
+                if servidor_preview.start() and not servidor_preview.wait_ready():
+                    print(f"{RED}⚠️ Preview server did not start:{RESET} " + " | ".join(list(servidor_preview.log)[-3:]))
+                print(f"\n{GREEN}✨ App Ready. Preview: {servidor_preview.url}{RESET}")
             
-        verificar_dependencias_global(contexto_projeto, 
-                                      current_step=total_workflow_steps, 
-                                      total_steps=total_workflow_steps)
-        
-        processo_preview = None
-        while True:
-            if processo_preview: encerrar_processo(processo_preview)
+                print("\n" + f"{CYAN}={RESET}"*30)
+                print(f" {GREEN}[1] ✏️  MODIFY{RESET}")
+                print(f" {MAGENTA}[2] 🚀 PUBLISH{RESET}")
+                print(f" {BLUE}[3] 🔙 NEW PROJECT{RESET}")
+                print(f" {RED}[4] ❌ EXIT{RESET}")
+                print(f"{CYAN}={RESET}"*30)
             
-            print(f"\n{GREEN}✨ App Ready. Preview: http://localhost:5173{RESET}")
-            processo_preview = subprocess.Popen("npm run dev -- --open", cwd=CAMINHO_PROJETO, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+                opcao = input_limpo(">>> ")
             
-            print("\n" + f"{CYAN}={RESET}"*30)
-            print(f" {GREEN}[1] ✏️  MODIFY{RESET}")
-            print(f" {MAGENTA}[2] 🚀 PUBLISH{RESET}")
-            print(f" {BLUE}[3] 🔙 NEW PROJECT{RESET}")
-            print(f" {RED}[4] ❌ EXIT{RESET}")
-            print(f"{CYAN}={RESET}"*30)
-            
-            opcao = input_limpo(">>> ")
-            
-            if opcao == "1":
-                pedido = input_limpo(f"\n{YELLOW}✏️  Change Request: {RESET}")
-                arquivos_edit = planejar_modificacao(pedido, arquivos_atuais)
-                print(f"🎯 Files to Edit: {arquivos_edit}")
+                if opcao == "1":
+                    pedido = input_limpo(f"\n{YELLOW}✏️  Change Request: {RESET}")
+                    arquivos_edit = planejar_modificacao(pedido, arquivos_atuais)
+                    print(f"🎯 Files to Edit: {arquivos_edit}")
                 
-                total_mod_steps = len(arquivos_edit)
+                    total_mod_steps = len(arquivos_edit)
                 
-                for arq in arquivos_edit:
-                    if arq not in arquivos_atuais: arquivos_atuais.append(arq)
+                    for arq in arquivos_edit:
+                        if arq not in arquivos_atuais: arquivos_atuais.append(arq)
                 
-                for i, arq in enumerate(arquivos_edit):
-                    novo_codigo = gerar_arquivo_especifico(arq, contexto_projeto, pedido, 
-                                                           eh_modificacao=True,
-                                                           current_step=i+1,
-                                                           total_steps=total_mod_steps)
-                    contexto_projeto[arq] = novo_codigo
-                    salvar_arquivo_caminho_custom(arq, novo_codigo)
+                    sessao.record_modification(pedido, arquivos_edit)
+                    for i, arq in enumerate(arquivos_edit):
+                        try:
+                            novo_codigo = gerar_e_salvar(arq, contexto_projeto, pedido, 
+                                                         eh_modificacao=True,
+                                                         current_step=i+1,
+                                                         total_steps=total_mod_steps)
+                        except llm_backend.LLMError as e:
+                            falha_arquivo(arq, e)
+                            continue
+                        contexto_projeto[arq] = novo_codigo
+                        sessao.record_file(arq, novo_codigo)
                 
-                print(f"{GREEN}✅ Done! Reloading...{RESET}")
-
-            elif opcao == "2":
-                encerrar_processo(processo_preview)
-                link = fazer_deploy(prompt_inicial[:10])
-                print(f"\n{GREEN}🚀 LIVE: https://{link}{RESET}\n")
-                input("Press ENTER...")
-                break
-            elif opcao == "3":
-                encerrar_processo(processo_preview)
-                break
-            elif opcao == "4":
-                encerrar_processo(processo_preview)
-                sys.exit()
+                    print(f"{GREEN}✅ Done! Changes are live (hot reload).{RESET}")
+                    tracing.finish_run("MODIFICATION METRICS")
+
+                elif opcao == "2":
+                    servidor_preview.stop()
+                    link = fazer_deploy(prompt_inicial[:10], dono=sessao.id)
+                    if link: sessao.record_stage("deploy", domain=link)
+                    tracing.finish_run("DEPLOY METRICS")
+                    if link: print(f"\n{GREEN}🚀 LIVE: https://{link}{RESET}\n")
+                    else: print(f"\n{RED}❌ Deploy failed, nothing was published.{RESET}\n")
+                    input("Press ENTER...")
+                    break
+                elif opcao == "3":
+                    servidor_preview.stop()
+                    break
+                elif opcao == "4":
+                    servidor_preview.stop()
+                    sys.exit()
+    finally:
+        # Ctrl-C ou erro: o Vite não pode ficar órfão segurando a porta
+        servidor_preview.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    import config
+    import main as menu
+    parser = config.add_arguments(argparse.ArgumentParser(description="Cloud agent."))
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="SESSION", help="Continue an interrupted session (the latest one, or an id from .sessions/)")
+    args = parser.parse_args()
+    config.use_args(args)
+    sessao = sessions.open_session(args.resume, agent="cloud") if args.resume else None
+    if args.resume and sessao is None:
+        print(f"{RED}❌ No session to resume in {sessions.SESSIONS_DIR}{RESET}")
+        sys.exit(1)
+    configuracao = menu.load_credentials()
+    if configuracao and menu.validate_environment(configuracao):
+        try:
+            iniciar_sistema(configuracao, sessao)
+        except KeyboardInterrupt:
+            print(f"\n{YELLOW}⏸  Interrupted. Continue with: python fabrica.py --resume{RESET}")
@@ -1,52 +1,105 @@
 import os
 import subprocess
 import time
-import random
+import threading
 import re
 import sys
-import shutil
 import json
-import signal
-import main
-
-try:
-    import ollama
-except ImportError:
-    ollama = None
+import importlib.util
+import colors
+import llm_cache
+import stream_writer
+import provider_session
+import dependencies
+import preview
+import tracing
+import patching
+import context_builder
+import code_validator
+import node_worker
+import build_cache
+import domains
+import hedging
+import llm_backend
+import template_snapshot
+import sessions
+import scheduler
+import plan_schema
 
 PROJECT_PATH = os.path.join(os.getcwd(), "base-app")
 USE_DATABASE = False 
 # Mudei o default para um modelo melhor. Se não tiver, ele avisa.
 LOCAL_MODEL = "qwen2.5-coder:7b" 
-
-def call_local_ai(system_prompt, user_prompt, json_mode=False):
-    if not ollama:
-        return "// Error: 'ollama' library not installed."
-
-    try:
-        model_to_use = LOCAL_MODEL
-        try:
-            # Verifica se o modelo existe, senão fallback
-            ollama.show(LOCAL_MODEL)
-        except:
-            model_to_use = "llama3.2"
-            
-        options = {
-            "temperature": 0.2 if json_mode else 0.6,
-            "num_ctx": 8192 
-        }
-        
-        response = ollama.chat(
-            model=model_to_use, 
-            messages=[
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': user_prompt},
-            ],
-            options=options
-        )
-        return response['message']['content']
-    except Exception as e:
-        return f"// Local AI Error: {str(e)}"
+RESPONSE_CACHE = llm_cache.ResponseCache()
+BUILD_CACHE = build_cache.BuildCache()
+SESSION = provider_session.ProviderSession("ollama")
+BACKEND = llm_backend.LLMBackend(SESSION)  # Concurrency limit + retries for the local server
+STREAM_MODE = os.environ.get("FABRICA_STREAM", "") in ("1", "true", "yes")
+CONTEXT_TOKEN_BUDGET = 600
+PATCH_MODE = os.environ.get("FABRICA_PATCH", "1") not in ("0", "false", "no")
+MAX_FIX_ATTEMPTS = 2  # Regenerations per file rejected by the validator
+HEDGE_CANDIDATES = hedging.CANDIDATES  # FABRICA_HEDGE=N: N concurrent generations per file, first valid one wins
+
+def ollama_installed():
+    # The SDK (httpx + pydantic) is only imported by SESSION on the first real call
+    return importlib.util.find_spec("ollama") is not None
+
+def call_local_ai(system_prompt, user_prompt, json_mode=False, use_cache=True, temperature=None):
+    """Raises llm_backend.LLMError on failure (never returns an error string that could be saved as code)."""
+    if not ollama_installed():
+        raise llm_backend.LLMError("'ollama' library not installed.", "ollama")
+
+    # Verifica se o modelo existe (uma vez por sessão), senão fallback
+    model_to_use = SESSION.resolve_ollama_model(LOCAL_MODEL, "llama3.2")
+
+    if temperature is None:
+        temperature = 0.2 if json_mode else 0.6
+
+    cache_key = None
+    if use_cache and not RESPONSE_CACHE.bypass(temperature):
+        cache_key = RESPONSE_CACHE.key(model_to_use, system_prompt, user_prompt, temperature, json_mode)
+        entry = RESPONSE_CACHE.get(cache_key)
+        if entry:
+            tracing.add(cache_hits=1, prompt_chars=len(system_prompt) + len(user_prompt), response_chars=len(entry["response"]))
+            return entry["response"]
+
+    response = BACKEND.complete(system_prompt, user_prompt, model_to_use, temperature=temperature, json_mode=json_mode)
+    content = response.text
+    tracing.add(llm_calls=1, llm_seconds=response.latency,
+                prompt_tokens=response.prompt_tokens, completion_tokens=response.completion_tokens,
+                prompt_chars=len(system_prompt) + len(user_prompt), response_chars=len(content or ""), retries=response.retries or None,
+                load_seconds=response.load_seconds, inference_seconds=response.inference_seconds)
+
+    if cache_key and content:
+        RESPONSE_CACHE.put(cache_key, content, {
+            "model": model_to_use, "provider": "ollama",
+            "latency": response.latency,
+            "prompt_tokens": response.prompt_tokens,
+            "completion_tokens": response.completion_tokens,
+        })
+    return content
+
+def call_local_ai_stream(system_prompt, user_prompt, use_cache=True):
+    """Stream version of call_local_ai: yields text chunks as Ollama produces them."""
+    model_to_use = SESSION.resolve_ollama_model(LOCAL_MODEL, "llama3.2")
+    temperature = 0.6
+
+    cache_key = None
+    if use_cache and not RESPONSE_CACHE.bypass(temperature):
+        cache_key = RESPONSE_CACHE.key(model_to_use, system_prompt, user_prompt, temperature, False)
+        entry = RESPONSE_CACHE.get(cache_key)
+        if entry:
+            yield entry["response"]
+            return
+
+    start = time.time()
+    parts = []
+    for text in BACKEND.stream(system_prompt, user_prompt, model_to_use, temperature=temperature):
+        parts.append(text)
+        yield text
+
+    if cache_key and parts:
+        RESPONSE_CACHE.put(cache_key, "".join(parts), {"model": model_to_use, "provider": "ollama", "latency": round(time.time() - start, 3), "stream": True})
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -55,71 +108,11 @@ def clean_input(text):
     sys.stdout.flush()
     return input(text).strip()
 
-def kill_process(process):
-    try:
-        if os.name == 'nt':
-            subprocess.run(f"taskkill /F /T /PID {process.pid}", shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        else:
-            os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-    except: pass
-
-def reset_project():
-    print(f"{main.MAGENTA}>>> [🧹] FACTORY RESET: {main.RESET}Cleaning old files...\n")
-    src_path = os.path.join(PROJECT_PATH, "src")
-    if not os.path.exists(src_path): return
-    
-    folders_to_remove = ["components", "lib", "utils", "hooks", "pages", "context"]
-    
-    for item in os.listdir(src_path):
-        item_path = os.path.join(src_path, item)
-        if os.path.isdir(item_path) and item in folders_to_remove:
-            try: shutil.rmtree(item_path)
-            except: pass
-        elif os.path.isfile(item_path):
-            if item not in ["main.jsx", "index.css", "vite-env.d.ts", "App.css"]:
-                if item == "App.jsx":
-                    with open(item_path, "w", encoding="utf-8") as f:
-                        f.write("export default function App() { return <div>Loading...</div> }")
-                else:
-                    os.remove(item_path)
-    print(f"{main.GREEN}✅ Project Cleaned.{main.RESET}")
-
-def extract_json_array(text):
-    """
-    Extrator robusto: Tenta JSON -> Tenta Regex JSON -> Tenta Regex Arquivos
-    """
-    text = text.strip()
-    
-    # 1. Tentativa JSON limpo
-    try:
-        # Busca o primeiro '[' e o último ']'
-        match = re.search(r'\[.*\]', text, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-    except:
-        pass
-
-    # 2. Tentativa Limpeza Markdown
-    try:
-        cleaned = text.replace("```json", "").replace("```", "").strip()
-        # Se não começar com [, tenta achar
-        if not cleaned.startswith("["):
-            start = cleaned.find("[")
-            end = cleaned.rfind("]")
-            if start != -1 and end != -1:
-                cleaned = cleaned[start:end+1]
-        return json.loads(cleaned)
-    except:
-        pass
-
-    # 3. FALLBACK SUPREMO: Regex para pegar caminhos de arquivos
-    # Se o modelo responder com lista ("- src/components/Header.jsx")
-    print(f"{main.YELLOW}⚠️  JSON Parsing failed. Scanning text for filenames...{main.RESET}")
-    found_files = re.findall(r'(src/[a-zA-Z0-9_\-\/]+\.jsx)', text)
-    if found_files:
-        return list(set(found_files)) # Remove duplicatas
-
-    return None
+def reset_project(project_path=None):
+    print(f"{colors.MAGENTA}>>> [🧹] FACTORY RESET: {colors.RESET}Cleaning old files...\n")
+    # Only files that differ from the template snapshot are touched
+    template_snapshot.reset(project_path or PROJECT_PATH)
+    print(f"{colors.GREEN}✅ Project Cleaned.{colors.RESET}")
 
 def sanitizar_codigo_agressivo(code, filename):
     code = re.sub(r'^```[a-zA-Z]*\n', '', code)
@@ -144,7 +137,7 @@ def sanitizar_codigo_agressivo(code, filename):
 
     # Fix 4: Next.js hallucination
     if 'from "next/' in code or "from 'next/" in code:
-        print(f"   {main.YELLOW}🔧 Fixing Next.js hallucination in {main.RESET}{filename}...")
+        print(f"   {colors.YELLOW}🔧 Fixing Next.js hallucination in {colors.RESET}{filename}...")
         code = re.sub(r'import\s+.*?from\s+["\']next\/.*?["\'];', '', code)
         code = code.replace("<Link", "<a").replace("</Link>", "</a>")
         code = code.replace("<Image", "<img").replace("</Image>", "</img>")
@@ -161,61 +154,62 @@ def sanitizar_codigo_agressivo(code, filename):
 
     return code.strip()
 
+FORBIDDEN_FILES = ["src/main.jsx", "src/main.js", "index.html", "src/index.css", "vite.config.js"]
+
+@tracing.traced("architect")
 def plan_architecture(user_prompt):
-    print(f"\n{main.CYAN}>>> [1/??] 🧠 LOCAL ARCHITECT: Blueprinting...{main.RESET}\n")
+    """Returns a plan_schema.Plan: files plus each file's exports, imports from the plan and npm packages."""
+    print(f"\n{colors.CYAN}>>> [1/??] 🧠 LOCAL ARCHITECT: Blueprinting...{colors.RESET}\n")
     
-    system = """You are a Senior React Architect.
+    system = f"""You are a Senior React Architect.
     OUTPUT RULES:
-    1. Reply ONLY with a valid JSON Array of strings.
-    2. DO NOT write "Here is the list" or any intro text.
-    3. JUST THE JSON.
+    1. DO NOT write "Here is the list" or any intro text.
+    2. JUST THE JSON.
     
-    TASK: List files to build:
+    TASK: Plan the files to build:
     1. Max 5 files.
     2. Always include "src/App.jsx".
     3. If you need components, include them (e.g. "src/components/Navbar.jsx").
+
+    {plan_schema.PLAN_FORMAT}
     """
     
     user = f"""Request: "{user_prompt}"
-    JSON Array:"""
+    JSON:"""
     
-    try:
-        resp_text = call_local_ai(system, user, json_mode=True)
-        file_list = extract_json_array(resp_text)
-        
-        if not file_list: raise Exception("Parser failed to find any files.")
-
-        forbidden = ["src/main.jsx", "src/main.js", "index.html", "src/index.css", "vite.config.js"]
-        filtered_list = [f for f in file_list if f not in forbidden]
-        
-        final_list = []
-        for f in filtered_list:
-            if not f.startswith("src/"): f = f"src/{f}"
-            final_list.append(f)
-
-        if "src/App.jsx" not in final_list: final_list.insert(0, "src/App.jsx")
-        
-        return final_list
-
-    except Exception as e:
-        print(f"{main.YELLOW}⚠️ Architect Error: {main.RED} {e}. {main.RESET} Using Emergency Plan.")
-        return ["src/App.jsx", "src/components/Header.jsx", "src/components/Hero.jsx"]
-
+    # Ollama constrains the output to the schema; a reply that still doesn't parse is retried once without the cache
+    error = None
+    for attempt in range(2):
+        try:
+            resp_text = call_local_ai(system, user, json_mode=plan_schema.PLAN_SCHEMA, use_cache=attempt == 0)
+            plan = plan_schema.parse_plan(resp_text, FORBIDDEN_FILES)
+            if plan: return plan
+            error = "no files in the response"
+        except llm_backend.LLMError as e:
+            error = e
+        tracing.add(retries=1)
+
+    print(f"{colors.YELLOW}⚠️ Architect Error: {colors.RED} {error}. {colors.RESET} Falling back to a single App.jsx.")
+    return plan_schema.Plan(["src/App.jsx"])
+
+@tracing.traced("modification_plan")
 def plan_modification(user_request, existing_files):
-    print(f"\n{main.CYAN}>>> [🔍] LOCAL AGENT: Analyzing impact...{main.RESET}")
-    system = "You are a code analyzer. Return ONLY a JSON Array of filenames that need changes."
+    print(f"\n{colors.CYAN}>>> [🔍] LOCAL AGENT: Analyzing impact...{colors.RESET}")
+    system = f"You are a code analyzer. Return the files that need changes. {plan_schema.MODIFICATION_FORMAT}"
     user = f"""Request: "{user_request}"
     Files available: {json.dumps(existing_files)}
     
-    Return JSON Array:"""
+    JSON:"""
     
     try:
-        resp_text = call_local_ai(system, user, json_mode=True)
-        return extract_json_array(resp_text) or ["src/App.jsx"]
-    except:
-        return ["src/App.jsx"]
-
-def generate_file(target_file, global_context, user_prompt, is_modification=False, current_step=None, total_steps=None):
+        files = plan_schema.parse_file_list(call_local_ai(system, user, json_mode=plan_schema.MODIFICATION_SCHEMA))
+        if files: return files
+    except llm_backend.LLMError as e:
+        print(f"{colors.YELLOW}⚠️ Impact analysis failed: {e}{colors.RESET}")
+    print(f"{colors.YELLOW}⚠️ Could not read the file list, editing src/App.jsx.{colors.RESET}")
+    return ["src/App.jsx"]
+
+def announce_step(target_file, is_modification, current_step, total_steps):
     action = "MODIFYING" if is_modification else "BUILDER"
     
     if current_step and total_steps:
@@ -223,12 +217,12 @@ def generate_file(target_file, global_context, user_prompt, is_modification=Fals
     else:
         step_display = "[2/3]" if not is_modification else "[1/1]"
 
-    print(f"{main.YELLOW}>>> {step_display} 👷 {action} (Local): {main.RESET}{target_file}...")
-    
-    project_summary = ""
-    for path, code in global_context.items():
-        if path != target_file:
-            project_summary += f"\n// File: {path}\n{code[:300]}...\n"
+    print(f"{colors.YELLOW}>>> {step_display} 👷 {action} (Local): {colors.RESET}{target_file}...")
+
+def build_file_prompts(target_file, global_context, user_prompt, is_modification=False, target_imports=None):
+    # Interfaces of the other files, most relevant first, within the token budget.
+    # target_imports: what the plan says the target imports (a new file has no code to read them from yet)
+    project_summary = context_builder.build_context(target_file, global_context, token_budget=CONTEXT_TOKEN_BUDGET, target_imports=target_imports)
 
     system = """ROLE: Senior React Developer (Vite + Tailwind).
 
@@ -265,6 +259,21 @@ def generate_file(target_file, global_context, user_prompt, is_modification=Fals
         
         Output the code for {target_file}:"""
 
+    return system, user
+
+@tracing.traced("builder")
+def generate_file(target_file, global_context, user_prompt, is_modification=False, current_step=None, total_steps=None, problems=None, target_imports=None):
+    if not problems: announce_step(target_file, is_modification, current_step, total_steps)
+    system, user = build_file_prompts(target_file, global_context, user_prompt, is_modification, target_imports)
+    # The previous attempt was rejected by the validator: feed the errors back
+    if problems: user += code_validator.feedback_prompt(problems)
+    tracing.annotate(file=target_file, modification=is_modification)
+
+    if HEDGE_CANDIDATES > 1:
+        code = generate_hedged(target_file, system, user)
+        if code: return code
+
+    error = None
     for attempt in range(2):
         try:
             resp_text = call_local_ai(system, user)
@@ -272,78 +281,325 @@ def generate_file(target_file, global_context, user_prompt, is_modification=Fals
             if len(code) < 50: raise Exception("Generated code too short")
             return code
         except Exception as e:
-            print(f"{main.RED}⚠️ Error on attempt {main.RESET}{attempt+1}: {e}")
+            error = e
+            print(f"{colors.RED}⚠️ Error on attempt {colors.RESET}{attempt+1}: {e}")
+            tracing.add(retries=1)
             time.sleep(1)
-            
-    return "// ERROR: Failed to generate code."
 
-def save_file(rel_path, code):
+    # Never hand an error string back as code: the caller skips the file and flags it as failed
+    raise llm_backend.LLMError(f"gave up after 2 attempts: {error}", "ollama") from error
+
+def generate_hedged(target_file, system, user, project_path=None):
+    """
+    Hedged mode: N concurrent completions at spread temperatures; the first one that passes
+    local validation wins and the rest are dropped. Only pays off if Ollama serves requests
+    in parallel (OLLAMA_NUM_PARALLEL > 1).
+    """
+    temperatures = hedging.spread_temperatures(0.6, HEDGE_CANDIDATES)
+
+    def candidate(temperature):
+        return lambda: sanitizar_codigo_agressivo(call_local_ai(system, user, temperature=temperature) or "", target_file)
+
+    is_valid = lambda code: len(code) >= 50 and not code_validator.validate(target_file, code, project_path or PROJECT_PATH)
+    code, winner = hedging.first_valid([candidate(t) for t in temperatures], is_valid)
+    tracing.add(llm_calls=len(temperatures))
+    if winner is not None: tracing.annotate(hedge_winner=winner, hedge_temperature=temperatures[winner])
+    return code
+
+@tracing.traced("validation")
+def validate_and_fix(target_file, code, global_context, user_prompt, is_modification=False, project_path=None, target_imports=None):
+    """
+    Validates code before it is written (esbuild syntax, truncation, unused or missing imports).
+    Only the rejected file is regenerated, with the problems in the prompt.
+    """
+    tracing.annotate(file=target_file)
+    for attempt in range(MAX_FIX_ATTEMPTS + 1):
+        problems = code_validator.validate(target_file, code, project_path or PROJECT_PATH)
+        if not problems: return code
+        tracing.add(failures=1)
+        if attempt == MAX_FIX_ATTEMPTS: break
+        print(f"{colors.YELLOW}🩺 {target_file} rejected ({problems[0]}), regenerating...{colors.RESET}")
+        try:
+            code = generate_file(target_file, global_context, user_prompt, is_modification, problems=problems, target_imports=target_imports)
+        except llm_backend.LLMError as e:
+            print(f"{colors.RED}⚠️ Regeneration failed ({e}), keeping the previous attempt.{colors.RESET}")
+            break
+
+    print(f"{colors.RED}⚠️ {target_file} still fails validation: {colors.RESET}{problems[0]}")
+    return code
+
+def resolve_file_path(rel_path, project_path=None):
     clean_path = rel_path.replace("base-app/", "").replace("./", "").replace("\\", "/")
     if "src/" in clean_path and not clean_path.startswith("src/"):
         clean_path = clean_path.split("src/")[-1]
     
     if not clean_path.startswith("src/"): clean_path = f"src/{clean_path}"
+    return os.path.join(project_path or PROJECT_PATH, clean_path)
+
+@tracing.traced("builder_stream")
+def generate_file_streaming(target_file, global_context, user_prompt, is_modification=False, project_path=None, target_imports=None):
+    """
+    Writes the file while tokens arrive (temp file + atomic swap).
+    A stalled or truncated stream is aborted early and falls back to the regular generator.
+    """
+    system, user = build_file_prompts(target_file, global_context, user_prompt, is_modification, target_imports)
+    full_path = resolve_file_path(target_file, project_path)
+    tracing.annotate(file=target_file, modification=is_modification)
+
+    def transform(code):
+        # Runs before the atomic swap, so rejected code never replaces the real file
+        code = sanitizar_codigo_agressivo(code, target_file)
+        problems = code_validator.validate(full_path, code, project_path or PROJECT_PATH)
+        if problems: raise code_validator.ValidationError(problems)
+        return code
+
+    problems = None
+    for attempt in range(2):
+        try:
+            code = stream_writer.stream_to_file(call_local_ai_stream(system, user), full_path, transform=transform)
+            if len(code) < 50: raise Exception("Generated code too short")
+            # The generator runs on the stream thread, so metrics are recorded here
+            tracing.add(llm_calls=1, prompt_chars=len(system) + len(user), response_chars=len(code))
+            return code
+        except code_validator.ValidationError as e:
+            print(f"{colors.YELLOW}🩺 {target_file} rejected ({e.problems[0]}), regenerating...{colors.RESET}")
+            problems = e.problems
+            break
+        except Exception as e:
+            print(f"{colors.RED}⚠️ Stream error on attempt {colors.RESET}{attempt+1}: {e}")
+            tracing.add(retries=1)
+
+    code = generate_file(target_file, global_context, user_prompt, is_modification, problems=problems, target_imports=target_imports)
+    code = validate_and_fix(target_file, code, global_context, user_prompt, is_modification, project_path, target_imports)
+    save_file(target_file, code, project_path)
+    return code
+
+@tracing.traced("patch")
+def generate_patch(target_file, global_context, user_prompt, project_path=None):
+    """
+    Asks only for SEARCH/REPLACE blocks, so output size follows the change instead of the file.
+    Returns the patched code, or None when the patch cannot be applied.
+    """
+    old_code = global_context.get(target_file)
+    if not old_code:
+        try:
+            with open(resolve_file_path(target_file, project_path), "r", encoding="utf-8") as f:
+                old_code = f.read()
+        except OSError:
+            return None  # New file: full generation
+    tracing.annotate(file=target_file)
+
+    system = f"""ROLE: Senior React Developer (Vite + Tailwind) editing an existing file.
+    {patching.PATCH_INSTRUCTIONS}
+    """
+    user = f"""TASK: Edit '{target_file}' to satisfy: "{user_prompt}"
+
+    CURRENT CODE:
+    {old_code}
+
+    SEARCH/REPLACE blocks:"""
+
+    try:
+        response = call_local_ai(system, user, temperature=0.1)
+        new_code = patching.apply_patch(old_code, response)
+    except (patching.PatchError, llm_backend.LLMError) as e:
+        tracing.annotate(patch_error=str(e))
+        return None
+
+    if not stream_writer.is_complete(new_code): return None
+    return sanitizar_codigo_agressivo(new_code, target_file)
+
+def generate_and_save(target_file, global_context, user_prompt, is_modification=False, current_step=None, total_steps=None, project_path=None, target_imports=None):
+    if is_modification and PATCH_MODE:
+        code = generate_patch(target_file, global_context, user_prompt, project_path)
+        if code is not None:
+            announce_step(target_file, is_modification, current_step, total_steps)
+            code = validate_and_fix(target_file, code, global_context, user_prompt, is_modification, project_path)
+            save_file(target_file, code, project_path)
+            return code
+        print(f"{colors.YELLOW}↩️  Patch could not be applied, regenerating full file...{colors.RESET}")
 
-    full_path = os.path.join(PROJECT_PATH, clean_path)
+    if not STREAM_MODE:
+        code = generate_file(target_file, global_context, user_prompt, is_modification, current_step, total_steps, target_imports=target_imports)
+        code = validate_and_fix(target_file, code, global_context, user_prompt, is_modification, project_path, target_imports)
+        save_file(target_file, code, project_path)
+        return code
+
+    announce_step(target_file, is_modification, current_step, total_steps)
+    return generate_file_streaming(target_file, global_context, user_prompt, is_modification, project_path, target_imports)
+
+def file_failed(target_file, error):
+    """The builder gave up on the file: nothing is written and the file is flagged as failed."""
+    print(f"{colors.RED}❌ {target_file}: generation failed ({error}). File not written.{colors.RESET}")
+    tracing.add(failures=1)
+
+def save_file(rel_path, code, project_path=None):
+    full_path = resolve_file_path(rel_path, project_path)
     folder = os.path.dirname(full_path)
-    if not os.path.exists(folder): os.makedirs(folder)
+    os.makedirs(folder, exist_ok=True)
     
     with open(full_path, "w", encoding="utf-8") as f:
         f.write(code)
 
-def check_dependencies(global_context, current_step=None, total_steps=None):
+@tracing.traced("dependencies")
+def check_dependencies(global_context, current_step=None, total_steps=None, project_path=None, preinstall=None):
+    """
+    `preinstall`: dependencies.install_async thread for the planned packages, started before generation.
+    The generated imports are still scanned afterwards to catch anything the architect missed.
+    """
     if current_step and total_steps:
         step_display = f"[{current_step}/{total_steps}]"
     else:
         step_display = "[3/3]"
 
-    print(f"\n{main.BLUE}>>> {step_display} 📦 DEPENDENCIES...{main.RESET}")
+    print(f"\n{colors.BLUE}>>> {step_display} 📦 DEPENDENCIES...{colors.RESET}")
     required_libs = [
         'react', 'react-dom', 'vite', 
         '@vitejs/plugin-react-swc', 
         'tailwindcss', 'postcss', 'autoprefixer', 'lucide-react'
     ]
-    subprocess.run(f"npm install {' '.join(required_libs)}", cwd=PROJECT_PATH, shell=True, stdout=subprocess.DEVNULL)
-
-def check_http_domain(slug):
-    domain = f"http://{slug}.surge.sh"
-    try:
-        import urllib.request
-        req = urllib.request.Request(domain, method='HEAD')
-        urllib.request.urlopen(req)
-        return True 
-    except: return False
-
-def deploy_project(initial_name):
-    print(f"\n{main.MAGENTA}>>> [BUILDING]...{main.RESET}")
-    subprocess.run("npm run build", cwd=PROJECT_PATH, shell=True, stdout=subprocess.DEVNULL)
+    wanted = set(required_libs) | dependencies.external_imports(global_context)
+    project_path = project_path or PROJECT_PATH
+    if preinstall:
+        preinstall.join()
+        planned = preinstall.result["packages"]
+        tracing.annotate(preinstalled=planned)
+        if planned and not preinstall.result["ok"]:
+            print(f"{colors.RED}⚠️ npm install failed for: {planned}{colors.RESET}")
+        elif planned:
+            print(f"{colors.GREEN}✅ Installed from the plan: {planned}{colors.RESET}")
+    missing = dependencies.missing_packages(wanted, project_path)
+    tracing.annotate(installed=missing)
+    if missing:
+        print(f"Installing: {missing}")
+        if not dependencies.install(missing, project_path):
+            print(f"{colors.RED}⚠️ npm install failed for: {missing}{colors.RESET}")
+    else:
+        print(f"{colors.GREEN}✅ All packages already installed.{colors.RESET}")
+
+@tracing.traced("deploy")
+def deploy_project(initial_name, project_path=None, owner=None):
+    project_path = project_path or PROJECT_PATH
+    # The name is searched for while the build runs (concurrent probes with timeouts); only the `owner` app reuses its own domain
+    allocation = domains.get_allocator().allocate_async(initial_name, is_owned=lambda slug: BUILD_CACHE.owned_domain(slug, owner), max_len=15)
+
+    print(f"\n{colors.MAGENTA}>>> [BUILDING]...{colors.RESET}")
+    with tracing.span("build"):
+        source_hash = BUILD_CACHE.source_hash(project_path)
+        if BUILD_CACHE.is_fresh(project_path, source_hash):
+            print(f"{colors.GREEN}✅ No changes since the last build, reusing dist/.{colors.RESET}")
+            tracing.annotate(cached=True)
+        else:
+            # Build inside the session's Node worker (Vite already loaded); falls back to `npm run build`
+            ok, error = node_worker.build(project_path)
+            if not ok:
+                # Without a new build dist/ is the old one: publish nothing
+                print(f"{colors.RED}⚠️ Build failed: {colors.RESET}{error}")
+                tracing.annotate(error="build")
+                return None
+            BUILD_CACHE.record_build(project_path, source_hash)
     
-    current_name = initial_name.replace(" ", "-").lower()[:15]
-    while check_http_domain(current_name):
-        current_name += f"-{random.randint(1,99)}"
+    with tracing.span("domain"):
+        domain = f"{allocation.result()}.surge.sh"
+        tracing.annotate(domain=domain)
     
-    subprocess.run(f"npx surge ./dist --domain {current_name}.surge.sh", cwd=PROJECT_PATH, shell=True, stdout=subprocess.DEVNULL)
-    return f"{current_name}.surge.sh"
-
-def iniciar_sistema_local(model_name_from_config=None):
+    with tracing.span("surge"):
+        dist_hash = BUILD_CACHE.dist_hash(project_path)
+        if BUILD_CACHE.is_deployed(domain, dist_hash):
+            print(f"{colors.GREEN}✅ {domain} is already up to date, skipping upload.{colors.RESET}")
+            tracing.annotate(skipped=True)
+        else:
+            result = subprocess.run(f"npx surge ./dist --domain {domain}", cwd=project_path, shell=True, stdout=subprocess.DEVNULL)
+            if result.returncode != 0:
+                print(f"{colors.RED}⚠️ Surge upload failed (exit code {result.returncode}).{colors.RESET}")
+                tracing.annotate(error="surge")
+                return None
+            BUILD_CACHE.record_deploy(domain, dist_hash, project_path, owner)
+    return domain
+
+def build_project(user_prompt, project_path=None, reset=True, session=None):
+    """
+    Full pipeline for one idea: plan, files and dependencies.
+    With a `session` (sessions.Session) every step is journaled; a resumed session takes the plan
+    and the finished files from the journal and only calls the model for the rest.
+    Returns (files, context, timings) with timings in seconds per stage.
+    """
+    timings = {}
+    start = time.time()
+    if reset: reset_project(project_path)
+
+    t = time.time()
+    if session and session.files:
+        plan = session.plan()
+        files_to_create = session.all_files()
+        done, total = session.progress()
+        print(f"{colors.CYAN}↩️  Resuming session {session.id}: {done}/{total} files already generated.{colors.RESET}")
+        if session.failed: print(f"{colors.YELLOW}   Regenerating failed files: {list(session.failed)}{colors.RESET}")
+    else:
+        plan = plan_architecture(user_prompt)
+        files_to_create = list(plan.files)
+        if session: session.record_plan(plan)
+    timings["plan"] = round(time.time() - t, 3)
+
+    total_files = len(files_to_create)
+    total_workflow_steps = total_files + 2
+
+    print(f"📋 Plan: {colors.CYAN}{files_to_create} {colors.RESET}({total_files} files)\n")
+    # The plan already names the npm packages: install them while the files are generated
+    planned_packages = plan.all_packages()
+    preinstall = dependencies.install_async(planned_packages, project_path or PROJECT_PATH) if planned_packages else None
+
+    # Imported files first, so each file is written with the real code of what it imports in its context
+    project_context = {}
+    files_to_create = scheduler.topological_order(files_to_create, scheduler.build_dependency_graph(files_to_create, plan.deps()))
+
+    t = time.time()
+    for i, file in enumerate(files_to_create):
+        current_step_num = i + 2
+        if session and file in session.outputs:
+            # Generated before the crash: restored from the journal without calling the model
+            code = session.outputs[file]
+            save_file(file, code, project_path)
+        else:
+            try:
+                code = generate_and_save(file, project_context, user_prompt, 
+                                         current_step=current_step_num, 
+                                         total_steps=total_workflow_steps,
+                                         project_path=project_path,
+                                         target_imports=plan.imports.get(file))
+            except (llm_backend.LLMError, OSError) as e:
+                file_failed(file, e)
+                if session: session.record_failure(file, e)
+                continue
+            if session: session.record_file(file, code)
+        project_context[file] = code
+    timings["files"] = round(time.time() - t, 3)
+    if session: session.record_stage("files")
+
+    t = time.time()
+    check_dependencies(project_context, 
+                       current_step=total_workflow_steps, 
+                       total_steps=total_workflow_steps,
+                       project_path=project_path,
+                       preinstall=preinstall)
+    timings["dependencies"] = round(time.time() - t, 3)
+    if session: session.record_stage("dependencies")
+    timings["total"] = round(time.time() - start, 3)
+    return files_to_create, project_context, timings
+
+def select_local_model(model_name_from_config=None):
     global LOCAL_MODEL
-    
-    if not ollama:
-        print(f"{main.RED}❌ Error: 'ollama' library missing.{main.RESET}")
-        return
 
-    clear_screen()
-    print(f"{main.CYAN}╔════════════════════════════════════════════════════╗{main.RESET}")
-    print(f"{main.CYAN}║                  LOCAL GENERATOR                   ║{main.RESET}")
-    print(f"{main.CYAN}╚════════════════════════════════════════════════════╝{main.RESET}\n")
-    
     # Check for better models
     try:
-        models_info = ollama.list()
+        models_info = SESSION.ollama_client().list()
         available_models = [m['model'] for m in models_info['models']]
         
-        # Priority Queue
-        if "qwen2.5-coder:7b" in available_models: LOCAL_MODEL = "qwen2.5-coder:7b"
+        # Best installed model in the latest benchmark report (benchmark_modelos.py), then the priority queue
+        import benchmark_modelos
+        measured = benchmark_modelos.best_local_model(available_models)
+        if measured: LOCAL_MODEL = measured
+        elif "qwen2.5-coder:7b" in available_models: LOCAL_MODEL = "qwen2.5-coder:7b"
         elif "deepseek-r1:7b" in available_models: LOCAL_MODEL = "deepseek-r1:7b"
         elif "mistral:latest" in available_models: LOCAL_MODEL = "mistral:latest"
         elif model_name_from_config: LOCAL_MODEL = model_name_from_config
@@ -351,88 +607,116 @@ def iniciar_sistema_local(model_name_from_config=None):
         
     except:
         LOCAL_MODEL = "llama3.2"
+    return LOCAL_MODEL
 
-    print(f"{main.MAGENTA}Model in use: {main.YELLOW}{LOCAL_MODEL}{main.RESET}")
+def warm_up_model():
+    """
+    Loads the selected model into RAM/VRAM in the background (while the user types the idea)
+    and keeps it loaded for the session. The load time shows up as the 'warmup' stage.
+    """
+    def run():
+        with tracing.span("warmup", model=LOCAL_MODEL):
+            try:
+                model = SESSION.resolve_ollama_model(LOCAL_MODEL, "llama3.2")
+                future = BACKEND.warm_up(model)
+                if future is not None: tracing.add(load_seconds=future.result())
+            except Exception as e:
+                tracing.annotate(error=str(e))
+
+    thread = threading.Thread(target=run, name="ollama-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def iniciar_sistema_local(model_name_from_config=None, resume=None):
+    """`resume`: an interrupted sessions.Session; the first round continues it instead of asking for an idea."""
+    if not ollama_installed():
+        print(f"{colors.RED}❌ Error: 'ollama' library missing.{colors.RESET}")
+        return
 
-    while True:
-        initial_prompt = clean_input(f"\n{main.YELLOW}📝 App Idea {main.RED}(or 'exit'){main.RESET}: ")
-        print("")
-        
-        if initial_prompt.lower() == 'exit': break
-        
-        reset_project()
+    clear_screen()
+    print(f"{colors.CYAN}╔════════════════════════════════════════════════════╗{colors.RESET}")
+    print(f"{colors.CYAN}║                  LOCAL GENERATOR                   ║{colors.RESET}")
+    print(f"{colors.CYAN}╚════════════════════════════════════════════════════╝{colors.RESET}\n")
 
-        files_to_create = plan_architecture(initial_prompt)
-        
-        total_files = len(files_to_create)
-        total_workflow_steps = total_files + 2
+    select_local_model(model_name_from_config)
+    warm_up_model()
+    print(f"{colors.MAGENTA}Model in use: {colors.YELLOW}{LOCAL_MODEL}{colors.RESET}")
+    preview_server = preview.PreviewServer(PROJECT_PATH)
 
-        print(f"📋 Plan: {main.CYAN}{files_to_create} {main.RESET}({total_files} files)\n")
-        
-        project_context = {}
-        if "src/App.jsx" in files_to_create:
-            files_to_create.remove("src/App.jsx")
-            files_to_create.insert(0, "src/App.jsx")
-
-        for i, file in enumerate(files_to_create):
-            current_step_num = i + 2
-            code = generate_file(file, project_context, initial_prompt, 
-                                 current_step=current_step_num, 
-                                 total_steps=total_workflow_steps)
-            project_context[file] = code
-            save_file(file, code)
+    try:
+        while True:
+            if resume:
+                session, resume = resume, None
+                initial_prompt = session.prompt
+                print(f"\n{colors.YELLOW}📝 App Idea: {colors.RESET}{initial_prompt}\n")
+            else:
+                initial_prompt = clean_input(f"\n{colors.YELLOW}📝 App Idea {colors.RED}(or 'exit'){colors.RESET}: ")
+                print("")
             
-        check_dependencies(project_context, 
-                           current_step=total_workflow_steps, 
-                           total_steps=total_workflow_steps)
+                if initial_prompt.lower() == 'exit': break
+                session = sessions.Session.create(initial_prompt, PROJECT_PATH, "local", LOCAL_MODEL)
         
-        preview_process = None
+            files_to_create, project_context, _ = build_project(initial_prompt, session=session)
+            tracing.finish_run()
         
-        while True:
-            if preview_process: kill_process(preview_process)
-            
-            print(f"\n{main.GREEN}✨ App Ready. Opening Preview...{main.RESET}")
-            print("👉 http://localhost:5173")
-            preview_process = subprocess.Popen("npm run dev -- --open", cwd=PROJECT_PATH, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+            while True:
+                # Vite is started once; later edits reach the browser through HMR
+                if preview_server.start():
+                    print(f"\n{colors.GREEN}✨ App Ready. Opening Preview...{colors.RESET}")
+                    if not preview_server.wait_ready():
+                        print(f"{colors.RED}⚠️ Preview server did not start:{colors.RESET} " + " | ".join(list(preview_server.log)[-3:]))
+                print(f"👉 {preview_server.url}")
             
-            print("\n" + f"{main.CYAN}={main.RESET}"*30)
-            print(f" {main.GREEN}[1] ✏️  MODIFY{main.RESET}")
-            print(f" {main.MAGENTA}[2] 🚀 PUBLISH{main.RESET}")
-            print(f" {main.BLUE}[3] 🔙 NEW PROJECT{main.RESET}")
-            print(f" {main.RED}[4] ❌ EXIT{main.RESET}")
-            print(f"{main.CYAN}={main.RESET}"*30)
+                print("\n" + f"{colors.CYAN}={colors.RESET}"*30)
+                print(f" {colors.GREEN}[1] ✏️  MODIFY{colors.RESET}")
+                print(f" {colors.MAGENTA}[2] 🚀 PUBLISH{colors.RESET}")
+                print(f" {colors.BLUE}[3] 🔙 NEW PROJECT{colors.RESET}")
+                print(f" {colors.RED}[4] ❌ EXIT{colors.RESET}")
+                print(f"{colors.CYAN}={colors.RESET}"*30)
             
-            option = clean_input(">>> ")
+                option = clean_input(">>> ")
             
-            if option == "1":
-                change_request = clean_input(f"\n{main.YELLOW}✏️  Change Request: {main.RESET}")
-                files_to_edit = plan_modification(change_request, files_to_create)
-                print(f"🎯 Files to Edit: {files_to_edit}")
+                if option == "1":
+                    change_request = clean_input(f"\n{colors.YELLOW}✏️  Change Request: {colors.RESET}")
+                    files_to_edit = plan_modification(change_request, files_to_create)
+                    print(f"🎯 Files to Edit: {files_to_edit}")
                 
-                total_mod_steps = len(files_to_edit)
+                    total_mod_steps = len(files_to_edit)
 
-                for f in files_to_edit:
-                    if f not in files_to_create: files_to_create.append(f)
+                    for f in files_to_edit:
+                        if f not in files_to_create: files_to_create.append(f)
                 
-                for i, file in enumerate(files_to_edit):
-                    new_code = generate_file(file, project_context, change_request, 
-                                             is_modification=True, 
-                                             current_step=i+1, 
-                                             total_steps=total_mod_steps)
-                    project_context[file] = new_code
-                    save_file(file, new_code)
+                    session.record_modification(change_request, files_to_edit)
+                    for i, file in enumerate(files_to_edit):
+                        try:
+                            new_code = generate_and_save(file, project_context, change_request, 
+                                                         is_modification=True, 
+                                                         current_step=i+1, 
+                                                         total_steps=total_mod_steps)
+                        except llm_backend.LLMError as e:
+                            file_failed(file, e)
+                            continue
+                        project_context[file] = new_code
+                        session.record_file(file, new_code)
                 
-                print(f"{main.GREEN}✅ Done! Reloading...{main.RESET}")
+                    print(f"{colors.GREEN}✅ Done! Changes are live (hot reload).{colors.RESET}")
+                    tracing.finish_run("MODIFICATION METRICS")
                 
-            elif option == "2":
-                kill_process(preview_process)
-                link = deploy_project(initial_prompt)
-                print(f"\n{main.GREEN}🚀 LIVE: https://{link}{main.RESET}\n")
-                input("Press ENTER...")
-                break
-            elif option == "3":
-                kill_process(preview_process)
-                break
-            elif option == "4":
-                kill_process(preview_process)
-                sys.exit()
\ No newline at end of file
+                elif option == "2":
+                    preview_server.stop()
+                    link = deploy_project(initial_prompt, owner=session.id)
+                    if link: session.record_stage("deploy", domain=link)
+                    tracing.finish_run("DEPLOY METRICS")
+                    if link: print(f"\n{colors.GREEN}🚀 LIVE: https://{link}{colors.RESET}\n")
+                    else: print(f"\n{colors.RED}❌ Deploy failed, nothing was published.{colors.RESET}\n")
+                    input("Press ENTER...")
+                    break
+                elif option == "3":
+                    preview_server.stop()
+                    break
+                elif option == "4":
+                    preview_server.stop()
+                    sys.exit()
+    finally:
+        # Ctrl-C or a crash must not leave Vite orphaned on the port
+        preview_server.stop()
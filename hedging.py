@@ -0,0 +1,62 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import llm_backend
+
+# Quantas gerações concorrentes por arquivo (1 = desligado). Custa N vezes mais tokens.
+CANDIDATES = max(1, int(os.environ.get("FABRICA_HEDGE", "1") or 1))
+TEMPERATURE_STEP = 0.15
+
+def spread_temperatures(base, count, step=TEMPERATURE_STEP):
+    """Temperatura original primeiro (mesma chave de cache), depois variações em volta dela."""
+    temps = [base]
+    offset = step
+    while len(temps) < count:
+        for candidate in (base + offset, base - offset):
+            if len(temps) < count: temps.append(round(min(1.0, max(0.0, candidate)), 2))
+        offset += step
+    return temps
+
+class Hedge:
+    """
+    Dispara várias tentativas ao mesmo tempo; a primeira que passar em `is_valid` vence.
+    Cada tentativa roda num llm_backend.CancelScope: quando há vencedor (ou o tempo acaba),
+    as chamadas ao modelo das outras são canceladas no meio, liberando a vaga de concorrência
+    e os baldes do provedor; as que ainda não começaram nem chegam a ser enviadas.
+    """
+
+    def __init__(self, is_valid):
+        self.is_valid = is_valid
+        self.scopes = []
+
+    @staticmethod
+    def _run_in(scope, task):
+        with llm_backend.cancel_scope(scope):
+            return task()
+
+    def run(self, tasks, timeout=None):
+        """Retorna (resultado, índice da tarefa vencedora), ou (None, None) se nenhuma for válida."""
+        pool = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="hedge")
+        self.scopes = [llm_backend.CancelScope() for _ in tasks]
+        futures = {pool.submit(self._run_in, scope, task): i for i, (scope, task) in enumerate(zip(self.scopes, tasks))}
+        pending = set(futures)
+        deadline = time.time() + timeout if timeout else None
+        try:
+            while pending:
+                remaining = max(0, deadline - time.time()) if deadline else None
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done: break  # Estourou o tempo total
+                for future in sorted(done, key=futures.get):
+                    try:
+                        result = future.result()
+                    except Exception:
+                        continue
+                    if result and self.is_valid(result): return result, futures[future]
+            return None, None
+        finally:
+            for scope in self.scopes: scope.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+def first_valid(tasks, is_valid, timeout=None):
+    return Hedge(is_valid).run(tasks, timeout)
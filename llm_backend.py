@@ -0,0 +1,400 @@
+import os
+import re
+import time
+import queue
+import random
+import asyncio
+import threading
+from contextlib import contextmanager
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+CHARS_PER_TOKEN = 4
+
+# Ollama: janela de contexto dimensionada pelo prompt, em degraus, e modelo mantido carregado na sessão
+OLLAMA_KEEP_ALIVE = os.environ.get("FABRICA_OLLAMA_KEEP_ALIVE", "30m")
+NUM_CTX_MIN = 8192  # Piso do num_ctx fixo de antes: prompt curto não pode cortar a resposta
+NUM_CTX_MAX = 32768
+OUTPUT_RESERVE = 4096  # Tokens reservados para a resposta: uma página inteira passa fácil de 2048
+
+# Limites padrão por provedor (camada gratuita). FABRICA_RPM / FABRICA_TPM / FABRICA_CONCURRENCY sobrescrevem.
+LIMITS = {
+    "google": {"rpm": 15, "tpm": 250_000, "concurrency": 4},
+    "groq":   {"rpm": 30, "tpm": 6_000, "concurrency": 4},
+    "openai": {"rpm": 500, "tpm": 200_000, "concurrency": 8},
+    "ollama": {"rpm": None, "tpm": None, "concurrency": 2},
+}
+
+_TRANSIENT_STATUS = {408, 409, 500, 502, 503, 504, 529}
+_TRANSIENT_NAMES = {"APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailable",
+                    "DeadlineExceeded", "ConnectError", "ReadTimeout", "RemoteProtocolError", "TimeoutError"}
+_RETRY_HINT_RE = re.compile(r"retry(?:[_ ]after| in)?\D{0,20}?(\d+(?:\.\d+)?)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE)
+
+class LLMError(Exception):
+    """Falha definitiva de uma chamada ao modelo (depois dos retries, ou erro não recuperável)."""
+
+    def __init__(self, message, provider=None, status=None):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+
+class RateLimitError(LLMError):
+    def __init__(self, message, provider=None, status=429, retry_after=None):
+        super().__init__(message, provider, status)
+        self.retry_after = retry_after
+
+class Completion:
+    def __init__(self, text, prompt_tokens=None, completion_tokens=None, latency=0.0, retries=0, load_seconds=None, inference_seconds=None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.latency = latency
+        self.retries = retries
+        self.load_seconds = load_seconds            # Só Ollama: tempo carregando o modelo na RAM/VRAM
+        self.inference_seconds = inference_seconds  # Só Ollama: avaliação do prompt + geração
+
+# --- CLASSIFICAÇÃO DE ERROS ---
+def _status(exc):
+    for candidate in (getattr(exc, "status_code", None), getattr(getattr(exc, "response", None), "status_code", None), getattr(exc, "code", None)):
+        if isinstance(candidate, int): return candidate
+    return None
+
+def _retry_after(exc):
+    """Segundos pedidos pelo provedor: header retry-after(-ms) ou a dica no texto do erro (Gemini)."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"): return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                from email.utils import parsedate_to_datetime  # Raro (data HTTP); fora do caminho de import
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    match = _RETRY_HINT_RE.search(str(exc))
+    return float(match.group(1) or match.group(2)) if match else None
+
+def classify(exc, provider):
+    """Converte a exceção do SDK em LLMError; retorna (erro, pode_tentar_de_novo)."""
+    if isinstance(exc, LLMError): return exc, isinstance(exc, RateLimitError)
+    status = _status(exc)
+    name = type(exc).__name__
+    if status == 429 or name in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+        return RateLimitError(f"{provider}: rate limited ({exc})", provider, 429, _retry_after(exc)), True
+    transient = status in _TRANSIENT_STATUS or name in _TRANSIENT_NAMES or isinstance(exc, (asyncio.TimeoutError, ConnectionError))
+    return LLMError(f"{provider}: {exc}", provider, status), transient
+
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None: return min(BACKOFF_CAP, retry_after) + random.uniform(0, 0.5)
+    return min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+# --- LIMITES ---
+class TokenBucket:
+    """Balde de tokens assíncrono: `rate_per_minute` de reposição, rajada de até `capacity`."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Depois de um 429 esvazia o balde: a próxima chamada (de qualquer thread) só sai após `seconds`."""
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+# --- ADAPTADORES ---
+# json_mode: False, True (qualquer objeto JSON) ou um dict com JSON Schema (saída estruturada onde o provedor aceita)
+def _schema(json_mode):
+    return json_mode if isinstance(json_mode, dict) else None
+
+def _without(schema, key):
+    """Cópia do schema sem `key` em nenhum nível (o Gemini recusa additionalProperties)."""
+    if isinstance(schema, dict): return {k: _without(v, key) for k, v in schema.items() if k != key}
+    if isinstance(schema, list): return [_without(v, key) for v in schema]
+    return schema
+
+class ChatCompletionsAdapter:
+    """OpenAI e Groq: mesma API de chat.completions, clientes assíncronos diferentes."""
+
+    def __init__(self, client_factory, json_schema=False):
+        self.client_factory = client_factory
+        self.json_schema = json_schema  # Só a OpenAI garante o schema (strict); no Groq fica o json_object
+
+    def _kwargs(self, system, prompt, model, temperature, json_mode):
+        kwargs = {"model": model, "temperature": temperature,
+                  "messages": [{"role": "system", "content": system}, {"role": "user", "content": prompt}]}
+        if _schema(json_mode) and self.json_schema:
+            kwargs["response_format"] = {"type": "json_schema", "json_schema": {"name": "response", "schema": json_mode, "strict": True}}
+        elif json_mode: kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+    async def complete(self, system, prompt, model, temperature, json_mode):
+        resp = await self.client_factory().chat.completions.create(**self._kwargs(system, prompt, model, temperature, json_mode))
+        usage = getattr(resp, "usage", None)
+        return Completion(resp.choices[0].message.content,
+                          getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
+
+    async def stream(self, system, prompt, model, temperature):
+        stream = await self.client_factory().chat.completions.create(stream=True, **self._kwargs(system, prompt, model, temperature, False))
+        async for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text: yield text
+
+class GeminiAdapter:
+    def __init__(self, session):
+        self.session = session
+
+    def _model(self, system, model, temperature, json_mode):
+        config = {"temperature": temperature}
+        if json_mode: config["response_mime_type"] = "application/json"
+        if _schema(json_mode): config["response_schema"] = _without(json_mode, "additionalProperties")
+        return self.session.gemini_model(model, system, config)
+
+    async def complete(self, system, prompt, model, temperature, json_mode):
+        resp = await self._model(system, model, temperature, json_mode).generate_content_async(prompt)
+        usage = getattr(resp, "usage_metadata", None)
+        return Completion(resp.text, getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None))
+
+    async def stream(self, system, prompt, model, temperature):
+        resp = await self._model(system, model, temperature, False).generate_content_async(prompt, stream=True)
+        async for chunk in resp:
+            if chunk.text: yield chunk.text
+
+def _seconds(nanoseconds):
+    return round(nanoseconds / 1e9, 3) if nanoseconds else None
+
+class OllamaAdapter:
+    """
+    num_ctx acompanha o tamanho real do prompt (degraus de potência de 2 a partir de NUM_CTX_MIN),
+    mas nunca diminui na sessão: mudar num_ctx faz o Ollama recarregar o modelo.
+    keep_alive explícito em toda chamada evita que o modelo seja descarregado entre as etapas.
+    """
+
+    def __init__(self, session, keep_alive=OLLAMA_KEEP_ALIVE):
+        self.session = session
+        self.keep_alive = keep_alive
+        self.num_ctx = NUM_CTX_MIN
+
+    def context_size(self, system, prompt):
+        needed = (len(system) + len(prompt)) // CHARS_PER_TOKEN + OUTPUT_RESERVE
+        size = NUM_CTX_MIN
+        while size < needed and size < NUM_CTX_MAX: size *= 2
+        self.num_ctx = max(self.num_ctx, size)
+        return self.num_ctx
+
+    def _options(self, system, prompt, temperature):
+        return {"temperature": temperature, "num_ctx": self.context_size(system, prompt)}
+
+    async def warm_up(self, model):
+        """Carrega o modelo (prompt vazio) com o mesmo num_ctx das chamadas, para não recarregar depois."""
+        resp = await self.session.ollama_async_client().generate(
+            model=model, prompt="", keep_alive=self.keep_alive, options={"num_ctx": self.num_ctx})
+        return _seconds(resp.get("load_duration")) or 0.0
+
+    async def complete(self, system, prompt, model, temperature, json_mode):
+        extra = {"format": _schema(json_mode) or "json"} if json_mode else {}
+        resp = await self.session.ollama_async_client().chat(
+            model=model, keep_alive=self.keep_alive, options=self._options(system, prompt, temperature), **extra,
+            messages=[{"role": "system", "content": system}, {"role": "user", "content": prompt}])
+        inference = (resp.get("prompt_eval_duration") or 0) + (resp.get("eval_duration") or 0)
+        return Completion(resp["message"]["content"], resp.get("prompt_eval_count"), resp.get("eval_count"),
+                          load_seconds=_seconds(resp.get("load_duration")), inference_seconds=_seconds(inference))
+
+    async def stream(self, system, prompt, model, temperature):
+        parts = await self.session.ollama_async_client().chat(
+            model=model, stream=True, keep_alive=self.keep_alive, options=self._options(system, prompt, temperature),
+            messages=[{"role": "system", "content": system}, {"role": "user", "content": prompt}])
+        async for part in parts:
+            text = part["message"]["content"]
+            if text: yield text
+
+def make_adapter(session):
+    if session.provider == "groq": return ChatCompletionsAdapter(session.groq_async_client)
+    if session.provider == "openai": return ChatCompletionsAdapter(session.openai_async_client, json_schema=True)
+    if session.provider == "ollama": return OllamaAdapter(session)
+    return GeminiAdapter(session)
+
+# --- LOOP DE FUNDO ---
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+def _loop():
+    """Um event loop numa thread daemon; o código síncrono do pipeline submete corrotinas nele."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="llm-backend", daemon=True).start()
+        return _LOOP
+
+class CancelScope:
+    """
+    Chamadas feitas por uma thread dentro de `cancel_scope(escopo)`. cancel() cancela as tarefas
+    em andamento no loop de fundo: a requisição HTTP é abortada e o semáforo/baldes do provedor
+    são liberados na hora. Chamadas que começarem depois do cancel() já nascem canceladas.
+    """
+
+    def __init__(self):
+        self._futures = set()
+        self._lock = threading.Lock()
+        self.cancelled = False
+
+    def add(self, future):
+        with self._lock:
+            if self.cancelled:
+                future.cancel()
+                return
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+
+    def _discard(self, future):
+        with self._lock: self._futures.discard(future)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            futures = list(self._futures)
+        for future in futures: future.cancel()
+
+_SCOPE = threading.local()
+
+@contextmanager
+def cancel_scope(scope):
+    previous = getattr(_SCOPE, "current", None)
+    _SCOPE.current = scope
+    try:
+        yield scope
+    finally:
+        _SCOPE.current = previous
+
+def _submit(coro):
+    future = asyncio.run_coroutine_threadsafe(coro, _loop())
+    scope = getattr(_SCOPE, "current", None)
+    if scope: scope.add(future)
+    return future
+
+def run_sync(coro, timeout=None):
+    return _submit(coro).result(timeout)
+
+def _limit(provider, key):
+    override = os.environ.get(f"FABRICA_{key.upper()}")
+    if override: return int(override) or None
+    return LIMITS.get(provider, LIMITS["google"])[key]
+
+class LLMBackend:
+    """
+    Interface única para Gemini, OpenAI, Groq e Ollama.
+    Cada chamada passa pelo limite de concorrência e pelos baldes de requisições/tokens do provedor;
+    429 e erros transitórios são repetidos com backoff exponencial (respeitando retry-after).
+    Falhas viram LLMError — nunca uma string de erro que acabaria gravada como código.
+    """
+
+    def __init__(self, session, max_retries=MAX_RETRIES, rpm=None, tpm=None, concurrency=None):
+        self.session = session
+        self.provider = session.provider
+        self.adapter = make_adapter(session)
+        self.max_retries = max_retries
+        rpm = rpm or _limit(self.provider, "rpm")
+        tpm = tpm or _limit(self.provider, "tpm")
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.semaphore = asyncio.Semaphore(concurrency or _limit(self.provider, "concurrency") or 4)
+
+    async def _admit(self, system, prompt):
+        if self.requests: await self.requests.acquire(1)
+        if self.tokens: await self.tokens.acquire((len(system) + len(prompt)) // CHARS_PER_TOKEN + 1)
+
+    def _pause(self, seconds):
+        for bucket in (self.requests, self.tokens):
+            if bucket: bucket.pause(seconds)
+
+    async def _retry_wait(self, error, attempt):
+        delay = backoff_delay(attempt, getattr(error, "retry_after", None))
+        if isinstance(error, RateLimitError) and self.requests:
+            self._pause(delay)  # A espera acontece no próximo _admit, junto com as outras chamadas
+        else:
+            await asyncio.sleep(delay)
+
+    async def acomplete(self, system, prompt, model, temperature=0.7, json_mode=False):
+        start = time.time()
+        for attempt in range(self.max_retries + 1):
+            await self._admit(system, prompt)
+            try:
+                async with self.semaphore:
+                    result = await self.adapter.complete(system, prompt, model, temperature, json_mode)
+                if not result.text: raise LLMError(f"{self.provider}: empty response", self.provider)
+                result.latency, result.retries = round(time.time() - start, 3), attempt
+                return result
+            except Exception as exc:
+                error, retriable = classify(exc, self.provider)
+                if not retriable or attempt == self.max_retries: raise error from exc
+                await self._retry_wait(error, attempt)
+
+    async def astream(self, system, prompt, model, temperature=0.7):
+        """Repete só enquanto nada foi emitido; depois do primeiro pedaço, o erro sobe."""
+        for attempt in range(self.max_retries + 1):
+            await self._admit(system, prompt)
+            emitted = False
+            try:
+                async with self.semaphore:
+                    async for chunk in self.adapter.stream(system, prompt, model, temperature):
+                        emitted = True
+                        yield chunk
+                return
+            except Exception as exc:
+                error, retriable = classify(exc, self.provider)
+                if emitted or not retriable or attempt == self.max_retries: raise error from exc
+                await self._retry_wait(error, attempt)
+
+    def warm_up(self, model):
+        """Pré-carrega o modelo no loop de fundo. Retorna um Future (segundos de carga) ou None se o provedor não precisa."""
+        if not hasattr(self.adapter, "warm_up"): return None
+        return asyncio.run_coroutine_threadsafe(self.adapter.warm_up(model), _loop())
+
+    # --- PONTE SÍNCRONA ---
+    def complete(self, system, prompt, model, temperature=0.7, json_mode=False, timeout=None):
+        return run_sync(self.acomplete(system, prompt, model, temperature, json_mode), timeout)
+
+    def stream(self, system, prompt, model, temperature=0.7):
+        """Gerador síncrono sobre o astream (compatível com stream_writer.iterate_with_timeout)."""
+        chunks = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for chunk in self.astream(system, prompt, model, temperature):
+                    chunks.put(chunk)
+                chunks.put(done)
+            except BaseException as e:
+                chunks.put(e)
+                if isinstance(e, asyncio.CancelledError): raise
+
+        future = _submit(pump())
+        try:
+            while True:
+                item = chunks.get()
+                if item is done: return
+                if isinstance(item, BaseException): raise item
+                yield item
+        finally:
+            future.cancel()
@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from atomic_io import atomic_write_json
+
+CACHE_DIR = os.path.join(os.getcwd(), ".cache_ia", "responses")
+MAX_BYTES = 200 * 1024 * 1024     # 200 MB
+MAX_AGE = 7 * 24 * 3600           # 7 dias
+CREATIVE_TEMP = 0.9               # Acima disso a resposta deve variar: não usa cache
+EVICT_EVERY = 25                  # Roda a limpeza a cada N gravações
+
+class ResponseCache:
+    """
+    Cache em disco das respostas da IA, endereçado pelo hash de
+    (modelo, sistema, prompt, temperatura, json_mode).
+    Cada entrada é um JSON com a resposta e metadados (latência, tokens...).
+    O mtime do arquivo é o "último uso": a limpeza remove por idade e depois por LRU até caber no limite.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, max_age=MAX_AGE, creative_temp=CREATIVE_TEMP):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.creative_temp = creative_temp
+        self.enabled = os.environ.get("FABRICA_NO_CACHE", "") not in ("1", "true", "yes")
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def key(self, model, system, prompt, temp, json_mode):
+        raw = json.dumps([model, system, prompt, round(float(temp), 3), json_mode if isinstance(json_mode, dict) else bool(json_mode)], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def bypass(self, temp):
+        return not self.enabled or (temp is not None and temp >= self.creative_temp)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path, None)  # Marca como usado recentemente (LRU)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, response, meta=None):
+        path = self._path(key)
+        entry = {"response": response, "meta": dict(meta or {}, created_at=time.time())}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write_json(path, entry, ensure_ascii=False)
+        except OSError:
+            return
+
+        with self._lock:
+            self._writes += 1
+            run_evict = self._writes % EVICT_EVERY == 0
+        if run_evict:
+            self.evict()
+
+    def evict(self):
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if now - st.st_mtime > self.max_age or name.endswith(".tmp") and now - st.st_mtime > 60:
+                    try: os.remove(path)
+                    except OSError: pass
+                else:
+                    entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try: os.remove(os.path.join(root, name))
+                except OSError: pass
@@ -0,0 +1,83 @@
+import os
+import re
+import json
+import difflib
+import threading
+
+from atomic_io import atomic_write
+
+INDEX_DIR = os.path.join(os.getcwd(), ".cache_ia", "lucide")
+_ICON_RE = re.compile(r"default as ([a-zA-Z0-9]+)")
+
+_memory = {}
+_lock = threading.Lock()
+
+def _index_js(project_path):
+    return os.path.join(project_path, "node_modules", "lucide-react", "dist", "esm", "icons", "index.js")
+
+def _version(project_path):
+    try:
+        with open(os.path.join(project_path, "node_modules", "lucide-react", "package.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("version", "unknown")
+    except (OSError, ValueError):
+        return "unknown"
+
+def _build(index_js, version, mtime):
+    with open(index_js, "r", encoding="utf-8") as f:
+        icons = frozenset(_ICON_RE.findall(f.read()))
+
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    path = os.path.join(INDEX_DIR, f"icons-{version}.txt")
+    atomic_write(path, f"{version}\t{mtime}\n" + "\n".join(sorted(icons)))
+    return icons
+
+def _load_disk(version, mtime):
+    path = os.path.join(INDEX_DIR, f"icons-{version}.txt")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            header = f.readline().rstrip("\n")
+            if header != f"{version}\t{mtime}": return None
+            return frozenset(line for line in f.read().split("\n") if line)
+    except OSError:
+        return None
+
+def load(project_path):
+    """
+    Conjunto de ícones válidos do lucide-react instalado no projeto (None se não instalado).
+    Construído uma vez por versão/mtime do index.js, persistido em disco e mantido em memória.
+    """
+    index_js = _index_js(project_path)
+    try:
+        mtime = int(os.path.getmtime(index_js))
+    except OSError:
+        return None
+
+    with _lock:
+        cached = _memory.get(index_js)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        version = _version(project_path)
+        try:
+            icons = _load_disk(version, mtime) or _build(index_js, version, mtime)
+        except OSError:
+            return None
+        _memory[index_js] = (mtime, icons)
+        return icons
+
+def suggest(name, valid):
+    """Nome real mais próximo (ex.: 'LinkedinIcon' -> 'Linkedin'), ou None."""
+    candidates = [name]
+    for prefix in ("Lucide", "Icon"):
+        if name.startswith(prefix) and len(name) > len(prefix): candidates.append(name[len(prefix):])
+    if name.endswith("Icon") and len(name) > 4: candidates.append(name[:-4])
+
+    for candidate in candidates:
+        if candidate in valid: return candidate
+
+    lowered = {v.lower(): v for v in valid}
+    for candidate in candidates:
+        if candidate.lower() in lowered: return lowered[candidate.lower()]
+
+    match = difflib.get_close_matches(candidates[-1], valid, n=1, cutoff=0.8)
+    return match[0] if match else None
@@ -1,22 +1,20 @@
 import os
 import sys
-import re
 import time
 import subprocess
+import argparse
 import importlib.util
-import shutil 
+import config as config_loader
+import template_snapshot
+import sessions
 
 # --- TERMINAL COLORS ---
-GREEN = "\033[92m"
-RED = "\033[91m"
-YELLOW = "\033[93m"
-CYAN = "\033[96m"
-MAGENTA = "\033[95m"
-BLUE = "\033[94m"
-RESET = "\033[0m"
+from colors import GREEN, RED, YELLOW, CYAN, MAGENTA, BLUE, RESET
 
 # --- CAMINHO DO PROJETO ---
 PROJECT_PATH = os.path.join(os.getcwd(), "base-app")
+RESUME = None  # --resume [SESSION]: a primeira entrada no agente continua a sessão interrompida
+RESUME_HINT = f"👉 Continue where it stopped: {YELLOW}python main.py --resume{RESET}"
 
 def print_status(msg, status="INFO"):
     if status == "OK":
@@ -30,88 +28,18 @@ def print_status(msg, status="INFO"):
 
 def check_library(lib_name, import_name=None):
     if import_name is None: import_name = lib_name
-    spec = importlib.util.find_spec(import_name)
+    try:
+        spec = importlib.util.find_spec(import_name)
+    except ModuleNotFoundError:  # Pacote pai ausente (ex.: 'google' em google.generativeai)
+        return False
     return spec is not None
 
-def load_credentials():
-    path = 'credentials.txt'
-    if not os.path.exists(path):
-        print_status(f"File '{path}' not found!", "ERROR")
-        return None
-
-    with open(path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    config = {
-        "google_key": None,
-        "openai_key": None,
-        "supabase_url": None,
-        "supabase_key": None,
-        "model": "models/gemini-2.5-flash-lite", 
-        "local_model": None, # Adicionado para modelo local
-        "provider": "google",
-        "generic_key": None
-    }
-
-    # Busca > MODEL (Para o agente local)
-    match_local = re.search(r'>\s*MODEL\s*=?\s*["\'](.*?)["\']', content)
-    if match_local: config["local_model"] = match_local.group(1)
-
-    match_generic = re.search(r'>\s*API KEY\s*=?\s*["\'](.*?)["\']', content)
-    if match_generic: config["generic_key"] = match_generic.group(1)
-
-    match_google = re.search(r'>\s*GOOGLE API KEY\s*=?\s*["\'](.*?)["\']', content)
-    if match_google: config["google_key"] = match_google.group(1)
-
-    match_openai = re.search(r'>\s*OPENAI API KEY\s*=?\s*["\'](.*?)["\']', content)
-    if match_openai: config["openai_key"] = match_openai.group(1)
-
-    match_url = re.search(r'>\s*SUPABASE URL\s*=?\s*["\'](.*?)["\']', content)
-    if match_url: config["supabase_url"] = match_url.group(1)
-
-    match_key = re.search(r'>\s*SUPABASE KEY\s*=?\s*["\'](.*?)["\']', content)
-    if match_key: config["supabase_key"] = match_key.group(1)
-
-    match_model = re.search(r'>\s*Agent Model\s*=?\s*["\'](.*?)["\']', content)
-    if match_model: config["model"] = match_model.group(1)
-
-    return config
-
-def resolve_ai_identity(config):
-    model_lower = config["model"].lower()
-    
-    if "gpt" in model_lower or "o1-" in model_lower:
-        config["provider"] = "openai"
-    # Adicionado suporte a Groq (Llama/Mixtral)
-    elif "llama" in model_lower or "mixtral" in model_lower or "gemma" in model_lower and "groq" in config.get("generic_key", ""):
-        # Nota: Gemma pode rodar no Google ou Groq, assumindo Groq se for Llama/Mixtral
-        # ou se o usuário estiver usando um modelo específico da Groq.
-        config["provider"] = "groq"
-    elif "gemini" in model_lower:
-        config["provider"] = "google"
-    else:
-        # Fallback por chave
-        key_to_check = config["generic_key"]
-        if key_to_check:
-            if key_to_check.startswith("sk-"):
-                config["provider"] = "openai"
-            elif key_to_check.startswith("gsk_"): # Chaves Groq geralmente começam com gsk_
-                config["provider"] = "groq"
-            elif key_to_check.startswith("AIza"):
-                config["provider"] = "google"
-            else:
-                config["provider"] = "google"
-
-    # Mapeamento da chave genérica
-    if config["generic_key"]:
-        if config["provider"] == "openai":
-            config["openai_key"] = config["generic_key"]
-        elif config["provider"] == "groq":
-            config["openai_key"] = config["generic_key"] # Groq usa um cliente similar, armazenamos aqui ou em var nova
-        else:
-            config["google_key"] = config["generic_key"]
-
-    return config
+def load_credentials(overrides=None):
+    """Configuração imutável (config.load): o arquivo só é relido quando muda."""
+    loaded = config_loader.load(overrides=overrides)
+    if loaded is None:
+        print_status(f"File '{config_loader.credentials_path()}' not found!", "ERROR")
+    return loaded
 
 def validate_environment(config):
     print_status(f"Detected Provider: {config['provider'].upper()}", "INFO")
@@ -122,18 +50,12 @@ def validate_environment(config):
             print_status("Library 'google-generativeai' missing.", "ERROR")
             print(f"👉 Run: {YELLOW}pip install google-generativeai{RESET}")
             return False
-        if not config["google_key"]:
-            print_status("Google Key missing.", "ERROR")
-            return False
 
     elif config["provider"] == "openai":
         if not check_library("openai"):
             print_status("Library 'openai' missing.", "ERROR")
             print(f"👉 Run: {YELLOW}pip install openai{RESET}")
             return False
-        if not config["openai_key"]:
-            print_status("OpenAI Key missing.", "ERROR")
-            return False
             
     # Validação Groq
     elif config["provider"] == "groq":
@@ -141,67 +63,27 @@ def validate_environment(config):
             print_status("Library 'groq' missing.", "ERROR")
             print(f"👉 Run: {YELLOW}pip install groq{RESET}")
             return False
-        if not config["generic_key"] and not config["openai_key"]: # Reusa lógica de chave genérica
-            print_status("Groq Key missing.", "ERROR")
-            return False
-
-    return True
-
-def executar_reset_template():
-    src_path = os.path.join(PROJECT_PATH, "src")
-    
-    if not os.path.exists(src_path):
-        print_status("Pasta 'src' não encontrada. Criando...", "WARN")
-        os.makedirs(src_path)
-        
-    print(f"\n{YELLOW}>>> Cleaning 'src' folder...{RESET}")
-    
-    for item in os.listdir(src_path):
-        item_path = os.path.join(src_path, item)
-        if os.path.isdir(item_path):
-            try:
-                shutil.rmtree(item_path)
-                print(f"    - Deleted folder: {item}")
-            except Exception as e:
-                print(f"    - Error deleting {item}: {e}")
-        elif os.path.isfile(item_path):
-            if item not in ["App.jsx", "main.jsx", "index.css", "vite-env.d.ts"]:
-                os.remove(item_path)
-                print(f"    - Deleted file: {item}")
-
-    print(f"{YELLOW}>>> Restoring Base Template Files...{RESET}")
 
-    app_code = """export default function App() {
-  return (
-    <div className="min-h-screen flex items-center justify-center bg-gray-100">
-      <h1 className="text-2xl font-bold text-gray-500">
-        Base Template (Waiting for IA...)
-      </h1>
-    </div>
-  )
-}"""
-    with open(os.path.join(src_path, "App.jsx"), "w", encoding="utf-8") as f:
-        f.write(app_code)
+    if not config["api_key"]:
+        print_status(f"{config['provider'].capitalize()} Key missing.", "ERROR")
+        return False
 
-    css_code = """@tailwind base;
-@tailwind components;
-@tailwind utilities;"""
-    with open(os.path.join(src_path, "index.css"), "w", encoding="utf-8") as f:
-        f.write(css_code)
-
-    main_code = """import React from 'react'
-import ReactDOM from 'react-dom/client'
-import App from './App.jsx'
-import './index.css'
+    return True
 
-ReactDOM.createRoot(document.getElementById('root')).render(
-  <React.StrictMode>
-    <App />
-  </React.StrictMode>,
-)"""
-    with open(os.path.join(src_path, "main.jsx"), "w", encoding="utf-8") as f:
-        f.write(main_code)
+def take_resume_session(agent):
+    global RESUME
+    if not RESUME: return None
+    session = sessions.open_session(RESUME, agent=agent)
+    if session is None:
+        print_status(f"No {agent} session to resume in '{sessions.SESSIONS_DIR}'.", "WARN")
+    else:
+        RESUME = None
+    return session
 
+def executar_reset_template():
+    print(f"\n{YELLOW}>>> Restoring Base Template Files...{RESET}")
+    stats = template_snapshot.reset(PROJECT_PATH)
+    print(f"    - Restored: {stats['restored']} | Removed: {stats['removed']} | Unchanged: {stats['unchanged']}")
     print_status("Template Reset Successfully!", "OK")
     time.sleep(1)
 
@@ -248,25 +130,28 @@ def main():
             try:
                 import fabrica_local
                 # Passa o modelo lido para o script local
-                fabrica_local.iniciar_sistema_local(local_model_name)
+                fabrica_local.iniciar_sistema_local(local_model_name, take_resume_session("local"))
             except ImportError:
                 print_status("Error: 'fabrica_local.py' not found.", "ERROR")
                 input("\nPress ENTER to continue...")
+            except KeyboardInterrupt:
+                print_status("Interrupted. The session journal was kept.", "WARN")
+                print(RESUME_HINT)
+                sys.exit(130)
             except Exception as e:
                 print_status(f"Fatal Local Error: {e}", "ERROR")
+                print(RESUME_HINT)
                 input("\nPress ENTER to continue...")
 
         # === OPÇÃO 2: CLOUD ===
         elif choice == "2":
             print(f"\n{MAGENTA}>>> Reading Cloud Credentials...{RESET}")
-            config_raw = load_credentials()
+            config = load_credentials()
             
-            if not config_raw:
+            if not config:
                 input("\nPress ENTER to return to menu...")
                 continue
 
-            config = resolve_ai_identity(config_raw)
-
             if not validate_environment(config):
                 print("\n❌ System Check Failed.")
                 input("\nPress ENTER to return to menu...")
@@ -277,15 +162,20 @@ def main():
 
             try:
                 import fabrica
-                fabrica.iniciar_sistema(config)
+                fabrica.iniciar_sistema(config, take_resume_session("cloud"))
             except ImportError:
                 print_status("Error: 'fabrica.py' not found.", "ERROR")
                 input("\nPress ENTER to continue...")
             except AttributeError:
                 print_status("Error: Function 'iniciar_sistema' not found in fabrica.py.", "ERROR")
                 input("\nPress ENTER to continue...")
+            except KeyboardInterrupt:
+                print_status("Interrupted. The session journal was kept.", "WARN")
+                print(RESUME_HINT)
+                sys.exit(130)
             except Exception as e:
                 print_status(f"Fatal Cloud Error: {e}", "ERROR")
+                print(RESUME_HINT)
                 input("\nPress ENTER to continue...")
 
         # === OPÇÃO 3: RESET ===
@@ -303,4 +193,9 @@ def main():
             time.sleep(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="React Project Generator menu.")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="SESSION", help="Continue an interrupted session (the latest one, or an id from .sessions/)")
+    args = config_loader.add_arguments(parser).parse_args()
+    config_loader.use_args(args)
+    RESUME = args.resume
+    main()
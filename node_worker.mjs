@@ -0,0 +1,112 @@
+// Long-lived Node helper for the Python side.
+// Protocol: one JSON request per line on stdin  -> {"id", "method", "params"}
+//           one JSON response per line on stdout -> {"id", "result"} | {"id", "error"}
+import { createRequire } from 'node:module'
+import { pathToFileURL } from 'node:url'
+import path from 'node:path'
+import readline from 'node:readline'
+import { format } from 'node:util'
+
+// stdout is the protocol channel: Vite/ESLint/plugin logs go to stderr
+const toStderr = (...args) => process.stderr.write(format(...args) + '\n')
+console.log = console.info = console.warn = console.debug = toStderr
+
+const root = path.resolve(process.argv[2] || process.cwd())
+const requireFromRoot = createRequire(path.join(root, 'package.json'))
+const modules = {}
+
+// Resolves a package from the project's node_modules (falls back to vite's own dependencies).
+// `entry` forces a file inside the package, e.g. Vite's ESM build instead of its CJS shim.
+async function load(name, entry) {
+  if (modules[name]) return modules[name]
+  let resolved
+  try {
+    resolved = entry ? path.join(path.dirname(requireFromRoot.resolve(`${name}/package.json`)), entry) : requireFromRoot.resolve(name)
+  } catch {
+    const viteRequire = createRequire(requireFromRoot.resolve('vite/package.json'))
+    resolved = viteRequire.resolve(name)
+  }
+  modules[name] = await import(pathToFileURL(resolved).href)
+  return modules[name]
+}
+
+function loaderFor(filename) {
+  const ext = path.extname(filename).slice(1)
+  return ['js', 'jsx', 'ts', 'tsx', 'css', 'json'].includes(ext) ? (ext === 'js' ? 'jsx' : ext) : 'jsx'
+}
+
+let eslint = null
+async function getESLint() {
+  if (eslint) return eslint
+  const mod = await load('eslint')
+  const api = mod.loadESLint ? mod : mod.default || mod
+  const ESLintClass = api.loadESLint ? await api.loadESLint({ cwd: root }) : api.ESLint
+  eslint = new ESLintClass({ cwd: root, cache: true, cacheLocation: path.join(root, 'node_modules', '.cache', 'eslint') })
+  return eslint
+}
+
+const methods = {
+  async ping() {
+    return { root, node: process.version }
+  },
+
+  async transform({ code, filename = 'file.jsx', options = {} }) {
+    const esbuild = await load('esbuild')
+    const result = await esbuild.transform(code, { loader: loaderFor(filename), sourcefile: filename, logLevel: 'silent', ...options })
+    return { code: result.code, map: result.map, warnings: result.warnings.map((w) => w.text) }
+  },
+
+  async validate({ code, filename = 'file.jsx' }) {
+    await load('esbuild') // A missing esbuild is a worker error, not a syntax error
+    try {
+      await methods.transform({ code, filename })
+      return { ok: true, errors: [] }
+    } catch (err) {
+      const errors = (err.errors || [{ text: String(err.message || err) }]).map((e) => ({
+        text: e.text,
+        line: e.location ? e.location.line : null,
+        column: e.location ? e.location.column : null,
+      }))
+      return { ok: false, errors }
+    }
+  },
+
+  // Vite's programmatic build inside this process: Node, Vite, Rollup and esbuild stay warm between builds
+  async build({ outDir = 'dist' } = {}) {
+    const vite = await load('vite', 'dist/node/index.js')
+    const start = Date.now()
+    await vite.build({ root, logLevel: 'warn', clearScreen: false, build: { outDir } })
+    return { ok: true, outDir: path.join(root, outDir), duration: (Date.now() - start) / 1000 }
+  },
+
+  // Lints source text with the project's ESLint config (with or without a file on disk)
+  async lint({ code, filename }) {
+    const linter = await getESLint()
+    const filePath = path.resolve(root, filename)
+    const [result] = code === undefined ? await linter.lintFiles([filePath]) : await linter.lintText(code, { filePath })
+    const messages = (result ? result.messages : []).map((m) => ({
+      rule: m.ruleId, severity: m.severity, text: m.message, line: m.line, column: m.column,
+    }))
+    return { ok: !messages.some((m) => m.severity === 2), messages }
+  },
+}
+
+const rl = readline.createInterface({ input: process.stdin })
+rl.on('line', async (line) => {
+  if (!line.trim()) return
+  let request
+  try {
+    request = JSON.parse(line)
+  } catch {
+    return
+  }
+  const reply = { id: request.id }
+  try {
+    const method = methods[request.method]
+    if (!method) throw new Error(`Unknown method: ${request.method}`)
+    reply.result = await method(request.params || {})
+  } catch (err) {
+    reply.error = String((err && err.message) || err)
+  }
+  process.stdout.write(JSON.stringify(reply) + '\n')
+})
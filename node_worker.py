@@ -0,0 +1,154 @@
+import os
+import json
+import atexit
+import shutil
+import itertools
+import threading
+import subprocess
+from collections import OrderedDict
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "node_worker.mjs")
+CALL_TIMEOUT = 20
+BUILD_TIMEOUT = 300
+MAX_WORKERS = 4  # Processos Node vivos ao mesmo tempo; o menos usado é fechado para abrir espaço
+
+class NodeWorkerError(Exception):
+    pass
+
+class NodeWorker:
+    """
+    Processo Node de longa duração (node_worker.mjs) que atende chamadas JSON por stdin/stdout.
+    O Node e os módulos do projeto (esbuild, Vite, ESLint) são carregados uma vez por sessão,
+    não por arquivo ou por comando. Chamadas de várias threads são serializadas.
+    """
+
+    def __init__(self, project_path, timeout=CALL_TIMEOUT):
+        self.project_path = os.path.abspath(project_path)
+        self.timeout = timeout
+        self.process = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._missing = set()  # Métodos cujo módulo (esbuild, vite, eslint) não foi encontrado
+
+    def available(self, method=None):
+        return (method not in self._missing and shutil.which("node") is not None
+                and os.path.exists(os.path.join(self.project_path, "node_modules")))
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _start(self):
+        self.process = subprocess.Popen(["node", WORKER_SCRIPT, self.project_path], cwd=self.project_path,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        text=True, encoding="utf-8", bufsize=1)
+
+    def _read_line(self, timeout):
+        result = {}
+        reader = threading.Thread(target=lambda: result.setdefault("line", self.process.stdout.readline()), daemon=True)
+        reader.start()
+        reader.join(timeout)
+        if reader.is_alive():
+            self.close()
+            raise NodeWorkerError(f"Node worker did not answer in {timeout}s")
+        return result.get("line", "")
+
+    def call(self, method, timeout=None, **params):
+        if not self.available(method): raise NodeWorkerError(f"Node worker cannot run '{method}' here")
+        with self._lock:
+            try:
+                if not self.is_alive(): self._start()
+                request_id = next(self._ids)
+                self.process.stdin.write(json.dumps({"id": request_id, "method": method, "params": params}) + "\n")
+                self.process.stdin.flush()
+                while True:
+                    line = self._read_line(timeout or self.timeout)
+                    if not line:
+                        self.process = None
+                        raise NodeWorkerError("Node worker exited")
+                    reply = json.loads(line)
+                    if reply.get("id") == request_id: break
+            except (OSError, ValueError) as e:
+                self.close()
+                raise NodeWorkerError(str(e))
+
+        if "error" in reply:
+            if "Cannot find" in reply["error"]: self._missing.add(method)  # Módulo não resolvido: não adianta insistir
+            raise NodeWorkerError(reply["error"])
+        return reply.get("result")
+
+    def close(self):
+        if not self.is_alive():
+            self.process = None
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=2)
+        except Exception:
+            self.process.kill()
+        self.process = None
+
+    def release(self):
+        """close() vindo de fora: espera a chamada em andamento (de outra thread) terminar."""
+        with self._lock: self.close()
+
+    def disable(self, method):
+        self._missing.add(method)
+
+    def build(self, out_dir="dist"):
+        return self.call("build", timeout=BUILD_TIMEOUT, outDir=out_dir)
+
+    def transform(self, code, filename="file.jsx", **options):
+        return self.call("transform", code=code, filename=filename, options=options)
+
+    def lint(self, filename, code=None):
+        params = {"filename": filename}
+        if code is not None: params["code"] = code
+        return self.call("lint", **params)
+
+_WORKERS = OrderedDict()
+_WORKERS_LOCK = threading.Lock()
+
+def get_worker(project_path):
+    """
+    Um worker por projeto, reaproveitado durante toda a sessão. Acima de MAX_WORKERS
+    (batch/benchmark criam um workspace por ideia) o usado há mais tempo é fechado.
+    """
+    key = os.path.abspath(project_path)
+    evicted = []
+    with _WORKERS_LOCK:
+        if key not in _WORKERS: _WORKERS[key] = NodeWorker(key)
+        _WORKERS.move_to_end(key)
+        while len(_WORKERS) > MAX_WORKERS: evicted.append(_WORKERS.popitem(last=False)[1])
+        worker = _WORKERS[key]
+    for old in evicted: old.release()
+    return worker
+
+def close_worker(project_path):
+    """Fecha o worker do projeto (fim do workspace); a próxima chamada abre outro se precisar."""
+    with _WORKERS_LOCK:
+        worker = _WORKERS.pop(os.path.abspath(project_path), None)
+    if worker: worker.release()
+
+def build(project_path):
+    """
+    `vite build` no worker (caches quentes entre builds da sessão).
+    Sem Node/Vite no worker, cai no `npm run build` de sempre. Retorna (ok, erro).
+    """
+    worker = get_worker(project_path)
+    if worker.available("build"):
+        try:
+            worker.build()
+            return True, None
+        except NodeWorkerError as e:
+            # Erro do próprio build é devolvido; worker sem Vite ou que morreu cai no npm
+            if worker.available("build") and "exited" not in str(e): return False, str(e)
+    result = subprocess.run(["npm", "run", "build"], cwd=project_path, shell=os.name == "nt",
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    return result.returncode == 0, (result.stderr or "").strip()[-2000:] or None
+
+@atexit.register
+def close_all():
+    with _WORKERS_LOCK:
+        for worker in _WORKERS.values():
+            worker.close()
+        _WORKERS.clear()
@@ -0,0 +1,83 @@
+import re
+import difflib
+
+FUZZY_RATIO = 0.85
+
+PATCH_INSTRUCTIONS = """
+OUTPUT FORMAT (STRICT): Return ONLY one or more SEARCH/REPLACE blocks, nothing else:
+
+<<<<<<< SEARCH
+(exact lines copied from the current file)
+=======
+(the new lines)
+>>>>>>> REPLACE
+
+RULES:
+1. SEARCH must copy existing lines EXACTLY (same text and indentation). Keep it short: only the lines that change plus 1-2 lines of context.
+2. Use several small blocks instead of one big block. Blocks are applied in order.
+3. To add an import, SEARCH an existing import line and REPLACE it with that line plus the new one.
+4. NEVER return the whole file. NO markdown fences, NO explanations.
+"""
+
+_BLOCK_RE = re.compile(r"<{5,}\s*SEARCH\s*\n(.*?)\n?={5,}\s*\n(.*?)\n?>{5,}\s*REPLACE", re.DOTALL)
+
+class PatchError(Exception):
+    pass
+
+def parse_blocks(text):
+    return [(search, replace) for search, replace in _BLOCK_RE.findall(text or "")]
+
+def _indent(line):
+    return line[:len(line) - len(line.lstrip())]
+
+def _reindent(lines, old_indent, new_indent):
+    if old_indent == new_indent: return lines
+    out = []
+    for line in lines:
+        if line.startswith(old_indent): line = new_indent + line[len(old_indent):]
+        out.append(line)
+    return out
+
+def _find_lines(code_lines, search_lines):
+    """Âncora tolerante: primeiro ignorando espaços nas pontas, depois por similaridade."""
+    n = len(search_lines)
+    stripped = [l.strip() for l in search_lines]
+    for i in range(len(code_lines) - n + 1):
+        if [l.strip() for l in code_lines[i:i + n]] == stripped:
+            return i, n
+
+    best, best_ratio = None, FUZZY_RATIO
+    target = "\n".join(stripped)
+    for size in {n - 1, n, n + 1}:
+        if size <= 0: continue
+        for i in range(len(code_lines) - size + 1):
+            window = "\n".join(l.strip() for l in code_lines[i:i + size])
+            ratio = difflib.SequenceMatcher(None, window, target).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = (i, size), ratio
+    return best
+
+def apply_blocks(code, blocks):
+    if not blocks: raise PatchError("No SEARCH/REPLACE blocks found")
+
+    for search, replace in blocks:
+        if not search.strip():
+            raise PatchError("Empty SEARCH block")
+        if search in code:
+            code = code.replace(search, replace, 1)
+            continue
+
+        code_lines = code.split("\n")
+        search_lines = search.strip("\n").split("\n")
+        found = _find_lines(code_lines, search_lines)
+        if not found:
+            raise PatchError(f"Could not anchor block: {search_lines[0].strip()[:60]!r}")
+
+        start, size = found
+        new_lines = _reindent(replace.split("\n") if replace else [], _indent(search_lines[0]), _indent(code_lines[start]))
+        code = "\n".join(code_lines[:start] + new_lines + code_lines[start + size:])
+    return code
+
+def apply_patch(code, response):
+    """Aplica a resposta do modelo ao código atual; levanta PatchError se não der."""
+    return apply_blocks(code, parse_blocks(response))
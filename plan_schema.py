@@ -0,0 +1,170 @@
+import json
+import posixpath
+
+import dependencies
+
+# Plano do arquiteto: cada arquivo com o que exporta, quais arquivos do plano importa e os pacotes npm que usa.
+# Provedores com saída estruturada recebem o schema (json_mode=PLAN_SCHEMA); os outros só o texto de PLAN_FORMAT.
+PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "files": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "path": {"type": "string"},
+                    "exports": {"type": "array", "items": {"type": "string"}},
+                    "imports": {"type": "array", "items": {"type": "string"}},
+                    "packages": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["path", "exports", "imports", "packages"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["files"],
+    "additionalProperties": False,
+}
+
+MODIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {"files": {"type": "array", "items": {"type": "string"}}},
+    "required": ["files"],
+    "additionalProperties": False,
+}
+
+PLAN_FORMAT = """Reply with ONLY this JSON object:
+{"files": [{"path": "src/components/Header.jsx", "exports": ["Header"], "imports": [], "packages": ["lucide-react"]},
+           {"path": "src/App.jsx", "exports": ["App"], "imports": ["src/components/Header.jsx"], "packages": []}]}
+- "imports": ONLY other files of this same plan (full paths).
+- "packages": npm packages the file imports (not react / react-dom)."""
+
+MODIFICATION_FORMAT = 'Reply with ONLY this JSON object: {"files": ["src/App.jsx"]}'
+
+SOURCE_EXTENSIONS = (".jsx", ".js", ".tsx", ".ts")
+BUILTIN_PACKAGES = {"react", "react-dom"}
+
+# --- PARSER ---
+def _complete_prefix(text, start):
+    """
+    Uma passada a partir de `start`: devolve o primeiro valor JSON completo, ou — se a resposta
+    foi cortada (stream interrompido, limite de tokens) — o trecho até o último valor inteiro
+    com os colchetes/chaves ainda abertos fechados.
+    """
+    stack, in_string, escape = [], False, False
+    cut, cut_stack = None, None
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape: escape = False
+            elif ch == "\\": escape = True
+            elif ch == '"': in_string = False
+            continue
+        if ch == '"': in_string = True
+        elif ch in "{[": stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack: stack.pop()
+            if not stack: return text[start:i + 1]
+            cut, cut_stack = i + 1, list(stack)
+        elif ch == "," and stack:
+            cut, cut_stack = i, list(stack)
+    if cut is None: return None
+    return text[start:cut] + "".join(reversed(cut_stack))
+
+def parse_json(text):
+    """JSON da resposta do modelo, tolerando cercas markdown, texto antes/depois e truncamento. None se não houver."""
+    if not text: return None
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts: return None
+    candidate = _complete_prefix(text, min(starts))
+    try:
+        return json.loads(candidate) if candidate else None
+    except ValueError:
+        return None
+
+# --- PLANO ---
+def normalize_path(path):
+    path = posixpath.normpath(str(path).strip().strip("'\"").replace("\\", "/")).lstrip("/")
+    if not path.startswith("src/"): path = f"src/{path}"
+    return path
+
+class Plan:
+    """Arquivos na ordem do arquiteto + exports, imports (só arquivos do plano) e pacotes npm de cada um."""
+
+    def __init__(self, files, exports=None, imports=None, packages=None):
+        self.files = list(files)
+        self.exports = exports or {}
+        self.imports = imports or {}
+        self.packages = packages or {}
+
+    def deps(self):
+        """Para scheduler.build_dependency_graph(explicit_deps=...). Plano sem nenhum import: None (vale a heurística de camadas)."""
+        if not any(self.imports.values()): return None
+        return {f: self.imports[f] for f in self.files if f in self.imports}
+
+    def all_packages(self):
+        return sorted({p for f in self.files for p in self.packages.get(f, [])})
+
+    def to_dict(self):
+        return {"files": [{"path": f, "exports": self.exports.get(f, []), "imports": self.imports.get(f, []),
+                           "packages": self.packages.get(f, [])} for f in self.files]}
+
+    @classmethod
+    def from_dict(cls, data, forbidden=()):
+        return build_plan(data, forbidden)
+
+def _resolve_import(spec, files, importer):
+    """'./components/Header', 'Header.jsx' ou o caminho completo -> arquivo do plano (ou None)."""
+    spec = str(spec).strip()
+    if spec.startswith("."):
+        spec = posixpath.normpath(posixpath.join(posixpath.dirname(importer), spec))
+    candidate = normalize_path(spec)
+    stem = posixpath.splitext(candidate)[0]
+    for f in files:
+        if f == candidate or posixpath.splitext(f)[0] == stem: return f
+    name = posixpath.splitext(posixpath.basename(candidate))[0]
+    matches = [f for f in files if posixpath.splitext(posixpath.basename(f))[0] == name]
+    return matches[0] if len(matches) == 1 else None
+
+def build_plan(data, forbidden=()):
+    """
+    Aceita o schema completo, {"files": ["..."]} ou um array simples (modelos sem saída estruturada).
+    Caminhos normalizados para src/, proibidos removidos, src/App.jsx sempre presente. None se não houver arquivos.
+    """
+    items = data.get("files") if isinstance(data, dict) else data
+    if not isinstance(items, list): return None
+
+    entries = {}
+    for item in items:
+        raw = item.get("path") if isinstance(item, dict) else item
+        if not isinstance(raw, str) or not raw.strip(): continue
+        path = normalize_path(raw)
+        if path in forbidden or not path.endswith(SOURCE_EXTENSIONS) or path in entries: continue
+        entries[path] = item if isinstance(item, dict) else {}
+
+    if not entries: return None
+    if "src/App.jsx" not in entries: entries["src/App.jsx"] = {}
+
+    files = list(entries)
+    plan = Plan(files)
+    for path, item in entries.items():
+        plan.exports[path] = [str(e) for e in item.get("exports") or [] if e]
+        if "imports" in item:
+            resolved = (_resolve_import(spec, files, path) for spec in item.get("imports") or [])
+            plan.imports[path] = list(dict.fromkeys(f for f in resolved if f and f != path))
+        packages = (dependencies.root_package(str(p).strip()) for p in item.get("packages") or [] if str(p).strip())
+        plan.packages[path] = sorted({p for p in packages if p not in BUILTIN_PACKAGES and p not in dependencies.IGNORED})
+    return plan
+
+def parse_plan(text, forbidden=()):
+    data = parse_json(text)
+    return build_plan(data, forbidden) if data is not None else None
+
+def parse_file_list(text):
+    """Resposta do planejador de modificações -> [caminhos] ou None."""
+    data = parse_json(text)
+    items = data.get("files") if isinstance(data, dict) else data
+    if not isinstance(items, list): return None
+    files = [normalize_path(f) for f in items if isinstance(f, str) and f.strip()]
+    return list(dict.fromkeys(files)) or None
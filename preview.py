@@ -0,0 +1,103 @@
+import os
+import re
+import time
+import atexit
+import signal
+import socket
+import threading
+import subprocess
+from collections import deque
+
+DEFAULT_PORT = 5173
+READY_TIMEOUT = 30
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+_URL_RE = re.compile(r"Local:\s+(https?://[^\s/]+(?::\d+)?/?\S*)")
+
+class PreviewServer:
+    """
+    Servidor de preview do Vite iniciado uma vez por projeto e mantido vivo entre as edições.
+    Arquivos alterados chegam ao navegador pelo HMR do Vite, sem reiniciar nada.
+    A prontidão vem do log ("Local: http://...") e da porta aceitando conexão.
+    O Vite roda num grupo de processos próprio (o stop() derruba o npm e os filhos juntos), então o
+    Ctrl-C do terminal não chega até ele: quem para é o stop(), também chamado na saída do Python.
+    """
+
+    def __init__(self, project_path, port=DEFAULT_PORT, open_browser=True):
+        self.project_path = project_path
+        self.port = port
+        self.open_browser = open_browser
+        self.url = f"http://localhost:{port}"
+        self.process = None
+        self.log = deque(maxlen=200)
+        self._ready = threading.Event()
+        self._opened = False
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.is_alive(): return False
+
+        cmd = ["npm", "run", "dev", "--", "--port", str(self.port)]
+        if self.open_browser and not self._opened:
+            cmd.append("--open")
+            self._opened = True
+
+        self._ready.clear()
+        self.log.clear()
+        extra = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt" else {"start_new_session": True}
+        self.process = subprocess.Popen(cmd, cwd=self.project_path, shell=os.name == "nt",
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                        text=True, encoding="utf-8", errors="replace", **extra)
+        threading.Thread(target=self._read_output, args=(self.process,), daemon=True).start()
+        _RUNNING.add(self)
+        return True
+
+    def _read_output(self, process):
+        for line in process.stdout:
+            line = _ANSI_RE.sub("", line).rstrip()
+            self.log.append(line)
+            match = _URL_RE.search(line)
+            if match:
+                # O Vite pode ter escolhido outra porta se a padrão estava ocupada
+                self.url = match.group(1).rstrip("/")
+                port = re.search(r":(\d+)", self.url.split("//", 1)[-1])
+                if port: self.port = int(port.group(1))
+                self._ready.set()
+
+    def _port_open(self):
+        try:
+            with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                return True
+        except OSError:
+            return False
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if not self.is_alive(): return False
+            if self._ready.wait(0.1) and self._port_open(): return True
+        return False
+
+    def stop(self):
+        _RUNNING.discard(self)
+        if not self.is_alive():
+            self.process = None
+            return
+        try:
+            if os.name == "nt":
+                subprocess.run(f"taskkill /F /T /PID {self.process.pid}", shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            else:
+                os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=5)
+        except Exception:
+            pass
+        self.process = None
+
+_RUNNING = set()
+
+@atexit.register
+def stop_all():
+    """Saída do interpretador (Ctrl-C, sys.exit, erro): nenhum Vite fica órfão segurando a porta."""
+    for server in list(_RUNNING): server.stop()
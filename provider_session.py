@@ -0,0 +1,98 @@
+import json
+import threading
+from collections import OrderedDict
+
+MAX_CACHED_MODELS = 64
+
+class ProviderSession:
+    """
+    Guarda os clientes dos provedores durante toda a sessão (conexões keep-alive reaproveitadas),
+    assíncronos (usados pelo loop do llm_backend), mais o cliente síncrono do Ollama para consultar modelos,
+    e os GenerativeModel do Gemini por (modelo, system_instruction, generation_config).
+    A disponibilidade de um modelo do Ollama é verificada uma única vez por sessão.
+    """
+
+    def __init__(self, provider, api_key=None, ollama_host=None):
+        self.provider = provider
+        self.api_key = api_key
+        self.ollama_host = ollama_host
+        self._lock = threading.Lock()
+        self._ollama = None
+        self._groq_async = None
+        self._openai_async = None
+        self._ollama_async = None
+        self._gemini_configured = False
+        self._gemini_models = OrderedDict()
+        self._ollama_models = {}
+
+    # --- GROQ ---
+    def groq_async_client(self):
+        with self._lock:
+            if self._groq_async is None:
+                from groq import AsyncGroq
+                self._groq_async = AsyncGroq(api_key=self.api_key, max_retries=0)  # Retries ficam no llm_backend
+            return self._groq_async
+
+    # --- OPENAI ---
+    def openai_async_client(self):
+        with self._lock:
+            if self._openai_async is None:
+                from openai import AsyncOpenAI
+                self._openai_async = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+            return self._openai_async
+
+    # --- GOOGLE GEMINI ---
+    def gemini_model(self, model_name, system_instruction, generation_config):
+        import google.generativeai as genai
+
+        key = (model_name, system_instruction, json.dumps(generation_config, sort_keys=True))
+        with self._lock:
+            if not self._gemini_configured:
+                genai.configure(api_key=self.api_key)
+                self._gemini_configured = True
+
+            model = self._gemini_models.get(key)
+            if model is not None:
+                self._gemini_models.move_to_end(key)
+                return model
+
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=generation_config,
+                system_instruction=system_instruction
+            )
+            self._gemini_models[key] = model
+            if len(self._gemini_models) > MAX_CACHED_MODELS:
+                self._gemini_models.popitem(last=False)
+            return model
+
+    # --- OLLAMA ---
+    def ollama_client(self):
+        with self._lock:
+            if self._ollama is None:
+                import ollama
+                self._ollama = ollama.Client(host=self.ollama_host) if self.ollama_host else ollama.Client()
+            return self._ollama
+
+    def ollama_async_client(self):
+        with self._lock:
+            if self._ollama_async is None:
+                import ollama
+                self._ollama_async = ollama.AsyncClient(host=self.ollama_host) if self.ollama_host else ollama.AsyncClient()
+            return self._ollama_async
+
+    def resolve_ollama_model(self, preferred, fallback):
+        """Retorna o modelo preferido se ele existir no Ollama, senão o fallback (checado uma vez)."""
+        with self._lock:
+            if preferred in self._ollama_models:
+                return self._ollama_models[preferred]
+
+        try:
+            self.ollama_client().show(preferred)
+            resolved = preferred
+        except Exception:
+            resolved = fallback
+
+        with self._lock:
+            self._ollama_models[preferred] = resolved
+        return resolved
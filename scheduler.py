@@ -0,0 +1,87 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+MAX_WORKERS = 4
+
+# Camadas do plano: quanto menor, mais "folha" o arquivo é.
+# Um arquivo espera todos os arquivos planejados de camadas menores.
+LAYERS = {
+    "lib": 0, "utils": 0, "hooks": 0, "context": 0, "data": 0, "services": 0,
+    "components": 1,
+    "pages": 2, "sections": 2, "layouts": 2,
+}
+APP_LAYER = 3
+
+def file_layer(path):
+    clean = path.replace("\\", "/")
+    if os.path.basename(clean) in ("App.jsx", "App.tsx"):
+        return APP_LAYER
+    parts = clean.split("/")
+    if len(parts) > 2 and parts[0] == "src":
+        return LAYERS.get(parts[1], 1)
+    return 1
+
+def build_dependency_graph(files, explicit_deps=None):
+    """
+    Retorna {arquivo: [dependências]} usando só arquivos do próprio plano.
+    Se o plano já traz os imports (explicit_deps), eles têm prioridade sobre a heurística de camadas.
+    """
+    graph = {}
+    for f in files:
+        if explicit_deps and f in explicit_deps:
+            deps = [d for d in explicit_deps[f] if d in files and d != f]
+        else:
+            deps = [d for d in files if d != f and file_layer(d) < file_layer(f)]
+        graph[f] = deps
+    return graph
+
+def topological_order(files, graph):
+    """Ordem estável: respeita dependências e, no empate, a ordem do plano."""
+    order, done = [], set()
+    pending = list(files)
+    while pending:
+        ready = [f for f in pending if all(d in done for d in graph.get(f, []))]
+        if not ready:
+            # Ciclo no plano: libera o primeiro pendente para não travar
+            ready = [pending[0]]
+        for f in ready:
+            order.append(f)
+            done.add(f)
+            pending.remove(f)
+    return order
+
+def run_graph(files, task, graph=None, max_workers=MAX_WORKERS, on_done=None):
+    """
+    Executa task(arquivo, resultados_das_dependencias) em paralelo, respeitando o grafo.
+    on_done(indice, arquivo, resultado) é chamado na ordem topológica, nunca fora dela,
+    para que o progresso no terminal continue ordenado.
+    Retorna {arquivo: resultado}.
+    """
+    files = list(dict.fromkeys(files))
+    if graph is None:
+        graph = build_dependency_graph(files)
+    order = topological_order(files, graph)
+    position = {f: i for i, f in enumerate(order)}
+    # Só vale dependência para trás na ordem (evita deadlock se o plano tiver ciclo)
+    deps = {f: [d for d in graph.get(f, []) if position.get(d, len(order)) < position[f]] for f in order}
+
+    results = {}
+    running = {}
+    emitted = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while len(results) < len(order):
+            for f in order:
+                if f in results or f in running.values(): continue
+                if all(d in results for d in deps[f]):
+                    running[pool.submit(task, f, {d: results[d] for d in deps[f]})] = f
+
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                results[running.pop(fut)] = fut.result()
+
+            while emitted < len(order) and order[emitted] in results:
+                if on_done: on_done(emitted, order[emitted], results[order[emitted]])
+                emitted += 1
+
+    return results
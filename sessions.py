@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import glob
+import threading
+
+import plan_schema
+
+SESSIONS_DIR = os.path.join(os.getcwd(), ".sessions")
+# Diários antigos gravavam o texto de erro do builder como se fosse o arquivo
+_LEGACY_STUBS = ("// CRITICAL ERROR", "// ERROR: Failed to generate code.")
+
+def new_state():
+    return {"id": None, "prompt": None, "project_path": None, "agent": None, "model": None,
+            "files": [], "plan": None, "outputs": {}, "failed": {}, "stages": [], "modifications": [], "updated_at": None}
+
+def replay(path):
+    """
+    Reconstrói o estado a partir do diário. Uma última linha cortada (processo morto no meio
+    da escrita) é ignorada; o código de cada arquivo é o do último evento 'file'.
+    Arquivo cujo último evento é 'failed' fica fora de outputs: o resume gera de novo.
+    """
+    state = new_state()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            kind = event.get("type")
+            if kind == "start":
+                for key in ("id", "prompt", "project_path", "agent", "model"): state[key] = event.get(key)
+            elif kind == "plan":
+                state["files"] = list(event.get("files") or [])
+                state["plan"] = event.get("plan")
+            elif kind == "file":
+                if event["code"].lstrip().startswith(_LEGACY_STUBS):
+                    state["outputs"].pop(event["path"], None)
+                    state["failed"][event["path"]] = event["code"].strip()
+                else:
+                    state["outputs"][event["path"]] = event["code"]
+                    state["failed"].pop(event["path"], None)
+            elif kind == "failed":
+                state["outputs"].pop(event["path"], None)
+                state["failed"][event["path"]] = event.get("error")
+            elif kind == "stage":
+                if event.get("name") not in state["stages"]: state["stages"].append(event.get("name"))
+            elif kind == "modify":
+                state["modifications"].append(event.get("request"))
+            state["updated_at"] = event.get("ts", state["updated_at"])
+    return state
+
+def _ends_mid_line(path):
+    try:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    except OSError:
+        return False
+
+class Session:
+    """
+    Diário append-only de uma geração: uma linha JSON por evento (start, plan, file, failed, stage, modify),
+    gravada e enviada ao disco assim que acontece. Se o processo morrer (erro do provedor, Ctrl-C),
+    `--resume` refaz o estado com replay() e só chama o modelo para os arquivos que faltam.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = replay(path) if os.path.exists(path) else new_state()
+        self._torn = _ends_mid_line(path)  # A próxima linha não pode colar no pedaço cortado
+
+    @classmethod
+    def create(cls, prompt, project_path, agent, model=None, directory=SESSIONS_DIR):
+        os.makedirs(directory, exist_ok=True)
+        session_id = time.strftime("%Y%m%d-%H%M%S-") + str(os.getpid())
+        session = cls(os.path.join(directory, f"{session_id}.jsonl"))
+        header = {"id": session_id, "prompt": prompt, "project_path": os.path.abspath(project_path), "agent": agent, "model": model}
+        session.state.update(header)
+        session.append("start", **header)
+        return session
+
+    def append(self, kind, **data):
+        line = json.dumps(dict(type=kind, ts=time.time(), **data), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._torn: line, self._torn = "\n" + line, False
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    # --- EVENTOS ---
+    def record_plan(self, plan):
+        """`plan`: plan_schema.Plan; exports, imports e pacotes vão junto para o resume não perder o grafo."""
+        self.state["files"], self.state["plan"] = list(plan.files), plan.to_dict()
+        self.append("plan", files=list(plan.files), plan=plan.to_dict())
+
+    def record_file(self, path, code):
+        """Só código gerado com sucesso; falhas vão por record_failure."""
+        with self._lock:
+            self.state["outputs"][path] = code
+            self.state["failed"].pop(path, None)
+        self.append("file", path=path, code=code)
+
+    def record_failure(self, path, error):
+        with self._lock:
+            self.state["outputs"].pop(path, None)
+            self.state["failed"][path] = str(error)
+        self.append("failed", path=path, error=str(error))
+
+    def record_stage(self, name, **data):
+        if name not in self.state["stages"]: self.state["stages"].append(name)
+        self.append("stage", name=name, **data)
+
+    def record_modification(self, request, files):
+        self.state["modifications"].append(request)
+        self.append("modify", request=request, files=list(files))
+
+    # --- ESTADO ---
+    @property
+    def id(self): return self.state["id"]
+
+    @property
+    def prompt(self): return self.state["prompt"]
+
+    @property
+    def files(self): return self.state["files"]
+
+    @property
+    def outputs(self): return self.state["outputs"]
+
+    def plan(self):
+        """O plano do diário (diários antigos só têm a lista de arquivos)."""
+        return plan_schema.Plan.from_dict(self.state["plan"]) if self.state["plan"] else plan_schema.Plan(self.files)
+
+    def all_files(self):
+        """Plano + arquivos criados em modificações (inclusive os que falharam), sem repetir."""
+        return list(dict.fromkeys(self.files + list(self.outputs) + list(self.failed)))
+
+    @property
+    def failed(self): return self.state["failed"]
+
+    def has_stage(self, name):
+        return name in self.state["stages"]
+
+    def progress(self):
+        return len([f for f in self.files if f in self.outputs]), len(self.files)
+
+def list_sessions(directory=SESSIONS_DIR, agent=None):
+    """Sessions do mais recente para o mais antigo (cada diário só é lido quando chega a vez dele)."""
+    for path in sorted(glob.glob(os.path.join(directory, "*.jsonl")), key=os.path.getmtime, reverse=True):
+        session = Session(path)
+        if session.prompt and (agent is None or session.state["agent"] == agent): yield session
+
+def open_session(reference="latest", agent=None, directory=SESSIONS_DIR):
+    """'latest' (a mais recente deste agente), um id ou o caminho de um .jsonl. None se não achar."""
+    if reference in (None, "latest"):
+        return next(list_sessions(directory, agent), None)
+    path = reference if reference.endswith(".jsonl") else os.path.join(directory, f"{reference}.jsonl")
+    return Session(path) if os.path.exists(path) else None
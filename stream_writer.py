@@ -0,0 +1,191 @@
+import os
+import re
+import queue
+import threading
+
+STALL_TIMEOUT = 30  # segundos sem nenhum token = stream travado
+
+class IncompleteStreamError(Exception):
+    pass
+
+class FenceStripper:
+    """Remove as linhas de markdown (```jsx ... ```) enquanto os tokens chegam."""
+
+    def __init__(self):
+        self._partial = ""
+
+    def feed(self, chunk):
+        self._partial += chunk
+        if "\n" not in self._partial:
+            return ""
+        lines, self._partial = self._partial.rsplit("\n", 1)
+        return "".join(l + "\n" for l in lines.split("\n") if not l.strip().startswith("```"))
+
+    def flush(self):
+        rest, self._partial = self._partial, ""
+        return "" if rest.strip().startswith("```") else rest
+
+_JSX_PRECEDERS = set("(,=?:[{&|!;>")
+_JSX_KEYWORD_RE = re.compile(r"\b(?:return|default|yield)$")
+
+def _jsx_can_start(code, i):
+    """`<` abre uma tag JSX só em posição de expressão: `a < b` e `Array<T>` vêm depois de um valor."""
+    nxt = code[i + 1] if i + 1 < len(code) else ""
+    if not (nxt.isalpha() or nxt == ">"): return False
+    j = i - 1
+    while j >= 0 and code[j].isspace(): j -= 1
+    if j < 0 or code[j] in _JSX_PRECEDERS: return True
+    return bool(_JSX_KEYWORD_RE.search(code, 0, j + 1))
+
+def _skip_string(code, i, quote, stop_at_newline):
+    """Índice da aspa que fecha a string aberta em code[i], ou len(code) se não fechar."""
+    i += 1
+    while i < len(code) and code[i] != quote:
+        if code[i] == "\\": i += 1
+        elif code[i] == "\n" and stop_at_newline: return i
+        i += 1
+    return i
+
+def is_complete(code):
+    """
+    Checagem rápida de sintaxe: (), {} e [] balanceados e tags JSX fechadas, ignorando strings e comentários.
+    Texto JSX (entre `>` e `<`) é literal: um apóstrofo ou `//` nele não abre string nem comentário.
+    """
+    if not code.strip(): return False
+    pairs = {")": "(", "]": "["}
+    # Topo da pilha define o modo: "<tag"/"</tag" dentro de uma tag, "<el" no texto entre tags, o resto é código
+    stack = []
+    i, n = 0, len(code)
+    while i < n:
+        c = code[i]
+        nxt = code[i + 1] if i + 1 < n else ""
+        top = stack[-1] if stack else None
+        if top in ("<tag", "</tag"):
+            if c in "'\"":
+                i = _skip_string(code, i, c, stop_at_newline=False)
+                if i >= n: return False
+            elif c == "{":
+                stack.append("{")
+            elif c == "/" and nxt == ">":
+                stack.pop()
+                i += 1
+            elif c == ">":
+                stack.pop()
+                if top == "</tag":
+                    if not stack or stack.pop() != "<el": return False
+                else:
+                    stack.append("<el")
+        elif top == "<el":
+            if c == "{":
+                stack.append("{")
+            elif c == "<" and nxt == "/":
+                stack.append("</tag")
+                i += 1
+            elif c == "<":
+                stack.append("<tag")
+        elif c == "/" and nxt == "/":
+            i = code.find("\n", i)
+            if i == -1: break
+        elif c == "/" and nxt == "*":
+            i = code.find("*/", i + 2)
+            if i == -1: return False
+            i += 1
+        elif c in "'\"`":
+            # ' e " não atravessam linha em JS; se não fecharem, a linha seguinte volta a ser código
+            i = _skip_string(code, i, c, stop_at_newline=c != "`")
+            if i >= n and c == "`": return False
+        elif c == "<" and _jsx_can_start(code, i):
+            stack.append("<tag")
+            if nxt == ">":  # Fragment <>
+                stack[-1] = "<el"
+                i += 1
+        elif c in "({[":
+            stack.append(c)
+        elif c == "}":
+            if not stack or stack.pop() != "{": return False
+        elif c in ")]":
+            if not stack or stack.pop() != pairs[c]: return False
+        i += 1
+    return not stack
+
+def iterate_with_timeout(iterable, stall_timeout=STALL_TIMEOUT):
+    """Consome o stream numa thread e aborta se ficar mais de stall_timeout segundos sem chunk."""
+    q = queue.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for item in iterable:
+                q.put(item)
+            q.put(done)
+        except Exception as e:
+            q.put(e)
+
+    threading.Thread(target=pump, daemon=True).start()
+    while True:
+        try:
+            item = q.get(timeout=stall_timeout)
+        except queue.Empty:
+            raise IncompleteStreamError(f"Stream stalled for {stall_timeout}s")
+        if item is done: return
+        if isinstance(item, Exception): raise item
+        yield item
+
+class StreamingFileWriter:
+    """
+    Grava os tokens num arquivo temporário ao lado do destino e só troca pelo arquivo final
+    (os.replace, atômico) quando o conteúdo estiver sintaticamente completo.
+    """
+
+    def __init__(self, final_path, transform=None):
+        self.final_path = final_path
+        self.transform = transform
+        folder = os.path.dirname(final_path)
+        if folder and not os.path.exists(folder): os.makedirs(folder, exist_ok=True)
+        self.tmp_path = os.path.join(folder, f".{os.path.basename(final_path)}.streaming")
+        self._file = open(self.tmp_path, "w", encoding="utf-8")
+        self._stripper = FenceStripper()
+
+    def write(self, chunk):
+        text = self._stripper.feed(chunk)
+        if text:
+            self._file.write(text)
+            self._file.flush()
+
+    def finish(self):
+        self._file.write(self._stripper.flush())
+        self._file.close()
+        with open(self.tmp_path, "r", encoding="utf-8") as f:
+            code = f.read().strip()
+
+        if not is_complete(code):
+            self.abort()
+            raise IncompleteStreamError("Truncated or malformed output")
+
+        if self.transform:
+            try:
+                code = self.transform(code)
+            except BaseException:
+                self.abort()
+                raise
+        with open(self.tmp_path, "w", encoding="utf-8") as f:
+            f.write(code)
+        os.replace(self.tmp_path, self.final_path)
+        return code
+
+    def abort(self):
+        try:
+            if not self._file.closed: self._file.close()
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+def stream_to_file(chunks, final_path, transform=None, stall_timeout=STALL_TIMEOUT):
+    writer = StreamingFileWriter(final_path, transform)
+    try:
+        for chunk in iterate_with_timeout(chunks, stall_timeout):
+            if chunk: writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
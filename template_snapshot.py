@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from atomic_io import atomic_write, atomic_write_json
+
+SNAPSHOT_DIR = os.path.join(os.getcwd(), ".cache_ia", "template")
+SNAPSHOT_FOLDERS = ("src",)   # Só o que os agentes geram; package.json/configs ficam com o npm
+TRASH_DIR = ".trash"          # Dentro do projeto: mesmo disco, então mover é só um rename
+
+# Template original do base-app (o mesmo conteúdo versionado em base-app/src)
+DEFAULT_FILES = {
+    "src/App.jsx": """export default function App() {
+  return (
+    <div className="min-h-screen flex items-center justify-center bg-gray-100">
+      <h1 className="text-2xl font-bold text-gray-500">
+        Base Template (Waiting for IA...)
+      </h1>
+    </div>
+  )
+}""",
+    "src/index.css": """@tailwind base;
+@tailwind components;
+@tailwind utilities;""",
+    "src/main.jsx": """import React from 'react'
+import ReactDOM from 'react-dom/client'
+import App from './App.jsx'
+import './index.css'
+
+ReactDOM.createRoot(document.getElementById('root')).render(
+  <React.StrictMode>
+    <App />
+  </React.StrictMode>,
+)""",
+}
+
+def _sha(content):
+    return hashlib.sha256(content).hexdigest()
+
+def _rel(root, path):
+    return os.path.relpath(path, root).replace("\\", "/")
+
+class TemplateSnapshot:
+    """
+    Estado original do template guardado uma vez: manifesto {caminho: sha256} + objetos por hash.
+    O reset compara o projeto com o manifesto numa passada só e mexe apenas no que mudou:
+      - arquivo/pasta que não é do template: rename para .trash/ (apagado numa thread);
+      - arquivo alterado ou faltando: reescrito a partir do objeto.
+    Arquivos cujo (mtime, tamanho) bate com o último reset nem são lidos.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, folders=SNAPSHOT_FOLDERS):
+        self.directory = directory
+        self.folders = folders
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    # --- MANIFESTO E OBJETOS ---
+    def _path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def _load_json(self, name):
+        try:
+            with open(self._path(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_json(self, name, data):
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write_json(self._path(name), data, indent=2)
+
+    def _store(self, content):
+        digest = _sha(content)
+        path = self._path("objects", digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+        return digest
+
+    def _object(self, digest):
+        with open(self._path("objects", digest), "rb") as f:
+            return f.read()
+
+    def _write_manifest(self, files):
+        manifest = {"files": {}, "captured_at": time.time()}
+        for rel, content in files.items():
+            manifest["files"][rel] = {"sha": self._store(content), "size": len(content)}
+        self._save_json("manifest.json", manifest)
+        self._manifest = manifest
+        return manifest
+
+    def manifest(self):
+        """Carrega o manifesto; na primeira vez grava o template padrão (DEFAULT_FILES)."""
+        with self._lock:
+            if self._manifest is None:
+                manifest = self._load_json("manifest.json")
+                valid = manifest.get("files") and all(os.path.exists(self._path("objects", f["sha"])) for f in manifest["files"].values())
+                self._manifest = manifest if valid else self._write_manifest({rel: text.encode("utf-8") for rel, text in DEFAULT_FILES.items()})
+            return self._manifest
+
+    def capture(self, project_path):
+        """Usa o estado atual do projeto como template (depois de editar o base-app de propósito)."""
+        files = {}
+        for folder in self.folders:
+            for current, dirs, names in os.walk(os.path.join(project_path, folder)):
+                dirs[:] = [d for d in dirs if not d.startswith(".")]
+                for name in names:
+                    with open(os.path.join(current, name), "rb") as f:
+                        files[_rel(project_path, os.path.join(current, name))] = f.read()
+        with self._lock:
+            return self._write_manifest(files)
+
+    # --- RESET ---
+    def _trash(self, project_path, path, moved):
+        trash = os.path.join(project_path, TRASH_DIR, f"{time.time_ns()}-{len(moved)}")
+        try:
+            os.makedirs(os.path.dirname(trash), exist_ok=True)
+            os.rename(path, trash)
+            moved.append(trash)
+        except OSError:
+            # Outro disco ou arquivo travado (Windows): apaga na hora
+            if os.path.isdir(path): shutil.rmtree(path, ignore_errors=True)
+            else:
+                try: os.remove(path)
+                except OSError: pass
+
+    def restore(self, project_path):
+        """Deixa as pastas do template idênticas ao manifesto. Retorna {'restored', 'removed', 'unchanged'}."""
+        files = self.manifest()["files"]
+        folders = {posix for rel in files for posix in self._parents(rel)}
+        stamps_all = self._load_json("stamps.json")
+        key = os.path.abspath(project_path)
+        stamps = stamps_all.get(key, {})
+        stats = {"restored": 0, "removed": 0, "unchanged": 0}
+        moved, seen = [], set()
+
+        for folder in self.folders:
+            root = os.path.join(project_path, folder)
+            os.makedirs(root, exist_ok=True)
+            for current, dirs, names in os.walk(root):
+                for name in list(dirs):
+                    path = os.path.join(current, name)
+                    if _rel(project_path, path) not in folders:
+                        self._trash(project_path, path, moved)   # Pasta inteira num rename só
+                        dirs.remove(name)
+                        stats["removed"] += 1
+                for name in names:
+                    path = os.path.join(current, name)
+                    rel = _rel(project_path, path)
+                    entry = files.get(rel)
+                    if entry is None:
+                        self._trash(project_path, path, moved)
+                        stats["removed"] += 1
+                        continue
+                    seen.add(rel)
+                    if self._matches(path, entry, stamps.get(rel)): stats["unchanged"] += 1
+                    else:
+                        self._write(path, entry)
+                        stats["restored"] += 1
+
+        for rel, entry in files.items():
+            if rel not in seen:
+                self._write(os.path.join(project_path, rel), entry)
+                stats["restored"] += 1
+
+        stamps_all[key] = {rel: self._stamp(os.path.join(project_path, rel)) for rel in files}
+        self._save_json("stamps.json", stamps_all)
+        purge_async([os.path.join(project_path, TRASH_DIR)] if moved or os.path.isdir(os.path.join(project_path, TRASH_DIR)) else [])
+        return stats
+
+    def checkout(self, project_path):
+        """Escreve o template numa pasta nova (workspaces do batch/benchmark): sem comparar nem gravar stamps."""
+        for rel, entry in self.manifest()["files"].items():
+            self._write(os.path.join(project_path, rel), entry)
+
+    @staticmethod
+    def _parents(rel):
+        parts = rel.split("/")[:-1]
+        return ["/".join(parts[:i]) for i in range(2, len(parts) + 1)]
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+            return [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            return None
+
+    def _matches(self, path, entry, stamp):
+        current = self._stamp(path)
+        if current is None or current[1] != entry["size"]: return False
+        if stamp and current == stamp: return True  # Intocado desde o último reset
+        with open(path, "rb") as f:
+            return _sha(f.read()) == entry["sha"]
+
+    def _write(self, path, entry):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, self._object(entry["sha"]))
+
+def purge_async(paths):
+    """Apaga as lixeiras numa thread daemon; o que sobrar (processo encerrado no meio) sai no próximo reset."""
+    if not paths: return None
+    thread = threading.Thread(target=lambda: [shutil.rmtree(p, ignore_errors=True) for p in paths], name="template-trash", daemon=True)
+    thread.start()
+    return thread
+
+_SNAPSHOT = None
+
+def get_snapshot():
+    global _SNAPSHOT
+    if _SNAPSHOT is None: _SNAPSHOT = TemplateSnapshot()
+    return _SNAPSHOT
+
+def reset(project_path):
+    return get_snapshot().restore(project_path)
+
+if __name__ == "__main__":
+    # python template_snapshot.py --capture [base-app]: grava o estado atual como o novo template
+    if "--capture" in sys.argv:
+        args = [a for a in sys.argv[1:] if a != "--capture"]
+        manifest = get_snapshot().capture(args[0] if args else os.path.join(os.getcwd(), "base-app"))
+        print(f"Captured {len(manifest['files'])} files into {SNAPSHOT_DIR}")
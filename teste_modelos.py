@@ -1,6 +1,7 @@
 import os
 import sys
-import re
+
+import config as config_loader
 
 try:
     import google.generativeai as genai
@@ -15,39 +16,15 @@ except ImportError:
     LIB_OPENAI = False
 
 # --- TERMINAL COLORS ---
-GREEN = "\033[92m"
-CYAN = "\033[96m"
-YELLOW = "\033[93m"
-RED = "\033[91m"
-RESET = "\033[0m"
+from colors import GREEN, CYAN, YELLOW, RED, RESET
 
 def load_keys():
-    """Reads keys from credentials.txt"""
-    keys = {"google": None, "openai": None}
-    
-    try:
-        with open('credentials.txt', 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-            match_google = re.search(r'>\s*GOOGLE API KEY\s*=?\s*["\'](.*?)["\']', content)
-            if match_google: keys["google"] = match_google.group(1)
-
-            match_openai = re.search(r'>\s*OPENAI API KEY\s*=?\s*["\'](.*?)["\']', content)
-            if match_openai: keys["openai"] = match_openai.group(1)
-
-            match_generic = re.search(r'>\s*API KEY\s*=?\s*["\'](.*?)["\']', content)
-            if match_generic:
-                generic_key = match_generic.group(1)
-                if generic_key.startswith("sk-"):
-                    if not keys["openai"]: keys["openai"] = generic_key
-                elif generic_key.startswith("AIza"):
-                    if not keys["google"]: keys["google"] = generic_key
-
-    except FileNotFoundError:
+    """Keys from the shared config loader (credentials.txt + FABRICA_* overrides)."""
+    config = config_loader.load()
+    if config is None:
         print(f"\n{RED}❌ CRITICAL ERROR: File 'credentials.txt' not found.{RESET}")
         sys.exit()
-        
-    return keys
+    return {"google": config["google_key"], "openai": config["openai_key"]}
 
 def list_google(api_key):
     print(f"\n{CYAN}>>> 🔵 Searching GOOGLE (Gemini) models...{RESET}")
@@ -103,14 +80,22 @@ def list_openai(api_key):
         print(f"{RED}❌ Error connecting to OpenAI: {e}{RESET}")
 
 # --- EXECUTION ---
-os.system('cls' if os.name == 'nt' else 'clear')
-print(f"📡 {CYAN}MODEL & CONNECTION TESTER{RESET}")
-print("======================================")
+def main():
+    os.system('cls' if os.name == 'nt' else 'clear')
+    print(f"📡 {CYAN}MODEL & CONNECTION TESTER{RESET}")
+    print("======================================")
+
+    keys = load_keys()
 
-keys = load_keys()
+    list_google(keys["google"])
+    list_openai(keys["openai"])
 
-list_google(keys["google"])
-list_openai(keys["openai"])
+    print("\n======================================")
+    print(">>> End of list.")
+    print(f">>> To compare speed and code quality, run: {YELLOW}python benchmark_modelos.py --models <model> <model> ...{RESET}")
 
-print("\n======================================")
-print(">>> End of list.")
\ No newline at end of file
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="List the models available for your keys.")
+    config_loader.use_args(config_loader.add_arguments(parser).parse_args())
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from code_validator import lint_imports
+
+MAP_WITH_INDEX = """import { Star } from 'lucide-react';
+
+const items = [{ icon: Star, label: "Fast" }];
+
+export default function Features() {
+  return <ul>{items.map(({ icon: Icon, label }, i) => <li key={i}><Icon size={16} />{label}</li>)}</ul>;
+}
+"""
+
+class LintImportsTest(unittest.TestCase):
+
+    def test_destructured_map_parameter_with_index(self):
+        self.assertEqual(lint_imports(MAP_WITH_INDEX), [])
+
+    def test_destructured_single_parameter(self):
+        self.assertEqual(lint_imports(MAP_WITH_INDEX.replace(", i) =>", ") =>").replace(" key={i}", "")), [])
+
+    def test_destructured_function_props(self):
+        code = "export default function Card({ icon: Icon, title }, ref) { return <Icon title={title} />; }"
+        self.assertEqual(lint_imports(code), [])
+
+    def test_undefined_component_is_reported(self):
+        self.assertEqual(lint_imports("export default function A() { return <Missing />; }"),
+                         ["<Missing> is used but never imported or defined"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+CREDENTIALS = """> API KEY = "AIza-file-generic"
+> OPENAI API KEY = "sk-file-openai"
+> Agent Model = "gpt-4o-mini"
+> MODEL = "llama3.2"
+"""
+
+class PrecedenceTest(unittest.TestCase):
+    """Padrões < credentials.txt < FABRICA_* < linha de comando < overrides."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(CREDENTIALS)
+        self._environ = {var: os.environ.pop(var) for var in config.ENV_VARS.values() if var in os.environ}
+        self._defaults = dict(config._defaults)
+
+    def tearDown(self):
+        os.remove(self.path)
+        for var in config.ENV_VARS.values(): os.environ.pop(var, None)
+        os.environ.update(self._environ)
+        config._defaults.update(self._defaults)
+
+    def load(self, env=None, cli=None, overrides=None):
+        os.environ.update(env or {})
+        config._defaults["overrides"] = cli or {}
+        return config.load(self.path, overrides)
+
+    def test_file_only(self):
+        cfg = self.load()
+        self.assertEqual((cfg["provider"], cfg["model"], cfg["api_key"]), ("openai", "gpt-4o-mini", "sk-file-openai"))
+        self.assertEqual(cfg["google_key"], "AIza-file-generic")
+
+    def test_env_beats_file(self):
+        cfg = self.load(env={"FABRICA_MODEL": "gpt-4o", "FABRICA_OPENAI_API_KEY": "sk-env"})
+        self.assertEqual((cfg["model"], cfg["api_key"]), ("gpt-4o", "sk-env"))
+
+    def test_generic_env_key_beats_specific_file_key(self):
+        self.assertEqual(self.load(env={"FABRICA_API_KEY": "sk-env-generic"})["api_key"], "sk-env-generic")
+
+    def test_cli_beats_env_and_file(self):
+        cfg = self.load(env={"FABRICA_MODEL": "gpt-4o", "FABRICA_OPENAI_API_KEY": "sk-env"},
+                        cli={"model": "gpt-4.1", "generic_key": "sk-cli"})
+        self.assertEqual((cfg["model"], cfg["api_key"]), ("gpt-4.1", "sk-cli"))
+
+    def test_cli_key_without_prefix_goes_to_selected_provider(self):
+        cfg = self.load(cli={"generic_key": "plain-cli-key"})
+        self.assertEqual((cfg["provider"], cfg["api_key"]), ("openai", "plain-cli-key"))
+
+    def test_cli_provider_switches_default_model(self):
+        cfg = self.load(cli={"provider": "groq", "generic_key": "gsk_cli"})
+        self.assertEqual((cfg["provider"], cfg["api_key"]), ("groq", "gsk_cli"))
+        self.assertEqual(cfg["model"], config.DEFAULT_MODELS["groq"])
+
+    def test_cli_provider_keeps_matching_model(self):
+        cfg = self.load(env={"FABRICA_MODEL": "llama-3.3-70b-versatile"}, cli={"provider": "groq"})
+        self.assertEqual(cfg["model"], "llama-3.3-70b-versatile")
+
+    def test_overrides_beat_everything(self):
+        cfg = self.load(env={"FABRICA_LOCAL_MODEL": "qwen"}, cli={"local_model": "mistral"}, overrides={"local_model": "phi3"})
+        self.assertEqual(cfg["local_model"], "phi3")
+
+    def test_same_layer_specific_beats_generic(self):
+        cfg = config.build({"generic_key": "sk-generic", "openai_key": "sk-specific", "model": "gpt-4o"})
+        self.assertEqual(cfg["api_key"], "sk-specific")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stream_writer
+from stream_writer import is_complete
+
+APOSTROPHE_IN_TEXT = """export default function List({ items }) {
+  return (
+    <p>It's {items.map(i => (
+      <b key={i}>{i}</b>
+    ))}</p>
+  );
+}
+"""
+
+class IsCompleteTest(unittest.TestCase):
+    """Texto JSX não é código: aspas nele não escondem os parênteses da mesma linha."""
+
+    def test_apostrophe_in_jsx_text(self):
+        self.assertTrue(is_complete(APOSTROPHE_IN_TEXT))
+
+    def test_quotes_and_slashes_in_jsx_text(self):
+        self.assertTrue(is_complete('const a = () => <>Don\'t "quote" https://x.y <A /></>;'))
+
+    def test_comparisons_are_not_tags(self):
+        self.assertTrue(is_complete("for (let i = 0; i < n; i++) { if (a <b) x = new Map<string, number>(); }"))
+
+    def test_truncated_inside_jsx_text(self):
+        self.assertFalse(is_complete(APOSTROPHE_IN_TEXT[:APOSTROPHE_IN_TEXT.index("It's") + 4]))
+
+    def test_unclosed_element(self):
+        self.assertFalse(is_complete("const a = <div><p>hi</p>;"))
+
+    def test_unbalanced_brackets(self):
+        self.assertFalse(is_complete("function f() { return (1; }"))
+
+class StreamToFileTest(unittest.TestCase):
+
+    def test_apostrophe_in_jsx_text_is_written(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "src", "List.jsx")
+            chunks = [APOSTROPHE_IN_TEXT[i:i + 7] for i in range(0, len(APOSTROPHE_IN_TEXT), 7)]
+            code = stream_writer.stream_to_file(iter(chunks), path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), code)
+
+if __name__ == "__main__":
+    unittest.main()
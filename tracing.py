@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import functools
+import contextlib
+import threading
+
+TRACES_DIR = os.path.join(os.getcwd(), ".traces")
+ENABLED = os.environ.get("FABRICA_TRACE", "1") not in ("0", "false", "no")
+
+class Tracer:
+    """
+    Spans por etapa do pipeline (arquiteto, builder, dependências, deploy...).
+    Cada span guarda duração e contadores (tokens, tamanhos de prompt/resposta, retries, cache hits).
+    A pilha de spans é por thread, então os builders paralelos não se misturam.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"): self._local.stack = []
+        return self._local.stack
+
+    def start(self, name, **attrs):
+        span = {"name": name, "start": time.time(), "thread": threading.current_thread().name}
+        span.update(attrs)
+        self._stack().append(span)
+        return span
+
+    def end(self, span, error=None):
+        span["duration"] = round(time.time() - span["start"], 4)
+        if error is not None: span["error"] = str(error)
+        stack = self._stack()
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i] is span:
+                del stack[i]
+                break
+        if stack: span["parent"] = stack[-1]["name"]
+        with self._lock:
+            self.spans.append(span)
+
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def annotate(self, **attrs):
+        span = self.current()
+        if span is not None: span.update(attrs)
+
+    def add(self, **counters):
+        span = self.current()
+        if span is None: return
+        for key, value in counters.items():
+            if value is None: continue
+            span[key] = span.get(key, 0) + value
+
+    def drain(self):
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+    def export_jsonl(self, spans, path=None):
+        if not spans: return None
+        if path is None:
+            os.makedirs(TRACES_DIR, exist_ok=True)
+            path = os.path.join(TRACES_DIR, time.strftime("run-%Y%m%d-%H%M%S.jsonl"))
+        with open(path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+        return path
+
+def summary_table(spans):
+    columns = ["Stage", "Calls", "Total s", "Avg s", "Max s", "Load s", "Infer s", "Tok in", "Tok out", "Prompt ch", "Resp ch", "Cache", "Retries"]
+    groups = {}
+    for span in spans:
+        groups.setdefault(span["name"], []).append(span)
+
+    rows = []
+    for name, items in groups.items():
+        durations = [s.get("duration", 0) for s in items]
+        total = lambda key: sum(s.get(key, 0) or 0 for s in items)
+        seconds = lambda key: f"{total(key):.2f}" if total(key) else "-"  # Carga/inferência: só o Ollama informa
+        rows.append([name, len(items), f"{sum(durations):.2f}", f"{sum(durations) / len(items):.2f}", f"{max(durations):.2f}",
+                     seconds("load_seconds"), seconds("inference_seconds"), total("prompt_tokens"), total("completion_tokens"), total("prompt_chars"), total("response_chars"),
+                     total("cache_hits"), total("retries")])
+    rows.sort(key=lambda r: -float(r[2]))
+    return format_table(columns, rows)
+
+def format_table(columns, rows):
+    """Tabela de texto: primeira coluna à esquerda, o resto alinhado à direita."""
+    widths = [max(len(str(x)) for x in col) for col in zip(columns, *rows)]
+    line = lambda values: "  ".join(str(v).ljust(w) if i == 0 else str(v).rjust(w) for i, (v, w) in enumerate(zip(values, widths)))
+    return "\n".join([line(columns), line(["-" * w for w in widths])] + [line(r) for r in rows])
+
+TRACER = Tracer()
+
+def traced(name):
+    """Decorator: mede a função inteira como um span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED: return func(*args, **kwargs)
+            span = TRACER.start(name)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                TRACER.end(span, error=e)
+                raise
+            TRACER.end(span)
+            return result
+        return wrapper
+    return decorator
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """Mesmo que @traced, para um trecho dentro de uma função."""
+    if not ENABLED:
+        yield None
+        return
+    current = TRACER.start(name, **attrs)
+    try:
+        yield current
+    except BaseException as e:
+        TRACER.end(current, error=e)
+        raise
+    TRACER.end(current)
+
+def annotate(**attrs):
+    TRACER.annotate(**attrs)
+
+def add(**counters):
+    TRACER.add(**counters)
+
+def finish_run(title="PIPELINE METRICS"):
+    """Imprime a tabela-resumo das etapas desde a última chamada e exporta os spans em JSONL."""
+    spans = TRACER.drain()
+    if not spans or not ENABLED: return None
+    path = TRACER.export_jsonl(spans)
+    print(f"\n📊 {title}\n{summary_table(spans)}\n   ↳ {path}")
+    return path
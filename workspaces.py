@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import shutil
+import subprocess
+
+import template_snapshot
+
+TEMPLATE_PATH = os.path.join(os.getcwd(), "base-app")
+WORKSPACES_DIR = os.path.join(os.getcwd(), "workspaces")
+MARKER = ".workspace"
+COPY_IGNORE = shutil.ignore_patterns("node_modules", "dist", ".vite", ".trash")
+MAX_AGE = 3 * 24 * 3600            # 3 dias sem uso
+MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB no total
+
+LINK_MODES = ("symlink", "hardlink", "clone", "copy")
+
+class WorkspaceManager:
+    """
+    Cria uma pasta de projeto nova por geração a partir do template base-app.
+    As pastas geradas pelos agentes (src/) não vêm do base-app, que guarda o último app interativo,
+    e sim do snapshot intocado do template (template_snapshot).
+    O node_modules do template é compartilhado em vez de reinstalado:
+      - symlink:  node_modules real com um link por pacote (npm install no workspace não altera o template)
+      - hardlink: árvore de hardlinks (mesmo disco)
+      - clone:    cópia copy-on-write (cp --reflink / cp -c), cai para hardlink se não suportado
+      - copy:     cópia completa (lenta, só para depurar)
+    """
+
+    def __init__(self, root=WORKSPACES_DIR, template=TEMPLATE_PATH, link_mode="symlink", max_age=MAX_AGE, max_bytes=MAX_BYTES):
+        if link_mode not in LINK_MODES: raise ValueError(f"Unknown link mode: {link_mode}")
+        self.root = root
+        self.template = template
+        self.link_mode = link_mode
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    def create(self, name=None):
+        name = name or time.strftime("ws-%Y%m%d-%H%M%S-") + f"{os.getpid()}-{int(time.time() * 1000) % 1000:03d}"
+        path = os.path.join(self.root, name)
+        if os.path.exists(path): self.remove(path)
+        os.makedirs(self.root, exist_ok=True)
+
+        shutil.copytree(self.template, path, ignore=self._ignore)
+        template_snapshot.get_snapshot().checkout(path)
+        modules = os.path.join(self.template, "node_modules")
+        if os.path.isdir(modules):
+            self._share_modules(modules, os.path.join(path, "node_modules"))
+        self.touch(path)
+        return path
+
+    def _ignore(self, directory, names):
+        ignored = set(COPY_IGNORE(directory, names))
+        if os.path.abspath(directory) == os.path.abspath(self.template):
+            ignored.update(name for name in names if name in template_snapshot.SNAPSHOT_FOLDERS)
+        return ignored
+
+    def touch(self, path):
+        with open(os.path.join(path, MARKER), "w", encoding="utf-8") as f:
+            f.write(str(time.time()))
+
+    def remove(self, path):
+        shutil.rmtree(path, ignore_errors=True)
+
+    def list(self):
+        """[(caminho, último uso, bytes)] do mais antigo para o mais novo."""
+        if not os.path.isdir(self.root): return []
+        items = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir(follow_symlinks=False): continue
+            marker = os.path.join(entry.path, MARKER)
+            last_used = os.path.getmtime(marker) if os.path.exists(marker) else entry.stat().st_mtime
+            items.append((entry.path, last_used, _disk_usage(entry.path)))
+        return sorted(items, key=lambda item: item[1])
+
+    def gc(self, max_age=None, max_bytes=None, keep=()):
+        """Apaga workspaces velhos e depois os menos usados até caber na cota. Retorna os removidos."""
+        max_age = self.max_age if max_age is None else max_age
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        now = time.time()
+        removed = []
+        items = [item for item in self.list() if item[0] not in keep]
+        total = sum(size for _, _, size in items)
+
+        for path, last_used, size in items:
+            if now - last_used > max_age or total > max_bytes:
+                self.remove(path)
+                removed.append(path)
+                total -= size
+        return removed
+
+    # --- COMPARTILHAMENTO DO NODE_MODULES ---
+    def _share_modules(self, src, dst):
+        if self.link_mode == "symlink":
+            try: return _link_entries(src, dst)
+            except OSError: pass  # Windows sem permissão de symlink
+        if self.link_mode == "clone" and _reflink_copy(src, dst):
+            return
+        if self.link_mode == "copy":
+            return shutil.copytree(src, dst, symlinks=True)
+        _hardlink_tree(src, dst)
+
+def _link_entries(src, dst, depth=0):
+    os.makedirs(dst, exist_ok=True)
+    for entry in os.scandir(src):
+        target = os.path.join(dst, entry.name)
+        if entry.name == ".vite":
+            continue  # Cache do Vite é por projeto
+        if entry.name == ".package-lock.json":
+            shutil.copy2(entry.path, target)
+        elif entry.name.startswith("@") and depth == 0 and entry.is_dir():
+            _link_entries(entry.path, target, depth + 1)
+        else:
+            os.symlink(entry.path, target, target_is_directory=entry.is_dir())
+
+def _hardlink_tree(src, dst):
+    def link(s, d):
+        try: os.link(s, d)
+        except OSError: shutil.copy2(s, d)
+    shutil.copytree(src, dst, symlinks=True, copy_function=link, ignore=shutil.ignore_patterns(".vite"))
+
+def _reflink_copy(src, dst):
+    cmd = ["cp", "-c", "-R", src, dst] if sys.platform == "darwin" else ["cp", "-R", "--reflink=always", src, dst]
+    try:
+        ok = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+    except OSError:
+        ok = False
+    if not ok: shutil.rmtree(dst, ignore_errors=True)
+    return ok
+
+def _disk_usage(path):
+    # Links não contam: o espaço já pertence ao template
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            if st.st_nlink == 1 and not os.path.islink(os.path.join(root, name)):
+                total += st.st_size
+    return total
+
+if __name__ == "__main__":
+    manager = WorkspaceManager()
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "gc":
+        for path in manager.gc():
+            print(f"Removed: {path}")
+    else:
+        for path, last_used, size in manager.list():
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(last_used))}  {size / 1024 / 1024:8.1f} MB  {path}")